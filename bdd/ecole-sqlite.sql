@@ -0,0 +1,57 @@
+--
+-- Schéma de la base `ecole` pour SQLite (équivalent de ecole.sql, sans les données)
+-- Appliqué par ecole.daos.sqlite_backend à l'ouverture d'une BD vide
+--
+
+CREATE TABLE IF NOT EXISTS `address` (
+  `id_address` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `street` varchar(80) NOT NULL,
+  `city` varchar(50) NOT NULL,
+  `postal_code` smallint NOT NULL
+);
+CREATE INDEX IF NOT EXISTS `idx_address_city` ON `address` (`city`, `id_address`);
+
+CREATE TABLE IF NOT EXISTS `person` (
+  `id_person` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `first_name` varchar(50) NOT NULL,
+  `last_name` varchar(50) NOT NULL,
+  `age` tinyint NOT NULL,
+  `id_address` int DEFAULT NULL UNIQUE REFERENCES `address` (`id_address`)
+);
+CREATE INDEX IF NOT EXISTS `idx_person_name` ON `person` (`last_name`, `first_name`, `id_person`);
+
+CREATE TABLE IF NOT EXISTS `teacher` (
+  `id_teacher` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `hiring_date` date NOT NULL,
+  `id_person` int NOT NULL UNIQUE REFERENCES `person` (`id_person`)
+);
+CREATE INDEX IF NOT EXISTS `idx_teacher_hiring_date` ON `teacher` (`hiring_date`, `id_teacher`);
+
+CREATE TABLE IF NOT EXISTS `student` (
+  `student_nbr` int NOT NULL PRIMARY KEY,
+  `id_person` int NOT NULL UNIQUE REFERENCES `person` (`id_person`)
+);
+
+CREATE TABLE IF NOT EXISTS `course` (
+  `id_course` INTEGER PRIMARY KEY AUTOINCREMENT,
+  `name` varchar(50) NOT NULL,
+  `start_date` date NOT NULL,
+  `end_date` date NOT NULL,
+  `id_teacher` int NOT NULL REFERENCES `teacher` (`id_teacher`)
+);
+CREATE INDEX IF NOT EXISTS `id_teacher` ON `course` (`id_teacher`);
+CREATE INDEX IF NOT EXISTS `idx_course_name` ON `course` (`name`, `id_course`);
+CREATE INDEX IF NOT EXISTS `idx_course_start_date` ON `course` (`start_date`, `id_course`);
+
+CREATE TABLE IF NOT EXISTS `takes` (
+  `student_nbr` int NOT NULL REFERENCES `student` (`student_nbr`),
+  `id_course` int NOT NULL REFERENCES `course` (`id_course`),
+  PRIMARY KEY (`student_nbr`, `id_course`)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS `idx_takes_course` ON `takes` (`id_course`);
+
+-- prochain n° à réserver des colonnes non auto-incrémentées (cf. ecole.daos.sequence)
+CREATE TABLE IF NOT EXISTS `number_sequence` (
+  `name` varchar(30) NOT NULL PRIMARY KEY,
+  `next_value` int NOT NULL
+);
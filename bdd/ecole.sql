@@ -33,7 +33,8 @@ CREATE TABLE IF NOT EXISTS `address` (
   `street` varchar(80) NOT NULL,
   `city` varchar(50) NOT NULL,
   `postal_code` smallint NOT NULL,
-  PRIMARY KEY (`id_address`)
+  PRIMARY KEY (`id_address`),
+  KEY `idx_address_city` (`city`,`id_address`)
 ) ENGINE=InnoDB AUTO_INCREMENT=4 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 --
@@ -59,7 +60,9 @@ CREATE TABLE IF NOT EXISTS `course` (
   `end_date` date NOT NULL,
   `id_teacher` int NOT NULL,
   PRIMARY KEY (`id_course`),
-  KEY `id_teacher` (`id_teacher`)
+  KEY `id_teacher` (`id_teacher`),
+  KEY `idx_course_name` (`name`,`id_course`),
+  KEY `idx_course_start_date` (`start_date`,`id_course`)
 ) ENGINE=InnoDB AUTO_INCREMENT=9 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 --
@@ -78,6 +81,27 @@ INSERT INTO `course` (`id_course`, `name`, `start_date`, `end_date`, `id_teacher
 
 -- --------------------------------------------------------
 
+--
+-- Structure de la table `number_sequence`
+-- (prochain n° à réserver des colonnes non auto-incrémentées, cf. ecole.daos.sequence)
+--
+
+DROP TABLE IF EXISTS `number_sequence`;
+CREATE TABLE IF NOT EXISTS `number_sequence` (
+  `name` varchar(30) NOT NULL,
+  `next_value` int NOT NULL,
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+--
+-- Déchargement des données de la table `number_sequence`
+--
+
+INSERT INTO `number_sequence` (`name`, `next_value`) VALUES
+('student_nbr', 4);
+
+-- --------------------------------------------------------
+
 --
 -- Structure de la table `person`
 --
@@ -90,7 +114,8 @@ CREATE TABLE IF NOT EXISTS `person` (
   `age` tinyint NOT NULL,
   `id_address` int DEFAULT NULL,
   PRIMARY KEY (`id_person`),
-  UNIQUE KEY `id_address` (`id_address`)
+  UNIQUE KEY `id_address` (`id_address`),
+  KEY `idx_person_name` (`last_name`,`first_name`,`id_person`)
 ) ENGINE=InnoDB AUTO_INCREMENT=10 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 --
@@ -173,7 +198,8 @@ CREATE TABLE IF NOT EXISTS `teacher` (
   `hiring_date` date NOT NULL,
   `id_person` int NOT NULL,
   PRIMARY KEY (`id_teacher`),
-  UNIQUE KEY `id_person` (`id_person`)
+  UNIQUE KEY `id_person` (`id_person`),
+  KEY `idx_teacher_hiring_date` (`hiring_date`,`id_teacher`)
 ) ENGINE=InnoDB AUTO_INCREMENT=7 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 
 --
@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+"""
+Mesures de performance de l'école (python -m benchmarks.<module>) :
+- bench_import     : temps d'import à froid
+- bench_projection : lectures complètes vs résumés projetés
+- bench_memory     : mémoire occupée par les objets du modèle
+- bench_school     : latences et débits des DAO et de School sur une BD peuplée (cf. seed)
+- generate         : génération et chargement en masse de gros volumes de données
+- check_async      : vérification de la couche asynchrone (AsyncDao, AsyncSchool) sur une BD peuplée
+"""
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+Mesure du temps d'import à froid de ecole.main
+
+Chaque mesure est faite dans un interpréteur neuf ; l'hôte de BD est volontairement
+injoignable pour vérifier que l'import n'ouvre aucune connexion.
+Usage : python -m benchmarks.bench_import [--runs N]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SNIPPET = ("import time; t = time.perf_counter(); import ecole.main; "
+           "print(time.perf_counter() - t)")
+
+
+def measure_once(env: dict[str, str]) -> float:
+    """Temps (s) d'import de ecole.main dans un sous-processus Python neuf."""
+    output = subprocess.run([sys.executable, "-c", SNIPPET], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return float(output.strip())
+
+
+def slowest_modules(env: dict[str, str], count: int) -> list[tuple[int, str]]:
+    """Modules les plus coûteux à importer, d'après python -X importtime."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import ecole.main"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, check=True).stderr
+    timings = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            timings.append((int(cumulative), name.rstrip()))
+    return sorted(timings, reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="nombre d'imports mesurés")
+    parser.add_argument("--top", type=int, default=10, help="nombre de modules détaillés")
+    args = parser.parse_args()
+
+    # adresse non routable : une connexion à l'import bloquerait jusqu'au timeout
+    env = dict(os.environ, ECOLE_DB_HOST="10.255.255.1", PYTHONDONTWRITEBYTECODE="1")
+    timings = [measure_once(env) for _ in range(args.runs)]
+
+    print(f"import ecole.main ({args.runs} exécutions)")
+    print(f"  min    : {min(timings) * 1000:8.2f} ms")
+    print(f"  médiane: {statistics.median(timings) * 1000:8.2f} ms")
+    print(f"  max    : {max(timings) * 1000:8.2f} ms")
+    print("modules les plus coûteux (cumulé, µs) :")
+    for cumulative, name in slowest_modules(env, args.top):
+        print(f"  {cumulative:>8}  {name}")
+
+
+if __name__ == '__main__':
+    main()
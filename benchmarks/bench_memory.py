@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+"""
+Mémoire occupée par les objets du modèle, mesurée avec tracemalloc
+
+Pour chaque volume, une école complète est construite en mémoire (élèves avec
+leur adresse, enseignants, cours, inscriptions), d'une part avec les classes de
+ecole.models (__slots__, listes allouées à la demande), d'autre part avec des
+dataclasses classiques équivalentes (__dict__, listes allouées à la création).
+Usage : python -m benchmarks.bench_memory [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Optional
+
+from ecole.models.address import Address
+from ecole.models.course import Course
+from ecole.models.student import Student
+from ecole.models.teacher import Teacher
+
+
+# ---- équivalents sans __slots__, pour comparaison ----
+@dataclass
+class DictAddress:
+    id: Optional[int] = field(default=None, init=False)
+    street: str
+    city: str
+    postal_code: int
+
+
+@dataclass
+class DictCourse:
+    id: Optional[int] = field(default=None, init=False)
+    name: str
+    start_date: date
+    end_date: date
+    id_teacher: Optional[int] = None
+    teacher: Optional['DictTeacher'] = field(default=None, init=False)
+    students_taking_it: list = field(default_factory=list, init=False)
+
+
+@dataclass
+class DictStudent:
+    first_name: str
+    last_name: str
+    age: int
+    address: Optional[DictAddress] = field(default=None, init=False)
+    student_nbr: int = field(default=0, init=False)
+    courses_taken: list = field(default_factory=list, init=False)
+
+
+@dataclass
+class DictTeacher:
+    first_name: str
+    last_name: str
+    age: int
+    address: Optional[DictAddress] = field(default=None, init=False)
+    id: Optional[int] = field(default=None, init=False)
+    hiring_date: date = date(2023, 9, 4)
+    courses_teached: list = field(default_factory=list, init=False)
+
+
+MODELS = {
+    'slots (ecole.models)': (Address, Course, Student, Teacher),
+    'dict (référence)': (DictAddress, DictCourse, DictStudent, DictTeacher),
+}
+
+
+def build_school(count: int, address_cls, course_cls, student_cls, teacher_cls) -> list:
+    """Construit count élèves (avec adresse), count/100 enseignants, count/50 cours,
+    et 3 inscriptions par élève sur 1 élève sur 2 ; renvoie le tout."""
+    teachers = [teacher_cls(f"Prénom{i}", f"Nom{i}", 30, date(2023, 9, 4))
+                for i in range(max(1, count // 100))]
+    courses = [course_cls(f"Cours{i}", date(2024, 1, 1), date(2024, 2, 1), i % len(teachers))
+               for i in range(max(1, count // 50))]
+    for i, course in enumerate(courses):
+        course.teacher = teachers[i % len(teachers)]
+        course.teacher.courses_teached.append(course)
+    students = []
+    for i in range(count):
+        student = student_cls(f"Prénom{i}", f"Nom{i}", 12)
+        student.address = address_cls(f"{i} rue des Pinsons", "Castanet", 31320)
+        if i % 2 == 0:
+            for course in courses[i % len(courses):i % len(courses) + 3]:
+                course.students_taking_it.append(student)
+                student.courses_taken.append(course)
+        students.append(student)
+    return [teachers, courses, students]
+
+
+def measure(build: Callable[[], list]) -> int:
+    """Octets alloués (et toujours vivants) par build()."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    school = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del school
+    gc.collect()
+    return after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="nombres d'élèves simulés")
+    args = parser.parse_args()
+
+    print(f"{'élèves':>10} {'modèle':<22} {'Mo':>10} {'octets/élève':>13}")
+    for count in args.sizes:
+        for name, classes in MODELS.items():
+            allocated = measure(lambda: build_school(count, *classes))
+            print(f"{count:>10} {name:<22} {allocated / 2**20:>10.1f} {allocated / count:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
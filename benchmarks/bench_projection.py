@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+Comparaison des lectures complètes (iter_all, SELECT *) et des résumés projetés
+(iter_summaries) : octets reçus du serveur et temps de lecture/décodage
+
+Le pool est limité à une connexion, pour que le compteur de session Bytes_sent
+du serveur mesure exactement les lectures effectuées.
+Usage : python -m benchmarks.bench_projection [--runs N]
+"""
+
+import argparse
+import dataclasses
+import statistics
+import time
+from typing import Callable, Iterable
+
+from ecole.daos.address_dao import AddressDao
+from ecole.daos.config import DbConfig
+from ecole.daos.course_dao import CourseDao
+from ecole.daos.dao import Dao
+from ecole.daos.student_dao import StudentDao
+from ecole.daos.teacher_dao import TeacherDao
+
+LISTINGS: dict[str, tuple[Callable[[], Iterable], Callable[[], Iterable]]] = {
+    'course': (CourseDao.iter_all, CourseDao.iter_summaries),
+    'address': (AddressDao.iter_all, AddressDao.iter_summaries),
+    'teacher': (TeacherDao().iter_all, TeacherDao().iter_summaries),
+    'student': (StudentDao().iter_all, StudentDao().iter_summaries),
+}
+
+
+def bytes_sent() -> int:
+    """Octets envoyés par le serveur sur la connexion (unique) du pool."""
+    with Dao.connection() as connection, connection.cursor() as cursor:
+        cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+        return int(cursor.fetchone()['Value'])
+
+
+def measure(listing: Callable[[], Iterable], runs: int) -> tuple[int, float, int]:
+    """(octets reçus, temps médian en s, nombre de lignes) d'un parcours complet."""
+    # coût propre d'une lecture du compteur, à déduire
+    overhead = -(bytes_sent() - bytes_sent())
+    received, timings, count = 0, [], 0
+    for _ in range(runs):
+        before = bytes_sent()
+        start = time.perf_counter()
+        count = sum(1 for _ in listing())
+        timings.append(time.perf_counter() - start)
+        received = bytes_sent() - before - overhead
+    return received, statistics.median(timings), count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="nombre de parcours par mesure")
+    args = parser.parse_args()
+
+    Dao.configure(dataclasses.replace(DbConfig.from_env(), pool_min_size=1, pool_max_size=1))
+    print(f"{'table':<8} {'lignes':>8} {'octets *':>12} {'octets proj.':>12} {'gain':>6}"
+          f" {'ms *':>9} {'ms proj.':>9} {'gain':>6}")
+    for table, (full, projected) in LISTINGS.items():
+        full_bytes, full_time, count = measure(full, args.runs)
+        proj_bytes, proj_time, _ = measure(projected, args.runs)
+        print(f"{table:<8} {count:>8} {full_bytes:>12} {proj_bytes:>12}"
+              f" {1 - proj_bytes / full_bytes if full_bytes else 0:>6.0%}"
+              f" {full_time * 1000:>9.2f} {proj_time * 1000:>9.2f}"
+              f" {1 - proj_time / full_time if full_time else 0:>6.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+
+"""
+Latences (p50/p95/p99) et débits des méthodes des DAO et des principaux cas
+d'utilisation de School, sur une BD peuplée par benchmarks.seed
+
+Le cache de lecture est désactivé (sauf --cache) pour mesurer les accès à la BD.
+Les résultats sont enregistrés en JSON (--output) et peuvent être comparés à ceux
+d'une exécution précédente (--compare) : une opération dont le p50 se dégrade de
+plus de --threshold est signalée et le code de sortie vaut 1.
+Usage : python -m benchmarks.bench_school [--backend sqlite] [--students 10000]
+        [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import contextlib
+import dataclasses
+import io
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from benchmarks.seed import SeededIds, Volumes, seed
+from ecole.business.school import School
+from ecole.daos.address_dao import AddressDao
+from ecole.daos.cache import read_cache
+from ecole.daos.config import DbConfig
+from ecole.daos.course_dao import CourseDao
+from ecole.daos.dao import Dao
+from ecole.daos.student_dao import StudentDao
+from ecole.daos.teacher_dao import TeacherDao
+from ecole.models.address import Address
+from ecole.models.course import Course
+from ecole.models.student import Student
+from ecole.models.teacher import Teacher
+
+
+@dataclass
+class Operation:
+    """Opération mesurée :
+    - name  : nom sous lequel les résultats sont enregistrés
+    - call  : exécution n° i de l'opération
+    - scan  : parcours complet d'une table (moins d'itérations, cf. --scan-iterations)
+    - check : succès d'un appel d'après sa valeur de retour (par défaut, toujours)
+    """
+    name: str
+    call: Callable[[int], Any]
+    scan: bool = False
+    check: Optional[Callable[[Any], bool]] = None
+
+
+@dataclass
+class Result:
+    calls: int
+    failures: int
+    total_s: float
+    ops_per_s: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def dao_operations(name: str, dao: Any, make: Callable[[int], Any], ids: list[int],
+                   modify: Callable[[Any], None], rng: random.Random) -> list[Operation]:
+    """create, read, read_all, update et delete d'un DAO ; update et delete portent
+    sur les entités créées par create, dans l'ordre."""
+    created: list = []
+
+    def create(i: int) -> int:
+        obj = make(i)
+        created.append(obj)
+        return dao.create(obj)
+
+    def update(i: int) -> bool:
+        obj = created[i % len(created)]
+        modify(obj)
+        return dao.update(obj)
+
+    return [
+        Operation(f"{name}.create", create, check=lambda new_id: bool(new_id)),
+        Operation(f"{name}.read", lambda i: dao.read(rng.choice(ids)), check=lambda obj: obj is not None),
+        Operation(f"{name}.read_all", lambda i: dao.read_all(), scan=True),
+        Operation(f"{name}.update", update, check=bool),
+        Operation(f"{name}.delete", lambda i: dao.delete(created.pop()), check=bool),
+    ]
+
+
+def operations(ids: SeededIds, rng: random.Random) -> list[Operation]:
+    """Opérations mesurées, dans l'ordre d'exécution."""
+    start = date(2025, 1, 1)
+    ops = [
+        *dao_operations("AddressDao", AddressDao(),
+                        lambda i: Address(f"{i} allée des Mesures", "Toulouse", 31000), ids.addresses,
+                        lambda a: setattr(a, 'city', "Blagnac"), rng),
+        *dao_operations("TeacherDao", TeacherDao(),
+                        lambda i: Teacher(f"Prénom{i}", "Mesure", 40, start), ids.teachers,
+                        lambda t: setattr(t, 'age', t.age + 1), rng),
+        *dao_operations("StudentDao", StudentDao(),
+                        lambda i: Student(f"Prénom{i}", "Mesure", 12), ids.students,
+                        lambda s: setattr(s, 'age', s.age + 1), rng),
+        *dao_operations("CourseDao", CourseDao(),
+                        lambda i: Course(f"Mesure{i}", start, start + timedelta(days=10), ids.teachers[0]),
+                        ids.courses, lambda c: setattr(c, 'name', c.name + "!"), rng),
+        Operation("CourseDao.read_all_with_teacher", lambda i: CourseDao.read_all_with_teacher(), scan=True),
+        Operation("School.get_course_by_id", lambda i: School.get_course_by_id(rng.choice(ids.courses)),
+                  check=lambda obj: obj is not None),
+        Operation("School.get_student_by_id", lambda i: School.get_student_by_id(rng.choice(ids.students)),
+                  check=lambda obj: obj is not None),
+        Operation("School.create_course",
+                  lambda i: School.create_course(f"Mesure{i}", start, start, rng.choice(ids.teachers)),
+                  check=lambda message: "succès" in message),
+        Operation("School.enroll_students",
+                  lambda i: School.enroll_students(rng.choice(ids.courses), rng.sample(ids.students, 30))),
+        Operation("School.get_courses_of_student",
+                  lambda i: School.get_courses_of_student(rng.choice(ids.students))),
+        Operation("School.get_courses_page", lambda i: School.get_courses_page(limit=50, order_by='name')),
+        Operation("School.get_all_courses", lambda i: School.get_all_courses(), scan=True),
+        Operation("School.get_all_courses_with_teacher", lambda i: School.get_all_courses_with_teacher(),
+                  scan=True),
+        Operation("School.get_all_teachers", lambda i: School.get_all_teachers(), scan=True),
+        Operation("School.get_all_students", lambda i: School.get_all_students(), scan=True),
+        Operation("School.print_all_database", lambda i: School.print_all_database(io.StringIO()), scan=True),
+        Operation("School.load_from_database", lambda i: School().load_from_database(), scan=True),
+    ]
+    return ops
+
+
+def measure(operation: Operation, iterations: int) -> Result:
+    """Exécute iterations fois l'opération ; les messages d'erreur des DAO sont écartés."""
+    timings, failures = [], 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(iterations):
+            begin = time.perf_counter()
+            try:
+                value = operation.call(i)
+                ok = operation.check is None or operation.check(value)
+            except Exception:
+                ok = False
+            timings.append(time.perf_counter() - begin)
+            failures += not ok
+    total = sum(timings)
+    quantiles = statistics.quantiles(timings, n=100, method='inclusive') if len(timings) > 1 else timings * 99
+    return Result(calls=iterations, failures=failures, total_s=total,
+                  ops_per_s=iterations / total if total else 0.0,
+                  p50_ms=quantiles[49] * 1000, p95_ms=quantiles[94] * 1000, p99_ms=quantiles[98] * 1000)
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    """Opérations dont le p50 s'est dégradé de plus de threshold par rapport à baseline."""
+    regressions = []
+    print(f"\n{'opération':<38} {'p50 réf. ms':>12} {'p50 ms':>10} {'écart':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['p50_ms'], result['p50_ms']
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  RÉGRESSION"
+        print(f"{name:<38} {before:>12.3f} {after:>10.3f} {change:>+8.0%}{flag}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=["mysql", "sqlite"], help="moteur (par défaut ECOLE_DB_BACKEND)")
+    parser.add_argument("--students", type=int, default=Volumes.students)
+    parser.add_argument("--teachers", type=int, default=Volumes.teachers)
+    parser.add_argument("--courses", type=int, default=Volumes.courses)
+    parser.add_argument("--takes-per-student", type=int, default=Volumes.takes_per_student)
+    parser.add_argument("--iterations", type=int, default=200, help="appels par opération unitaire")
+    parser.add_argument("--scan-iterations", type=int, default=5, help="appels par parcours complet")
+    parser.add_argument("--cache", action="store_true", help="conserver le cache de lecture")
+    parser.add_argument("--seed", type=int, default=42, help="graine du générateur aléatoire")
+    parser.add_argument("--output", type=Path, help="fichier JSON des résultats")
+    parser.add_argument("--compare", type=Path, help="résultats JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2, help="dégradation tolérée du p50")
+    args = parser.parse_args()
+
+    config = DbConfig.from_env()
+    if args.backend:
+        config = dataclasses.replace(config, backend=args.backend)
+    Dao.configure(config)
+    volumes = Volumes(args.students, args.teachers, args.courses, args.takes_per_student)
+    rng = random.Random(args.seed)
+
+    begin = time.perf_counter()
+    ids = seed(volumes, rng)
+    print(f"BD {config.backend} peuplée en {time.perf_counter() - begin:.2f} s: {volumes}")
+    if not args.cache:
+        read_cache.configure(0, config.cache_ttl)
+
+    results: dict[str, dict] = {}
+    print(f"\n{'opération':<38} {'appels':>7} {'échecs':>7} {'op/s':>10}"
+          f" {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for operation in operations(ids, rng):
+        result = measure(operation, args.scan_iterations if operation.scan else args.iterations)
+        results[operation.name] = dataclasses.asdict(result)
+        print(f"{operation.name:<38} {result.calls:>7} {result.failures:>7} {result.ops_per_s:>10.1f}"
+              f" {result.p50_ms:>9.3f} {result.p95_ms:>9.3f} {result.p99_ms:>9.3f}")
+
+    if args.output:
+        report = {
+            'meta': {'date': datetime.now().isoformat(timespec='seconds'), 'backend': config.backend,
+                     'python': platform.python_version(), 'volumes': dataclasses.asdict(volumes),
+                     'iterations': args.iterations, 'scan_iterations': args.scan_iterations,
+                     'cache': args.cache},
+            'results': results,
+        }
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"\nRésultats enregistrés dans {args.output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding='utf-8'))['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+Vérification de la couche asynchrone (AsyncDao, AsyncSchool) sur une BD peuplée par
+benchmarks.seed : résultats identiques à ceux de School, boucle d'événements jamais
+bloquée, appels simultanés sérialisés dans une unité de travail
+
+La BD désignée par les variables ECOLE_DB_* (par défaut, un serveur MySQL local) est
+réinitialisée. Chaque vérification affiche OK ou ÉCHEC ; le code de sortie vaut 1 si
+l'une d'elles a échoué.
+Usage : python -m benchmarks.check_async [--backend sqlite] [--students 1000]
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import random
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Coroutine
+
+from benchmarks.seed import SeededIds, Volumes, seed
+from ecole.business.async_school import AsyncSchool
+from ecole.business.school import School
+from ecole.daos.config import DbConfig
+from ecole.daos.dao import Dao
+from ecole.daos.async_dao import run_in_thread
+from ecole.daos.student_dao import StudentDao
+from ecole.models.student import Student
+
+
+async def same_results_as_school(school: AsyncSchool, ids: SeededIds) -> None:
+    """Les lectures simultanées renvoient les mêmes entités que School."""
+    course, teacher, student, address = await school.gather(
+        school.get_course_by_id(ids.courses[0]), school.get_teacher_by_id(ids.teachers[0]),
+        school.get_student_by_id(ids.students[0]), school.get_address_by_id(ids.addresses[0]))
+    assert course == School.get_course_by_id(ids.courses[0])
+    assert teacher == School.get_teacher_by_id(ids.teachers[0])
+    assert student == School.get_student_by_id(ids.students[0])
+    assert address == School.get_address_by_id(ids.addresses[0])
+
+
+async def resolve_matches_school(school: AsyncSchool, ids: SeededIds) -> None:
+    """resolve() mène les lectures groupées simultanément, avec le même résultat que School.resolve."""
+    refs = [('student', nbr) for nbr in ids.students[:50]] + [('course', id_course) for id_course in ids.courses[:20]] \
+        + [('teacher', id_teacher) for id_teacher in ids.teachers[:10]] + [('student', -1)]
+    assert await school.resolve(refs) == School.resolve(refs)
+
+
+async def iter_all_matches_read_all(school: AsyncSchool, ids: SeededIds) -> None:
+    """Le parcours asynchrone, paquet par paquet, renvoie toutes les entités."""
+    students = [student async for student in school.students.iter_all(batch_size=97)]
+    assert [s.student_nbr for s in students] == [s.student_nbr for s in StudentDao().read_all()]
+
+
+async def loop_not_blocked(school: AsyncSchool, ids: SeededIds) -> None:
+    """La boucle d'événements continue de tourner pendant une lecture complète."""
+    ticks = 0
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    try:
+        await school.get_all_students()
+    finally:
+        done.set()
+        await task
+    # bloquée, la boucle n'aurait fait qu'un tour avant la fin de la lecture
+    assert ticks > 10, f"boucle bloquée ({ticks} tour(s))"
+
+
+async def serialized_in_unit_of_work(school: AsyncSchool, ids: SeededIds) -> None:
+    """Dans une School.transaction() synchrone, des appels lancés par gather ne se
+    chevauchent pas sur la connexion de l'unité et voient ses écritures en attente."""
+    active, overlaps = 0, 0
+    lock = threading.Lock()
+
+    def tracked(call: Callable[[], Any]) -> Any:
+        nonlocal active, overlaps
+        with lock:
+            active += 1
+            overlaps += active > 1
+        try:
+            time.sleep(0.01)
+            return call()
+        finally:
+            with lock:
+                active -= 1
+
+    pending = Student('Async', 'Pending', 20)
+    StudentDao().create(pending)  # création en attente dans l'unité
+    results = await asyncio.gather(
+        *(run_in_thread(tracked, lambda nbr=nbr: StudentDao().read(nbr)) for nbr in ids.students[:10]),
+        school.get_all_students())
+    assert not overlaps, f"{overlaps} appel(s) simultané(s) sur la connexion de l'unité"
+    assert all(results[:10]), "lecture manquante"
+    assert 'Pending' in results[10], "création en attente absente de la liste"
+
+
+class _Rollback(Exception):
+    """Annule la transaction d'une vérification."""
+
+
+def run(name: str, check: Callable[[AsyncSchool, SeededIds], Coroutine], ids: SeededIds,
+        in_transaction: bool = False) -> bool:
+    school = AsyncSchool()
+    begin = time.perf_counter()
+    try:
+        if in_transaction:
+            try:
+                with School.transaction():
+                    asyncio.run(check(school, ids))
+                    # rien n'est laissé en BD par la vérification
+                    raise _Rollback()
+            except _Rollback:
+                pass
+        else:
+            asyncio.run(check(school, ids))
+    except Exception:
+        print(f"ÉCHEC {name}")
+        traceback.print_exc()
+        return False
+    print(f"OK    {name} ({(time.perf_counter() - begin) * 1e3:.1f} ms)")
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=["mysql", "sqlite"], help="moteur (par défaut ECOLE_DB_BACKEND)")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42, help="graine du générateur aléatoire")
+    args = parser.parse_args()
+
+    config = DbConfig.from_env()
+    if args.backend:
+        config = dataclasses.replace(config, backend=args.backend)
+    Dao.configure(config)
+    ids = seed(Volumes(students=args.students, teachers=20, courses=50), random.Random(args.seed))
+    print(f"BD {config.backend} peuplée")
+
+    results = [
+        run("lectures simultanées identiques à School", same_results_as_school, ids),
+        run("resolve identique à School.resolve", resolve_matches_school, ids),
+        run("iter_all identique à read_all", iter_all_matches_read_all, ids),
+        run("boucle d'événements non bloquée", loop_not_blocked, ids),
+        run("appels sérialisés dans une unité de travail", serialized_in_unit_of_work, ids,
+            in_transaction=True),
+    ]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+
+"""
+Génération de gros volumes de données réalistes pour les tests de charge
+
+Les lignes (adresses, personnes, élèves, enseignants, cours, inscriptions) reçoivent
+des ids explicites, à la suite des ids existants : chaque paquet est donc généré
+indépendamment, dans des processus parallèles, sous forme de fichiers CSV. Ceux-ci
+sont chargés au fil de leur production, par LOAD DATA LOCAL INFILE (--load-data,
+MySQL) ou par INSERT multi-lignes, les contraintes n'étant vérifiées qu'une fois à
+la fin (clés étrangères et unicité désactivées pendant le chargement sur MySQL,
+différées jusqu'à la validation sur SQLite).
+Usage : python -m benchmarks.generate [--students 1000000] [--teachers 20000]
+        [--courses 50000] [--takes-per-student 3] [--workers 8] [--load-data]
+"""
+
+import argparse
+import csv
+import dataclasses
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Iterator, Sequence
+
+from ecole.daos.config import DbConfig
+from ecole.daos.dao import Dao
+from ecole.daos.sequence import student_numbers
+
+FIRST_NAMES = ("Paul", "Valérie", "Louis", "Emma", "Jade", "Léo", "Hugo", "Chloé", "Lina", "Gabriel",
+               "Raphaël", "Louise", "Arthur", "Alice", "Jules", "Inès", "Adam", "Léna", "Lucas", "Zoé",
+               "Nathan", "Manon", "Tom", "Camille", "Sacha", "Rose", "Noah", "Anna", "Ethan", "Lou")
+LAST_NAMES = ("Dubois", "Dumont", "Berthot", "Martin", "Bernard", "Thomas", "Petit", "Robert", "Richard",
+              "Durand", "Leroy", "Moreau", "Simon", "Laurent", "Lefebvre", "Michel", "Garcia", "David",
+              "Bertrand", "Roux", "Vincent", "Fournier", "Morel", "Girard", "André", "Mercier", "Blanc")
+STREETS = ("rue des Pinsons", "avenue Jean Zay", "impasse des Coteaux", "allée des Tilleuls",
+           "chemin du Moulin", "boulevard de Strasbourg", "place du Capitole", "rue de la Pomme")
+CITIES = (("Toulouse", 31000), ("Castanet", 31320), ("Cornebarrieu", 31150), ("Blagnac", 31700),
+          ("Colomiers", 31770), ("Balma", 31130), ("Muret", 31600), ("Tournefeuille", 31170))
+SUBJECTS = ("Français", "Histoire", "Géographie", "Mathématiques", "Physique", "Chimie", "Anglais",
+            "Sport", "Musique", "Arts plastiques", "Espagnol", "SVT", "Technologie", "Latin")
+
+# colonnes chargées, par table
+COLUMNS = {
+    'address': ('id_address', 'street', 'city', 'postal_code'),
+    'person': ('id_person', 'first_name', 'last_name', 'age', 'id_address'),
+    'student': ('student_nbr', 'id_person'),
+    'teacher': ('id_teacher', 'hiring_date', 'id_person'),
+    'course': ('id_course', 'name', 'start_date', 'end_date', 'id_teacher'),
+    'takes': ('student_nbr', 'id_course'),
+}
+
+# (table, clé étrangère, table référencée, clé référencée) vérifiées après chargement
+FOREIGN_KEYS = (
+    ('person', 'id_address', 'address', 'id_address'),
+    ('student', 'id_person', 'person', 'id_person'),
+    ('teacher', 'id_person', 'person', 'id_person'),
+    ('course', 'id_teacher', 'teacher', 'id_teacher'),
+    ('takes', 'student_nbr', 'student', 'student_nbr'),
+    ('takes', 'id_course', 'course', 'id_course'),
+)
+UNIQUE_KEYS = (('person', 'id_address'), ('student', 'id_person'), ('teacher', 'id_person'))
+
+# valeur NULL dans les fichiers CSV (convention de LOAD DATA)
+NULL = r'\N'
+
+
+@dataclass(frozen=True)
+class Plan:
+    """Volumes à générer et premier id libre de chaque table :
+    les personnes des élèves précèdent celles des enseignants, et l'élève n° i
+    habite l'adresse first_address + i (id_address est unique dans person)."""
+    students: int
+    teachers: int
+    courses: int
+    takes_per_student: int
+    first_address: int
+    first_person: int
+    first_student: int
+    first_teacher: int
+    first_course: int
+    teacher_ids: Sequence[int]
+    course_ids: Sequence[int]
+
+
+def plan(students: int, teachers: int, courses: int, takes_per_student: int) -> Plan:
+    """Calcule les plages d'ids à partir des plus grands ids existants (les n° d'élève
+    sont réservés d'un bloc dans leur séquence, cf. student_numbers) ; les cours
+    générés sont confiés aux nouveaux enseignants (aux existants à défaut) et les
+    inscriptions portent sur les nouveaux cours (les existants à défaut)."""
+    with Dao.connection() as connection, connection.cursor() as cursor:
+        def next_id(table: str, column: str) -> int:
+            cursor.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 AS next_id FROM {table}")
+            return int(cursor.fetchone()['next_id'])
+
+        def existing(table: str, column: str) -> list[int]:
+            cursor.execute(f"SELECT {column} FROM {table}")
+            return [record[column] for record in cursor.fetchall()]
+
+        first_teacher, first_course = next_id('teacher', 'id_teacher'), next_id('course', 'id_course')
+        teacher_ids = (range(first_teacher, first_teacher + teachers) if teachers
+                       else existing('teacher', 'id_teacher'))
+        course_ids = (range(first_course, first_course + courses) if courses
+                      else existing('course', 'id_course'))
+        first_student = student_numbers.reserve(cursor, students).start
+        connection.commit()
+        return Plan(students, teachers, courses, takes_per_student,
+                    next_id('address', 'id_address'), next_id('person', 'id_person'),
+                    first_student, first_teacher, first_course, teacher_ids, course_ids)
+
+
+def generate_chunk(kind: str, start: int, stop: int, p: Plan, seed: int, directory: str) -> dict[str, tuple[str, int]]:
+    """Génère (dans un processus de travail) les lignes des élèves, enseignants ou cours
+    n° start à stop - 1 et les écrit en CSV dans directory.
+
+    :return: pour chaque table, (chemin du fichier, nombre de lignes)
+    """
+    rng = random.Random(f"{seed}-{kind}-{start}")
+    rows: dict[str, list[tuple]] = {}
+    if kind == 'student':
+        addresses, persons, students, takes = [], [], [], []
+        sample_size = min(p.takes_per_student, len(p.course_ids))
+        for i in range(start, stop):
+            city, postal_code = rng.choice(CITIES)
+            addresses.append((p.first_address + i, f"{rng.randint(1, 200)} {rng.choice(STREETS)}",
+                              city, postal_code))
+            persons.append((p.first_person + i, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+                            rng.randint(11, 18), p.first_address + i))
+            students.append((p.first_student + i, p.first_person + i))
+            takes.extend((p.first_student + i, id_course) for id_course in rng.sample(p.course_ids, sample_size))
+        rows = {'address': addresses, 'person': persons, 'student': students, 'takes': takes}
+    elif kind == 'teacher':
+        persons, teachers = [], []
+        for i in range(start, stop):
+            id_person = p.first_person + p.students + i
+            persons.append((id_person, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), rng.randint(23, 65), NULL))
+            teachers.append((p.first_teacher + i, date(2000, 9, 1) + timedelta(days=rng.randint(0, 9000)),
+                             id_person))
+        rows = {'person': persons, 'teacher': teachers}
+    elif kind == 'course':
+        courses = []
+        for i in range(start, stop):
+            start_date = date(2024, 9, 2) + timedelta(days=rng.randint(0, 280))
+            courses.append((p.first_course + i, f"{rng.choice(SUBJECTS)} {i % 12 + 1}", start_date,
+                            start_date + timedelta(days=rng.randint(5, 90)), rng.choice(p.teacher_ids)))
+        rows = {'course': courses}
+
+    written = {}
+    for table, table_rows in rows.items():
+        path = os.path.join(directory, f"{table}-{kind}-{start}.csv")
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            csv.writer(file, lineterminator='\n').writerows(table_rows)
+        written[table] = (path, len(table_rows))
+    return written
+
+
+def chunks(p: Plan, chunk_size: int) -> Iterator[tuple[str, int, int]]:
+    for kind, count in (('teacher', p.teachers), ('course', p.courses), ('student', p.students)):
+        for start in range(0, count, chunk_size):
+            yield kind, start, min(start + chunk_size, count)
+
+
+@contextmanager
+def bulk_connection(load_data: bool) -> Iterator[Any]:
+    """Connexion de chargement : dédiée (local_infile) pour LOAD DATA, sinon empruntée au pool."""
+    if load_data:
+        connection = Dao.config.connect(local_infile=True)
+        try:
+            with suspended_checks(connection):
+                yield connection
+        finally:
+            connection.close()
+    else:
+        with Dao.connection() as connection, suspended_checks(connection):
+            yield connection
+
+
+@contextmanager
+def suspended_checks(connection: Any) -> Iterator[None]:
+    """Suspend la vérification des contraintes pendant le chargement : désactivée
+    sur MySQL (puis rétablie), différée jusqu'à la validation sur SQLite."""
+    sqlite = Dao.config.backend == 'sqlite'
+    with connection.cursor() as cursor:
+        if sqlite:
+            cursor.execute("PRAGMA defer_foreign_keys=ON")
+        else:
+            cursor.execute("SET FOREIGN_KEY_CHECKS=0")
+            cursor.execute("SET UNIQUE_CHECKS=0")
+    try:
+        yield
+    finally:
+        if not sqlite:
+            with connection.cursor() as cursor:
+                cursor.execute("SET UNIQUE_CHECKS=1")
+                cursor.execute("SET FOREIGN_KEY_CHECKS=1")
+
+
+def load_file(connection: Any, table: str, path: str, load_data: bool, batch_size: int = 5000) -> None:
+    """Charge un fichier CSV dans table."""
+    columns = ", ".join(COLUMNS[table])
+    with connection.cursor() as cursor:
+        if load_data:
+            cursor.execute(f"LOAD DATA LOCAL INFILE %s INTO TABLE {table} CHARACTER SET utf8mb4"
+                           f" FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"'"
+                           f" LINES TERMINATED BY '\\n' ({columns})", (path,))
+            return
+        sql = f"INSERT INTO {table} ({columns}) VALUES ({', '.join(['%s'] * len(COLUMNS[table]))})"
+        with open(path, newline='', encoding='utf-8') as file:
+            batch = []
+            for row in csv.reader(file):
+                batch.append([None if value == NULL else value for value in row])
+                if len(batch) == batch_size:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+
+
+def verify() -> dict[str, int]:
+    """Vérifie une fois pour toutes les clés étrangères et les unicités du chargement.
+
+    :return: nombre de lignes en infraction par contrainte (vide si tout est correct)
+    """
+    violations = {}
+    with Dao.connection() as connection, connection.cursor() as cursor:
+        for table, column, parent, key in FOREIGN_KEYS:
+            cursor.execute(f"SELECT COUNT(*) AS n FROM {table} c LEFT JOIN {parent} p ON c.{column} = p.{key}"
+                           f" WHERE c.{column} IS NOT NULL AND p.{key} IS NULL")
+            if count := cursor.fetchone()['n']:
+                violations[f"{table}.{column} -> {parent}.{key}"] = count
+        for table, column in UNIQUE_KEYS:
+            cursor.execute(f"SELECT COUNT(*) AS n FROM (SELECT {column} FROM {table} WHERE {column} IS NOT NULL"
+                           f" GROUP BY {column} HAVING COUNT(*) > 1) d")
+            if count := cursor.fetchone()['n']:
+                violations[f"unique {table}.{column}"] = count
+    return violations
+
+
+def generate(p: Plan, workers: int, chunk_size: int, seed: int, load_data: bool,
+             directory: str) -> dict[str, int]:
+    """Génère les paquets en parallèle et charge chacun dès qu'il est prêt.
+
+    :return: nombre de lignes chargées par table
+    """
+    loaded = dict.fromkeys(COLUMNS, 0)
+    with ProcessPoolExecutor(max_workers=workers) as executor, bulk_connection(load_data) as connection:
+        futures = [executor.submit(generate_chunk, kind, start, stop, p, seed, directory)
+                   for kind, start, stop in chunks(p, chunk_size)]
+        for future in as_completed(futures):
+            for table, (path, count) in future.result().items():
+                load_file(connection, table, path, load_data)
+                loaded[table] += count
+                os.remove(path)
+            if Dao.config.backend != 'sqlite':
+                # transactions de la taille d'un paquet (journal d'annulation borné)
+                connection.commit()
+        connection.commit()
+    return loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--backend", choices=["mysql", "sqlite"], help="moteur (par défaut ECOLE_DB_BACKEND)")
+    parser.add_argument("--students", type=int, default=1_000_000)
+    parser.add_argument("--teachers", type=int, default=20_000)
+    parser.add_argument("--courses", type=int, default=50_000)
+    parser.add_argument("--takes-per-student", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processus de génération")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="élèves, enseignants ou cours par paquet")
+    parser.add_argument("--seed", type=int, default=42, help="graine du générateur aléatoire")
+    parser.add_argument("--load-data", action="store_true", help="charger par LOAD DATA LOCAL INFILE (MySQL)")
+    args = parser.parse_args()
+
+    config = DbConfig.from_env()
+    if args.backend:
+        config = dataclasses.replace(config, backend=args.backend)
+    if args.load_data and config.backend != 'mysql':
+        parser.error("--load-data n'est disponible qu'avec MySQL")
+    Dao.configure(config)
+
+    begin = time.perf_counter()
+    p = plan(args.students, args.teachers, args.courses, args.takes_per_student)
+    if args.takes_per_student and not p.course_ids or args.courses and not p.teacher_ids:
+        parser.error("aucun cours (ou enseignant) auquel rattacher les lignes générées")
+    with tempfile.TemporaryDirectory(prefix="ecole-generate-") as directory:
+        loaded = generate(p, args.workers, args.chunk_size, args.seed, args.load_data, directory)
+    elapsed = time.perf_counter() - begin
+
+    total = sum(loaded.values())
+    for table, count in loaded.items():
+        print(f"{table:<8} {count:>12} lignes")
+    print(f"{'total':<8} {total:>12} lignes en {elapsed:.1f} s ({total / elapsed:,.0f} lignes/s)")
+
+    begin = time.perf_counter()
+    violations = verify()
+    print(f"Contraintes vérifiées en {time.perf_counter() - begin:.1f} s: "
+          + ("aucune infraction" if not violations else str(violations)))
+    if violations:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
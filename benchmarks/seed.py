@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+Peuplement d'une BD de mesure : jeu de données de bdd/ecole.sql, complété
+par des volumes configurables d'adresses, d'élèves, d'enseignants, de cours
+et d'inscriptions, insérés par les créations en masse des DAO
+"""
+
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from pathlib import Path
+
+from ecole.daos.address_dao import AddressDao
+from ecole.daos.course_dao import CourseDao
+from ecole.daos.dao import Dao
+from ecole.daos.sequence import student_numbers
+from ecole.daos.student_dao import StudentDao
+from ecole.daos.takes_dao import TakesDao
+from ecole.daos.teacher_dao import TeacherDao
+from ecole.models.address import Address
+from ecole.models.course import Course
+from ecole.models.student import Student
+from ecole.models.teacher import Teacher
+
+DUMP_PATH = Path(__file__).resolve().parent.parent / 'bdd' / 'ecole.sql'
+
+# tables dans l'ordre des clés étrangères
+TABLES = ('number_sequence', 'address', 'person', 'teacher', 'student', 'course', 'takes')
+
+
+@dataclass
+class Volumes:
+    """Volumes ajoutés au jeu de données de bdd/ecole.sql (un élève a une adresse)."""
+    students: int = 10_000
+    teachers: int = 100
+    courses: int = 500
+    takes_per_student: int = 3
+
+
+@dataclass
+class SeededIds:
+    """Ids des entités présentes en BD après peuplement."""
+    addresses: list[int] = field(default_factory=list)
+    students: list[int] = field(default_factory=list)
+    teachers: list[int] = field(default_factory=list)
+    courses: list[int] = field(default_factory=list)
+
+
+def dump_statements() -> list[str]:
+    """Requêtes de bdd/ecole.sql, sans les commentaires."""
+    text = "\n".join(line for line in DUMP_PATH.read_text(encoding='utf-8').splitlines()
+                     if not line.startswith('--'))
+    return [statement.strip() for statement in re.split(r';\s*\n', text) if statement.strip()]
+
+
+def reset_database() -> None:
+    """Remet la BD dans l'état de bdd/ecole.sql : le dump est rejoué sur MySQL ;
+    sur SQLite (schéma déjà créé), les tables sont vidées et ses INSERT rejoués."""
+    statements = dump_statements()
+    with Dao.connection() as connection, connection.cursor() as cursor:
+        if Dao.config.backend == 'sqlite':
+            for table in reversed(TABLES):
+                cursor.execute(f"DELETE FROM {table}")
+            # le dump n'ajoute les clés étrangères qu'à la fin : insertion dans leur ordre
+            inserts = {re.match(r'INSERT INTO `(\w+)`', s).group(1): s
+                       for s in statements if s.upper().startswith('INSERT INTO')}
+            statements = [inserts[table] for table in TABLES if table in inserts]
+        for statement in statements:
+            cursor.execute(statement)
+        connection.commit()
+    # les n° d'élève déjà réservés en mémoire ne correspondent plus à la séquence rejouée
+    student_numbers.reset()
+
+
+def seed(volumes: Volumes, rng: random.Random) -> SeededIds:
+    """Réinitialise la BD puis y ajoute les volumes demandés ; renvoie les ids présents."""
+    reset_database()
+    ids = SeededIds(addresses=[1, 2, 3], students=[1, 2, 3], teachers=list(range(1, 7)),
+                    courses=list(range(1, 9)))
+
+    addresses = [Address(f"{i} rue des Pinsons", rng.choice(["Toulouse", "Castanet", "Blagnac"]),
+                         31000 + i % 1000) for i in range(volumes.students)]
+    ids.addresses += _created(AddressDao().create_many(addresses), "adresses")
+
+    students = []
+    for i, address in enumerate(addresses):
+        student = Student(f"Prénom{i}", f"Nom{i}", rng.randint(11, 18))
+        student.address = address
+        students.append(student)
+    ids.students += _created(StudentDao().create_many(students), "élèves")
+
+    teachers = [Teacher(f"Prénom{i}", f"Nom{i}", rng.randint(25, 60),
+                        date(2010, 9, 1) + timedelta(days=rng.randint(0, 5000)))
+                for i in range(volumes.teachers)]
+    ids.teachers += _created(TeacherDao().create_many(teachers), "enseignants")
+
+    courses = []
+    for i in range(volumes.courses):
+        start = date(2024, 1, 1) + timedelta(days=rng.randint(0, 300))
+        courses.append(Course(f"Cours{i}", start, start + timedelta(days=rng.randint(5, 60)),
+                              rng.choice(ids.teachers)))
+    ids.courses += _created(CourseDao().create_many(courses), "cours")
+
+    pairs = [(student_nbr, id_course) for student_nbr in ids.students
+             for id_course in rng.sample(ids.courses, min(volumes.takes_per_student, len(ids.courses)))]
+    TakesDao().enroll(pairs)
+    return ids
+
+
+def _created(result, label: str) -> list[int]:
+    if result.errors:
+        raise RuntimeError(f"Peuplement des {label} incomplet: {result}")
+    return result.ids
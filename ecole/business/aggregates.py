@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+
+"""
+Agrégats de l'école tenus à jour par différence :
+- SchoolAggregates : effectif par cours, nombre de cours par enseignant et nombre d'élèves par ville,
+                     en mémoire et, au besoin, dans des tables de synthèse
+- SUMMARY_TABLES   : tables de synthèse (nom -> colonne clé, colonne compteur)
+"""
+
+import threading
+from collections import Counter
+from dataclasses import dataclass, field, replace
+from typing import Any, Iterator, Optional
+
+from ecole.daos.dao import Dao
+from ecole.daos.events import DaoEvent, dao_events
+
+# tables de synthèse : clé primaire et compteur de chacune
+SUMMARY_TABLES = {
+    'course_headcount': ('id_course', 'students'),
+    'teacher_load': ('id_teacher', 'courses'),
+    'city_students': ('city', 'students'),
+}
+
+# tables dérivées, recalculables à tout moment : créées à la première écriture plutôt que dans le schéma
+SUMMARY_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS course_headcount (id_course int NOT NULL PRIMARY KEY, students int NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS teacher_load (id_teacher int NOT NULL PRIMARY KEY, courses int NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS city_students (city varchar(50) NOT NULL PRIMARY KEY, students int NOT NULL)",
+)
+
+
+@dataclass
+class SchoolAggregates:
+    """Agrégats calculés une fois depuis la BD (load), puis mis à jour par apply(),
+    abonné aux événements des DAO : chaque écriture validée n'ajuste que les
+    compteurs qu'elle concerne, et chaque consultation est une simple lecture de
+    dictionnaire. Pour suivre les déplacements sans relire la BD, les agrégats
+    retiennent l'enseignant de chaque cours, l'adresse de chaque élève, la ville
+    de chaque adresse et le nombre d'élèves de chaque adresse (un changement de
+    ville déplace ce nombre d'un bloc). Les écritures faites hors des DAO de ce
+    processus demandent un rechargement.
+    - summary_tables : reporter aussi chaque mise à jour dans les tables de synthèse
+                       (seules les lignes des compteurs modifiés sont réécrites)
+    """
+    summary_tables: bool = False
+    _headcount: dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    _teacher_load: dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    _city_students: Counter[str] = field(default_factory=Counter, init=False, repr=False)
+    _course_teacher: dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    _student_address: dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    _address_city: dict[int, str] = field(default_factory=dict, init=False, repr=False)
+    _address_students: Counter[int] = field(default_factory=Counter, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    # sérialise les écritures des tables de synthèse, hors du verrou des consultations
+    _write_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _tables_stale: bool = field(default=True, init=False, repr=False)
+    # événements reçus pendant load(), reportés à la fin de celui-ci (None hors chargement)
+    _deferred: Optional[list[DaoEvent]] = field(default=None, init=False, repr=False)
+
+    def load(self, batch_size: int = 10_000) -> 'SchoolAggregates':
+        """Calcule les agrégats depuis un instantané de la BD (lu en flux, par une requête
+        par table, hors de toute unité de travail : seules les données validées comptent)
+        et, si summary_tables, réécrit entièrement les tables de synthèse. La lecture se
+        fait sans verrou : les événements reçus entre-temps sont mis de côté, puis reportés
+        s'ils ne sont pas déjà visibles dans l'instantané."""
+        with self._lock:
+            self._deferred = []
+        try:
+            with Dao.snapshot() as connection:
+                def scan(sql: str) -> Iterator[tuple]:
+                    for rows in Dao._iter_records(sql, batch_size=batch_size, as_tuples=True,
+                                                  connection=connection):
+                        yield from rows
+
+                for id_teacher, in scan("SELECT id_teacher FROM teacher"):
+                    self._teacher_load[id_teacher] = 0
+                for id_course, id_teacher in scan("SELECT id_course, id_teacher FROM course"):
+                    self._add_course(id_course, id_teacher)
+                for id_course, students in scan("SELECT id_course, COUNT(*) FROM takes GROUP BY id_course"):
+                    self._headcount[id_course] = self._headcount.get(id_course, 0) + students
+                for id_address, city in scan("SELECT id_address, city FROM address"):
+                    self._address_city[id_address] = city
+                for student_nbr, id_address in scan("SELECT s.student_nbr, p.id_address FROM student s "
+                                                    "INNER JOIN person p ON s.id_person = p.id_person"):
+                    self._move_student(student_nbr, id_address)
+                self._replay(connection)
+        finally:
+            with self._lock:
+                self._deferred = None
+        if self.summary_tables:
+            self.save()
+        return self
+
+    def _replay(self, connection: Any) -> None:
+        """Reporte les événements mis de côté pendant le chargement, jusqu'à ce qu'il
+        n'en arrive plus ; les suivants sont alors appliqués directement."""
+        while True:
+            with self._lock:
+                events = self._deferred
+                if not events:
+                    self._deferred = None
+                    return
+                self._deferred = []
+            for event in events:
+                event = self._unseen(connection, event)
+                with self._lock:
+                    self._apply(event)
+
+    @staticmethod
+    def _unseen(connection: Any, event: DaoEvent, chunk_size: int = 500) -> DaoEvent:
+        """Retire de l'événement les inscriptions (ou désinscriptions) déjà visibles dans
+        l'instantané lu sur connection. Les autres événements fixent un état (enseignant
+        d'un cours, adresse d'un élève, ville d'une adresse) : les reporter est sans effet
+        si l'instantané le contient déjà."""
+        if event.entity != 'takes':
+            return event
+        enrolled: set[tuple[int, int]] = set()
+        with connection.cursor() as cursor:
+            for start in range(0, len(event.objs), chunk_size):
+                chunk = event.objs[start:start + chunk_size]
+                cursor.execute(f"SELECT student_nbr, id_course FROM takes WHERE (student_nbr, id_course) IN "
+                               f"({', '.join(['(%s, %s)'] * len(chunk))})",
+                               [value for pair in chunk for value in pair])
+                enrolled.update((record['student_nbr'], record['id_course']) for record in cursor.fetchall())
+        # inscription absente, ou désinscription encore présente, dans l'instantané
+        unseen = [pair for pair in event.objs if (pair in enrolled) != (event.action == 'created')]
+        return replace(event, objs=tuple(unseen))
+
+    #============== consultation ======================
+    def course_headcount(self, id_course: int) -> int:
+        """Nombre d'élèves inscrits au cours id_course (0 si inconnu)."""
+        return self._headcount.get(id_course, 0)
+
+    def teacher_load(self, id_teacher: int) -> int:
+        """Nombre de cours de l'enseignant id_teacher (0 si inconnu)."""
+        return self._teacher_load.get(id_teacher, 0)
+
+    def city_students(self, city: str) -> int:
+        """Nombre d'élèves habitant la ville city."""
+        return self._city_students.get(city, 0)
+
+    def headcounts(self) -> dict[int, int]:
+        """Effectif de chaque cours, par id de cours (copie)."""
+        with self._lock:
+            return dict(self._headcount)
+
+    def teacher_loads(self) -> dict[int, int]:
+        """Nombre de cours de chaque enseignant, par id d'enseignant (copie)."""
+        with self._lock:
+            return dict(self._teacher_load)
+
+    def students_per_city(self) -> dict[str, int]:
+        """Nombre d'élèves de chaque ville (copie, des villes les plus peuplées aux moins peuplées)."""
+        with self._lock:
+            return dict(self._city_students.most_common())
+
+    #============== mise à jour =======================
+    def apply(self, event: DaoEvent) -> None:
+        """Reporte dans les agrégats une écriture publiée par les DAO."""
+        with self._write_lock:
+            with self._lock:
+                if self._deferred is not None:
+                    self._deferred.append(event)
+                    return
+                touched = self._apply(event)
+            if self.summary_tables and any(touched.values()):
+                self._write(touched)
+
+    def _apply(self, event: DaoEvent) -> dict[str, set]:
+        """Ajuste les compteurs ; renvoie, par table de synthèse, les clés modifiées."""
+        touched: dict[str, set] = {table: set() for table in SUMMARY_TABLES}
+        if event.entity == 'takes':
+            delta = 1 if event.action == 'created' else -1
+            for _, id_course in event.objs:
+                self._headcount[id_course] = self._headcount.get(id_course, 0) + delta
+                touched['course_headcount'].add(id_course)
+        elif event.entity == 'course':
+            for course in event.objs:
+                previous = self._course_teacher.get(course.id)
+                if event.action == 'deleted':
+                    self._course_teacher.pop(course.id, None)
+                    self._headcount.pop(course.id, None)
+                else:
+                    self._course_teacher[course.id] = course.id_teacher
+                    self._headcount.setdefault(course.id, 0)
+                touched['course_headcount'].add(course.id)
+                teacher = self._course_teacher.get(course.id)
+                if teacher != previous:
+                    # création, suppression ou changement d'enseignant du cours
+                    if previous is not None:
+                        self._teacher_load[previous] -= 1
+                    if teacher is not None:
+                        self._teacher_load[teacher] = self._teacher_load.get(teacher, 0) + 1
+                    touched['teacher_load'].update((previous, teacher))
+        elif event.entity == 'teacher':
+            for teacher in event.objs:
+                if event.action == 'created':
+                    self._teacher_load.setdefault(teacher.id, 0)
+                elif event.action == 'deleted':
+                    self._teacher_load.pop(teacher.id, None)
+                touched['teacher_load'].add(teacher.id)
+        elif event.entity == 'student':
+            # les DAO ne modifient pas l'adresse d'un élève existant
+            for student in event.objs:
+                if event.action == 'updated':
+                    continue
+                id_address = student.address.id if event.action == 'created' and student.address else None
+                touched['city_students'].update(self._move_student(student.student_nbr, id_address))
+        elif event.entity == 'address':
+            for address in event.objs:
+                city = address.city if event.action != 'deleted' else None
+                previous = self._address_city.pop(address.id, None)
+                if city is not None:
+                    self._address_city[address.id] = city
+                students = self._address_students.get(address.id, 0)
+                if previous != city and students:
+                    # changement de ville : tous les élèves de l'adresse déménagent d'un coup
+                    self._count_city(previous, -students)
+                    self._count_city(city, students)
+                    touched['city_students'].update((previous, city))
+        for keys in touched.values():
+            keys.discard(None)
+        return touched
+
+    def _add_course(self, id_course: int, id_teacher: int) -> None:
+        self._course_teacher[id_course] = id_teacher
+        self._headcount.setdefault(id_course, 0)
+        self._teacher_load[id_teacher] = self._teacher_load.get(id_teacher, 0) + 1
+
+    def _move_student(self, student_nbr: int, id_address: Optional[int]) -> tuple[Optional[str], ...]:
+        """Rattache l'élève à l'adresse id_address (None : le détache) ;
+        renvoie les villes dont le nombre d'élèves a changé."""
+        previous = self._student_address.pop(student_nbr, None)
+        if previous == id_address:
+            if id_address is not None:
+                self._student_address[student_nbr] = id_address
+            return ()
+        if previous is not None:
+            self._address_students[previous] -= 1
+            if not self._address_students[previous]:
+                del self._address_students[previous]
+            self._count_city(self._address_city.get(previous), -1)
+        if id_address is not None:
+            self._student_address[student_nbr] = id_address
+            self._address_students[id_address] += 1
+            self._count_city(self._address_city.get(id_address), 1)
+        return self._address_city.get(previous), self._address_city.get(id_address)
+
+    def _count_city(self, city: Optional[str], delta: int) -> None:
+        if city is None:
+            return
+        self._city_students[city] += delta
+        if self._city_students[city] <= 0:
+            del self._city_students[city]
+
+    #============== tables de synthèse ================
+    def save(self) -> None:
+        """Réécrit entièrement les tables de synthèse (créées au besoin), en une transaction."""
+        with self._write_lock:
+            self._save()
+
+    def _save(self) -> None:
+        with self._lock:
+            contents = {'course_headcount': list(self._headcount.items()),
+                        'teacher_load': list(self._teacher_load.items()),
+                        'city_students': list(self._city_students.items())}
+        # réécriture validée seule, même si load() est appelé dans une unité de travail
+        with Dao.get_pool().connection() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    for sql in SUMMARY_SCHEMA:
+                        cursor.execute(sql)
+                    for table, rows in contents.items():
+                        key, counter = SUMMARY_TABLES[table]
+                        cursor.execute(f"DELETE FROM {table}")
+                        if rows:
+                            cursor.executemany(f"INSERT INTO {table} ({key}, {counter}) VALUES (%s, %s)", rows)
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+        self._tables_stale = False
+
+    def _write(self, touched: dict[str, set]) -> None:
+        """Réécrit les lignes des compteurs modifiés, avec leur valeur courante
+        (la dernière écriture l'emporte, quel que soit l'ordre des événements)."""
+        try:
+            if self._tables_stale:
+                self._save()
+                return
+            with self._lock:
+                values = {'course_headcount': self._headcount, 'teacher_load': self._teacher_load,
+                          'city_students': self._city_students}
+                replaced = {table: [(key, values[table][key]) for key in keys if key in values[table]]
+                            for table, keys in touched.items()}
+                deleted = {table: [(key,) for key in keys if key not in values[table]]
+                           for table, keys in touched.items()}
+            with Dao.connection() as connection:
+                try:
+                    with connection.cursor() as cursor:
+                        for table, (key, counter) in SUMMARY_TABLES.items():
+                            if replaced[table]:
+                                cursor.executemany(f"REPLACE INTO {table} ({key}, {counter}) VALUES (%s, %s)",
+                                                   replaced[table])
+                            if deleted[table]:
+                                cursor.executemany(f"DELETE FROM {table} WHERE {key} = %s", deleted[table])
+                    connection.commit()
+                except Exception:
+                    connection.rollback()
+                    raise
+        except Exception as e:
+            # tables réécrites en entier à la prochaine mise à jour
+            self._tables_stale = True
+            print(f"Erreur lors de la mise à jour des tables de synthèse: {e}")
+
+
+_aggregates: Optional[SchoolAggregates] = None
+_aggregates_lock = threading.Lock()
+
+
+def get_aggregates(refresh: bool = False) -> SchoolAggregates:
+    """Renvoie les agrégats partagés, calculés depuis la BD au premier appel (ou si
+    refresh) puis tenus à jour par les événements des DAO ; les tables de synthèse
+    sont tenues à jour si DbConfig.summary_tables."""
+    global _aggregates
+    with _aggregates_lock:
+        if _aggregates is None or refresh:
+            if _aggregates is not None:
+                dao_events.unsubscribe(_aggregates.apply)
+            Dao.get_pool()  # configuration lue au besoin dans l'environnement
+            aggregates = SchoolAggregates(summary_tables=Dao.config.summary_tables)
+            # abonné avant le chargement : les écritures concurrentes sont reportées à sa fin
+            dao_events.subscribe(aggregates.apply)
+            try:
+                _aggregates = aggregates.load()
+            except Exception:
+                dao_events.unsubscribe(aggregates.apply)
+                _aggregates = None
+                raise
+        return _aggregates
+
+
+def reset_aggregates() -> None:
+    """Oublie les agrégats partagés (qui ne sont plus tenus à jour) : ils seront recalculés au prochain accès."""
+    global _aggregates
+    with _aggregates_lock:
+        if _aggregates is not None:
+            dao_events.unsubscribe(_aggregates.apply)
+        _aggregates = None
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+"""
+Instantané en colonnes NumPy des cours et des inscriptions, et indicateurs vectorisés
+(occupation par jour, charge par enseignant, effectif par cours)
+
+NumPy est une dépendance optionnelle, requise uniquement par ce module.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from ecole.daos.dao import Dao
+
+
+@dataclass
+class EnrollmentSnapshot:
+    """Tables course et takes sous forme de colonnes :
+    - course_ids     : id des cours, triés (int64)
+    - start_dates    : date de début de chaque cours (datetime64[D])
+    - end_dates      : date de fin de chaque cours, incluse (datetime64[D])
+    - teacher_ids    : id de l'enseignant de chaque cours (int64)
+    - takes_course   : pour chaque inscription, indice du cours dans course_ids (int64)
+    - takes_student  : pour chaque inscription, n° de l'élève (int64)
+    """
+    course_ids: np.ndarray
+    start_dates: np.ndarray
+    end_dates: np.ndarray
+    teacher_ids: np.ndarray
+    takes_course: np.ndarray
+    takes_student: np.ndarray
+
+    @classmethod
+    def from_rows(cls, courses: list[tuple[int, date, date, int]],
+                  takes: list[tuple[int, int]]) -> 'EnrollmentSnapshot':
+        """Construit l'instantané à partir des lignes (id_course, start_date, end_date,
+        id_teacher) et (student_nbr, id_course) ; les inscriptions à un cours inconnu
+        sont ignorées."""
+        course_ids = np.array([c[0] for c in courses], dtype=np.int64)
+        order = np.argsort(course_ids, kind='stable')
+        course_ids = course_ids[order]
+        start_dates = np.array([c[1] for c in courses], dtype='datetime64[D]')[order]
+        end_dates = np.array([c[2] for c in courses], dtype='datetime64[D]')[order]
+        teacher_ids = np.array([c[3] for c in courses], dtype=np.int64)[order]
+
+        takes_array = np.array(takes, dtype=np.int64).reshape(-1, 2)
+        takes_student, takes_course_id = takes_array[:, 0], takes_array[:, 1]
+        takes_course = np.searchsorted(course_ids, takes_course_id)
+        known = takes_course < len(course_ids)
+        known[known] = course_ids[takes_course[known]] == takes_course_id[known]
+        return cls(course_ids, start_dates, end_dates, teacher_ids,
+                   takes_course[known], takes_student[known])
+
+
+def load_snapshot(batch_size: int = 100_000) -> EnrollmentSnapshot:
+    """Lit en flux les tables course et takes (colonnes utiles uniquement)
+    et en construit l'instantané en colonnes."""
+    courses: list[tuple] = []
+    for rows in Dao._iter_records("SELECT id_course, start_date, end_date, id_teacher FROM course",
+                                  batch_size=batch_size, as_tuples=True):
+        courses.extend(rows)
+    takes: list[tuple] = []
+    for rows in Dao._iter_records("SELECT student_nbr, id_course FROM takes",
+                                  batch_size=batch_size, as_tuples=True):
+        takes.extend(rows)
+    return EnrollmentSnapshot.from_rows(courses, takes)
+
+
+def course_headcount(snapshot: EnrollmentSnapshot) -> tuple[np.ndarray, np.ndarray]:
+    """Effectif de chaque cours : (course_ids, nombre d'élèves inscrits)."""
+    return snapshot.course_ids, np.bincount(snapshot.takes_course,
+                                            minlength=len(snapshot.course_ids))
+
+
+def daily_occupancy(snapshot: EnrollmentSnapshot, first_day: Optional[date] = None,
+                    last_day: Optional[date] = None) -> tuple[np.ndarray, np.ndarray]:
+    """Nombre d'élèves en cours chaque jour de first_day à last_day inclus (par défaut,
+    toute la période couverte par les cours) : un élève suivant deux cours le même
+    jour compte deux fois. Calculé par différences cumulées, sans boucle par jour.
+
+    :return: (jours en datetime64[D], nombre d'élèves en cours ce jour-là)
+    """
+    if len(snapshot.course_ids) == 0:
+        return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.int64)
+    first = np.datetime64(first_day, 'D') if first_day is not None else snapshot.start_dates.min()
+    last = np.datetime64(last_day, 'D') if last_day is not None else snapshot.end_dates.max()
+    days = np.arange(first, last + 1, dtype='datetime64[D]')
+    if len(days) == 0:
+        return days, np.array([], dtype=np.int64)
+
+    _, headcount = course_headcount(snapshot)
+    # bornes de chaque cours ramenées dans la fenêtre, en indices de jours
+    start = np.clip((snapshot.start_dates - first).astype(np.int64), 0, len(days))
+    stop = np.clip((snapshot.end_dates - first).astype(np.int64) + 1, 0, len(days))
+    visible = start < stop
+    delta = (np.bincount(start[visible], weights=headcount[visible], minlength=len(days) + 1)
+             - np.bincount(stop[visible], weights=headcount[visible], minlength=len(days) + 1))
+    return days, np.cumsum(delta[:-1]).astype(np.int64)
+
+
+def teacher_load(snapshot: EnrollmentSnapshot) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Charge de chaque enseignant ayant au moins un cours :
+    (teacher_ids, nombre de cours, nombre total d'inscriptions à ses cours)."""
+    teacher_ids, course_teacher = np.unique(snapshot.teacher_ids, return_inverse=True)
+    course_counts = np.bincount(course_teacher, minlength=len(teacher_ids))
+    enrollments = np.bincount(course_teacher[snapshot.takes_course], minlength=len(teacher_ids))
+    return teacher_ids, course_counts, enrollments
+
+
+def average_enrollments_per_teacher(snapshot: EnrollmentSnapshot) -> float:
+    """Nombre moyen d'inscriptions par enseignant ayant au moins un cours."""
+    _, _, enrollments = teacher_load(snapshot)
+    return float(enrollments.mean()) if len(enrollments) else 0.0
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe AsyncSchool : façade asynchrone de School, pour les applications asyncio
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Iterable, Optional
+
+from ecole.business.school import School
+from ecole.daos.async_dao import (AsyncAddressDao, AsyncCourseDao, AsyncDao,
+                                  AsyncStudentDao, AsyncTeacherDao, run_in_thread)
+from ecole.models.address import Address
+from ecole.models.course import Course
+from ecole.models.student import Student
+from ecole.models.teacher import Teacher
+
+
+@dataclass
+class AsyncSchool:
+    """Cas d'utilisation de School sous forme de coroutines : aucun appel ne bloque
+    la boucle d'événements et les recherches indépendantes peuvent être menées
+    simultanément (cf. gather et resolve). Pool et cache sont ceux de School ; dans
+    une unité de travail (School.transaction()), dont la connexion ne se partage pas,
+    les appels simultanés sont exécutés un à un.
+    Vérification sur une BD MySQL locale : python -m benchmarks.check_async."""
+    courses: AsyncCourseDao = field(default_factory=AsyncCourseDao)
+    teachers: AsyncTeacherDao = field(default_factory=AsyncTeacherDao)
+    students: AsyncStudentDao = field(default_factory=AsyncStudentDao)
+    addresses: AsyncAddressDao = field(default_factory=AsyncAddressDao)
+
+    @staticmethod
+    async def gather(*lookups) -> list[Any]:
+        """Attend simultanément plusieurs recherches indépendantes, ex. :
+        course, teacher = await school.gather(school.get_course_by_id(1),
+                                              school.get_teacher_by_id(2))"""
+        return list(await asyncio.gather(*lookups))
+
+    async def resolve(self, refs: Iterable[tuple[str, int]]) -> list[Optional[Any]]:
+        """Comme School.resolve, les requêtes groupées des différents types
+        d'entités étant menées simultanément"""
+        daos: dict[str, AsyncDao] = {'course': self.courses, 'teacher': self.teachers,
+                                     'student': self.students, 'address': self.addresses}
+        refs = list(refs)
+        ids_by_kind: dict[str, list[int]] = {}
+        for kind, id_entity in refs:
+            if kind not in daos:
+                raise ValueError(f"Type d'entité inconnu: {kind}")
+            ids_by_kind.setdefault(kind, []).append(id_entity)
+
+        results = await asyncio.gather(*(daos[kind].read_many(ids) for kind, ids in ids_by_kind.items()))
+        resolved: dict[tuple[str, int], Any] = {}
+        for (kind, ids), objs in zip(ids_by_kind.items(), results):
+            resolved.update(((kind, id_entity), obj) for id_entity, obj in zip(ids, objs))
+        return [resolved[ref] for ref in refs]
+
+    #============== gestion cours======================
+    async def get_course_by_id(self, id_course: int) -> Optional[Course]:
+        return await self.courses.read(id_course)
+
+    async def create_course(self, name: str, start_date: date, end_date: date, id_teacher: int,
+                            check_conflicts: bool = False) -> str:
+        return await run_in_thread(School.create_course, name, start_date, end_date, id_teacher,
+                                   check_conflicts)
+
+    async def update_course_by_id(self, id_course: int, name: str, start_date: date, end_date: date) -> bool:
+        return await run_in_thread(School.update_course_by_id, id_course, name, start_date, end_date)
+
+    async def delete_course_by_id(self, id_course: int) -> bool:
+        return await run_in_thread(School.delete_course_by_id, id_course)
+
+    async def get_all_courses(self) -> str:
+        return await run_in_thread(School.get_all_courses)
+
+    async def get_all_courses_with_teacher(self) -> str:
+        return await run_in_thread(School.get_all_courses_with_teacher)
+
+    #================Gestion des teachers====================
+    async def get_teacher_by_id(self, id_teacher: int) -> Optional[Teacher]:
+        return await self.teachers.read(id_teacher)
+
+    async def create_new_teacher(self, first_name: str, last_name: str, age: int, hiring_date: date) -> str:
+        return await run_in_thread(School.create_new_teacher, first_name, last_name, age, hiring_date)
+
+    async def update_teacher_by_id(self, id_teacher: int, first_name: str, last_name: str,
+                                   age: int, hiring_date: date) -> bool:
+        return await run_in_thread(School.update_teacher_by_id, id_teacher, first_name,
+                                   last_name, age, hiring_date)
+
+    async def delete_teacher_by_id(self, id_teacher: int) -> bool:
+        return await run_in_thread(School.delete_teacher_by_id, id_teacher)
+
+    async def get_all_teachers(self) -> str:
+        return await run_in_thread(School.get_all_teachers)
+
+    #=================Gestion des Students=================
+    async def get_student_by_id(self, id_student: int) -> Optional[Student]:
+        return await self.students.read(id_student)
+
+    async def create_new_student(self, first_name: str, last_name: str, age: int) -> str:
+        return await run_in_thread(School.create_new_student, first_name, last_name, age)
+
+    async def update_student_by_id(self, id_student: int, first_name: str, last_name: str, age: int) -> bool:
+        return await run_in_thread(School.update_student_by_id, id_student, first_name, last_name, age)
+
+    async def delete_student_by_id(self, id_student: int) -> bool:
+        return await run_in_thread(School.delete_student_by_id, id_student)
+
+    async def get_all_students(self) -> str:
+        return await run_in_thread(School.get_all_students)
+
+    #==============gestion des adresses============
+    async def get_address_by_id(self, id_address: int) -> Optional[Address]:
+        return await self.addresses.read(id_address)
+
+    async def create_new_address(self, street: str, city: str, postal_code: int) -> str:
+        return await run_in_thread(School.create_new_address, street, city, postal_code)
+
+    async def update_address_by_id(self, id_address: int, street: str, city: str, postal_code: int) -> bool:
+        return await run_in_thread(School.update_address_by_id, id_address, street, city, postal_code)
+
+    async def delete_address_by_id(self, id_address: int) -> bool:
+        return await run_in_thread(School.delete_address_by_id, id_address)
+
+    async def get_all_addresses(self) -> str:
+        return await run_in_thread(School.get_all_addresses)
+
+    async def print_all_database(self) -> None:
+        await run_in_thread(School.print_all_database)
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe DatabaseExporter : export en flux des tables et de vues jointes de l'école en CSV ou JSONL
+"""
+
+import csv
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Iterable, Optional, TextIO
+
+from ecole.daos.dao import Dao
+from ecole.daos.instrumentation import CallScope, attached_scope, current_scope
+
+
+@dataclass(frozen=True)
+class ExportView:
+    """Table ou vue exportée :
+    - name    : nom du fichier produit (sans extension)
+    - columns : noms des colonnes, dans l'ordre du SELECT
+    - sql     : requête lue en flux
+    """
+    name: str
+    columns: tuple[str, ...]
+    sql: str
+
+
+def table_view(table: str, columns: tuple[str, ...]) -> ExportView:
+    return ExportView(table, columns, f"SELECT {', '.join(columns)} FROM {table}")
+
+
+# tables de la BD, dans l'ordre des clés étrangères (ordre de rechargement)
+TABLE_VIEWS = (
+    table_view('number_sequence', ('name', 'next_value')),
+    table_view('address', ('id_address', 'street', 'city', 'postal_code')),
+    table_view('person', ('id_person', 'first_name', 'last_name', 'age', 'id_address')),
+    table_view('teacher', ('id_teacher', 'hiring_date', 'id_person')),
+    table_view('student', ('student_nbr', 'id_person')),
+    table_view('course', ('id_course', 'name', 'start_date', 'end_date', 'id_teacher')),
+    table_view('takes', ('student_nbr', 'id_course')),
+)
+
+# vues jointes, lisibles sans les tables de référence
+JOINED_VIEWS = (
+    ExportView('courses_with_teacher',
+               ('id_course', 'name', 'start_date', 'end_date', 'id_teacher',
+                'teacher_first_name', 'teacher_last_name'),
+               "SELECT c.id_course, c.name, c.start_date, c.end_date, c.id_teacher, p.first_name, p.last_name "
+               "FROM course c INNER JOIN teacher t ON c.id_teacher = t.id_teacher "
+               "INNER JOIN person p ON t.id_person = p.id_person"),
+    ExportView('enrollments_with_student',
+               ('student_nbr', 'first_name', 'last_name', 'id_course', 'course_name'),
+               "SELECT tk.student_nbr, p.first_name, p.last_name, tk.id_course, c.name "
+               "FROM takes tk INNER JOIN student s ON tk.student_nbr = s.student_nbr "
+               "INNER JOIN person p ON s.id_person = p.id_person "
+               "INNER JOIN course c ON tk.id_course = c.id_course"),
+)
+
+
+@dataclass
+class ViewExport:
+    """Compte-rendu de l'export d'une table ou d'une vue :
+    - path    : fichier produit
+    - rows    : lignes écrites
+    - size    : taille du fichier, en octets (compressé le cas échéant)
+    - elapsed : durée de l'export, en secondes
+    - error   : motif de l'échec (None si l'export a réussi)
+    """
+    name: str
+    path: str
+    rows: int = 0
+    size: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class ExportStats:
+    """Compte-rendu d'un export : une entrée par table ou vue, et la durée totale."""
+    views: list[ViewExport] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(view.rows for view in self.views)
+
+    @property
+    def size(self) -> int:
+        return sum(view.size for view in self.views)
+
+    def __str__(self) -> str:
+        result = f"{'vue':<26} {'lignes':>10} {'Mo':>8} {'s':>7} {'lignes/s':>10}"
+        for view in self.views:
+            result += (f"\n{view.name:<26} {view.rows:>10} {view.size / 1e6:>8.2f} {view.elapsed:>7.2f}"
+                       f" {view.rows_per_s:>10,.0f}")
+            if view.error is not None:
+                result += f"  ÉCHEC: {view.error}"
+        rows_per_s = self.rows / self.elapsed if self.elapsed else 0.0
+        result += (f"\n{'total':<26} {self.rows:>10} {self.size / 1e6:>8.2f} {self.elapsed:>7.2f}"
+                   f" {rows_per_s:>10,.0f}")
+        return result
+
+
+def _json_value(value: Any) -> Any:
+    """Valeur non sérialisable telle quelle en JSON : dates au format ISO 8601."""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+@dataclass
+class DatabaseExporter:
+    """Export de tables et de vues vers un répertoire, un fichier par vue :
+    - les vues sont exportées simultanément, au plus workers à la fois, chacune dans
+      son thread et sur sa propre connexion du pool (la compression gzip libère le GIL) ;
+    - chaque vue est lue par paquets de batch_size lignes, en tuples, sur un curseur
+      côté serveur, et écrite au fil de la lecture : la mémoire occupée ne dépend pas
+      du nombre de lignes ;
+    - un fichier n'apparaît sous son nom définitif qu'une fois complet.
+    - fmt      : 'csv' (avec en-tête) ou 'jsonl'
+    - compress : fichiers compressés en gzip (extension .gz)
+    """
+    views: Iterable[ExportView] = TABLE_VIEWS + JOINED_VIEWS
+    fmt: str = 'csv'
+    compress: bool = False
+    workers: Optional[int] = None
+    batch_size: int = 10_000
+
+    def export(self, directory: str) -> ExportStats:
+        """Exporte les vues dans directory (créé au besoin)."""
+        if self.fmt not in ('csv', 'jsonl'):
+            raise ValueError(f"format d'export inconnu: {self.fmt} (attendu: csv, jsonl)")
+        os.makedirs(directory, exist_ok=True)
+        views = list(self.views)
+        stats = ExportStats()
+        begin = time.perf_counter()
+        # les requêtes des vues sont comptées dans l'appel instrumenté en cours
+        scope = current_scope()
+        with ThreadPoolExecutor(max_workers=self.workers or len(views) or 1,
+                                thread_name_prefix="export") as executor:
+            stats.views = list(executor.map(lambda view: self._export_view(view, directory, scope), views))
+        stats.elapsed = time.perf_counter() - begin
+        return stats
+
+    def _export_view(self, view: ExportView, directory: str, scope: Optional[CallScope]) -> ViewExport:
+        path = os.path.join(directory, f"{view.name}.{self.fmt}{'.gz' if self.compress else ''}")
+        result = ViewExport(view.name, path)
+        temporary = f"{path}.tmp"
+        begin = time.perf_counter()
+        try:
+            with attached_scope(scope), self._open(temporary) as stream:
+                result.rows = self._write(view, stream)
+            os.replace(temporary, path)
+            result.size = os.path.getsize(path)
+        except Exception as e:
+            result.error = str(e)
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        result.elapsed = time.perf_counter() - begin
+        return result
+
+    def _open(self, path: str) -> TextIO:
+        if self.compress:
+            # compression rapide : l'export est limité par le CPU au-delà du niveau 1 à 3
+            return gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=3)
+        return open(path, 'w', encoding='utf-8', newline='', buffering=1 << 20)
+
+    def _write(self, view: ExportView, stream: TextIO) -> int:
+        """Écrit les lignes de view dans stream, paquet par paquet ; renvoie leur nombre."""
+        rows = 0
+        if self.fmt == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(view.columns)
+            for batch in Dao._iter_records(view.sql, batch_size=self.batch_size, as_tuples=True):
+                writer.writerows(batch)
+                rows += len(batch)
+        else:
+            encoder = json.JSONEncoder(ensure_ascii=False, default=_json_value)
+            for batch in Dao._iter_records(view.sql, batch_size=self.batch_size, as_tuples=True):
+                stream.write("".join(encoder.encode(dict(zip(view.columns, row))) + "\n" for row in batch))
+                rows += len(batch)
+        return rows
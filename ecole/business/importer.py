@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe ImportPipeline : import en masse de fichiers CSV ou JSONL (élèves, enseignants, inscriptions)
+"""
+
+import csv
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+from ecole.daos.address_dao import AddressDao
+from ecole.daos.dao import Dao
+from ecole.daos.events import publish
+from ecole.daos.instrumentation import CallScope, attached_scope, current_scope
+from ecole.daos.student_dao import StudentDao
+from ecole.daos.takes_dao import TakesDao
+from ecole.daos.teacher_dao import TeacherDao
+from ecole.models.address import Address
+from ecole.models.person import Person
+from ecole.models.student import Student
+from ecole.models.teacher import Teacher
+
+# colonnes (obligatoires, facultatives) de chaque type d'import ; les colonnes d'adresse
+# sont toutes renseignées ou toutes vides, courses liste des id_course séparés par des ';'
+COLUMNS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    'students': (('first_name', 'last_name', 'age'), ('street', 'city', 'postal_code', 'courses')),
+    'teachers': (('first_name', 'last_name', 'age', 'hiring_date'), ('street', 'city', 'postal_code')),
+    'enrollments': (('student_nbr', 'id_course'), ()),
+}
+
+# nombre de rejets conservés dans ImportStats.rejects (tous sont écrits dans le fichier des rejets)
+MAX_REPORTED_REJECTS = 100
+
+
+def _text(record: dict, column: str, max_length: int) -> str:
+    value = str(record.get(column) or '').strip()
+    if not value:
+        raise ValueError(f"{column} manquant")
+    if len(value) > max_length:
+        raise ValueError(f"{column} trop long ({len(value)} > {max_length} caractères)")
+    return value
+
+
+def _integer(record: dict, column: str, low: int, high: int) -> int:
+    value = record.get(column)
+    if value is None or str(value).strip() == '':
+        raise ValueError(f"{column} manquant")
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"{column} invalide: {value!r}") from None
+    if not low <= number <= high:
+        raise ValueError(f"{column} hors limites ({low}..{high}): {number}")
+    return number
+
+
+def _address(record: dict) -> Optional[tuple[str, str, int]]:
+    """(rue, ville, code postal) de l'enregistrement, ou None s'il n'a pas d'adresse."""
+    if not any(str(record.get(column) or '').strip() for column in ('street', 'city', 'postal_code')):
+        return None
+    # bornes des colonnes de la table address (postal_code : smallint)
+    return _text(record, 'street', 80), _text(record, 'city', 50), _integer(record, 'postal_code', 0, 32767)
+
+
+def _person(record: dict) -> tuple[str, str, int]:
+    return _text(record, 'first_name', 50), _text(record, 'last_name', 50), _integer(record, 'age', 0, 127)
+
+
+def validate_student(record: dict) -> tuple:
+    """(prénom, nom, âge, adresse ou None, id_course des cours suivis)"""
+    courses = str(record.get('courses') or '').strip()
+    id_courses = tuple(dict.fromkeys(_integer({'courses': id_course}, 'courses', 1, 2 ** 31 - 1)
+                                     for id_course in courses.split(';') if id_course.strip()))
+    return *_person(record), _address(record), id_courses
+
+
+def validate_teacher(record: dict) -> tuple:
+    """(prénom, nom, âge, date d'embauche, adresse ou None)"""
+    try:
+        hiring_date = date.fromisoformat(_text(record, 'hiring_date', 10))
+    except ValueError as e:
+        raise ValueError(f"hiring_date invalide: {e}") from None
+    return *_person(record), hiring_date, _address(record)
+
+
+def validate_enrollment(record: dict) -> tuple:
+    """(student_nbr, id_course)"""
+    return _integer(record, 'student_nbr', 1, 2 ** 31 - 1), _integer(record, 'id_course', 1, 2 ** 31 - 1)
+
+
+VALIDATORS: dict[str, Callable[[dict], tuple]] = {
+    'students': validate_student,
+    'teachers': validate_teacher,
+    'enrollments': validate_enrollment,
+}
+
+
+def validate_chunk(kind: str, start: int, rows: list, columns: Optional[tuple[str, ...]]) -> tuple:
+    """Analyse et valide (dans un processus de travail) les enregistrements n° start et
+    suivants : lignes JSON, ou listes de valeurs CSV dans l'ordre des colonnes columns.
+
+    :return: (start, nombre d'enregistrements, [(n°, enregistrement validé)], [(n°, motif du rejet)])
+    """
+    validate = VALIDATORS[kind]
+    valid, rejected = [], []
+    for position, row in enumerate(rows, start):
+        try:
+            if columns is None:
+                record = json.loads(row)
+                if not isinstance(record, dict):
+                    raise ValueError("objet JSON attendu")
+            elif len(row) != len(columns):
+                raise ValueError(f"{len(row)} valeurs pour {len(columns)} colonnes")
+            else:
+                record = dict(zip(columns, row))
+            valid.append((position, validate(record)))
+        except ValueError as e:
+            rejected.append((position, str(e)))
+    return start, len(rows), valid, rejected
+
+
+@dataclass
+class ImportStats:
+    """Compte-rendu d'un import (cumulé depuis le début du fichier en cas de reprise) :
+    - position     : nombre d'enregistrements traités (importés ou rejetés) : reprise à partir de là
+    - resumed_from : position de reprise de cette exécution (0 pour un import complet)
+    - imported     : enregistrements importés
+    - rejected     : enregistrements rejetés, dont les MAX_REPORTED_REJECTS premiers dans rejects
+    - elapsed      : durée de cette exécution, en secondes
+    - error        : motif de l'interruption de l'import (None s'il est allé à son terme)
+    """
+    source: str
+    kind: str
+    position: int = 0
+    resumed_from: int = 0
+    imported: int = 0
+    rejected: int = 0
+    rejects: list[tuple[int, str]] = field(default_factory=list)
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def rows_per_s(self) -> float:
+        """Débit de cette exécution, en enregistrements traités par seconde."""
+        return (self.position - self.resumed_from) / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self) -> str:
+        result = (f"{self.source} ({self.kind}): {self.imported} enregistrement(s) importé(s), "
+                  f"{self.rejected} rejeté(s), position {self.position}"
+                  f"{f' (reprise à {self.resumed_from})' if self.resumed_from else ''}, "
+                  f"{self.rows_per_s:,.0f} enregistrements/s")
+        if self.error is not None:
+            result += f"\nImport interrompu: {self.error}"
+        for position, message in self.rejects:
+            result += f"\n- enregistrement {position}: {message}"
+        return result
+
+
+# marqueur de fin de la file du rédacteur
+_END = object()
+
+
+@dataclass
+class ImportPipeline:
+    """Import d'un fichier CSV (avec ligne d'en-tête) ou JSONL (.jsonl, .ndjson) :
+    - les enregistrements sont lus par paquets de chunk_size, analysés et validés dans
+      un pool de workers processus, au plus 2 * workers paquets étant en cours à la fois ;
+    - un seul thread rédacteur écrit les paquets validés, dans l'ordre du fichier, par
+      INSERT multi-lignes (adresses, personnes, élèves ou enseignants, inscriptions)
+      dans une transaction par paquet ; une ligne refusée par la BD est isolée par
+      points de sauvegarde et rejetée sans faire échouer son paquet ;
+    - la file du rédacteur est bornée à queue_size paquets : quand la BD ne suit pas,
+      la lecture et la validation s'arrêtent d'elles-mêmes (mémoire bornée) ;
+    - après chaque paquet validé en BD, la position atteinte est enregistrée dans le
+      fichier de reprise : relancé avec ce fichier, un import interrompu reprend à
+      cette position (un arrêt entre la validation d'un paquet en BD et l'écriture du
+      fichier de reprise ferait importer ce paquet une seconde fois).
+    - kind : 'students', 'teachers' ou 'enrollments' (colonnes : cf. COLUMNS)
+    """
+    kind: str
+    chunk_size: int = 1000
+    workers: Optional[int] = None
+    queue_size: int = 8
+
+    def run(self, source: str, checkpoint_path: Optional[str] = None,
+            rejects_path: Optional[str] = None) -> ImportStats:
+        """Importe le fichier source, en reprenant à la position enregistrée dans
+        checkpoint_path s'il existe (et porte sur le même fichier) ; les enregistrements
+        rejetés sont ajoutés, avec leur motif, au fichier JSONL rejects_path."""
+        stats = ImportStats(os.path.abspath(source), self.kind)
+        if self.kind not in COLUMNS:
+            stats.error = f"type d'import inconnu: {self.kind} (attendu: {', '.join(COLUMNS)})"
+            return stats
+        self._resume(stats, checkpoint_path)
+        begin = time.perf_counter()
+        try:
+            with open(source, encoding='utf-8-sig', newline='') as stream, \
+                    open(rejects_path, 'a', encoding='utf-8') if rejects_path else nullcontext() as rejects:
+                columns, chunks = self._read(stream, stats.position)
+                self._pipeline(chunks, columns, stats, checkpoint_path, rejects)
+        except Exception as e:
+            stats.error = str(e)
+        stats.elapsed = time.perf_counter() - begin
+        return stats
+
+    def _read(self, stream: TextIO, skip: int) -> tuple[Optional[tuple[str, ...]], Iterator[tuple[int, list]]]:
+        """Colonnes (None pour du JSONL) et paquets (n° du premier enregistrement, lignes)
+        du fichier, à partir de l'enregistrement n° skip."""
+        if stream.name.endswith(('.jsonl', '.ndjson')):
+            columns, rows = None, (line for line in stream if line.strip())
+        else:
+            reader = csv.reader(stream)
+            columns = tuple(column.strip() for column in next(reader, ()))
+            required, optional = COLUMNS[self.kind]
+            if missing := [column for column in required if column not in columns]:
+                raise ValueError(f"colonne(s) manquante(s) dans {stream.name}: {', '.join(missing)}")
+            if unknown := [column for column in columns if column not in required + optional]:
+                raise ValueError(f"colonne(s) inconnue(s) dans {stream.name}: {', '.join(unknown)}")
+            rows = reader
+
+        def chunks() -> Iterator[tuple[int, list]]:
+            remaining = iter(rows)
+            for _ in itertools.islice(remaining, skip):
+                pass
+            for start in itertools.count(skip, self.chunk_size):
+                if not (chunk := list(itertools.islice(remaining, self.chunk_size))):
+                    return
+                yield start, chunk
+
+        return columns, chunks()
+
+    def _pipeline(self, chunks: Iterator[tuple[int, list]], columns: Optional[tuple[str, ...]],
+                  stats: ImportStats, checkpoint_path: Optional[str], rejects: Optional[TextIO]) -> None:
+        """Valide les paquets dans le pool de processus et les transmet, dans l'ordre,
+        au thread rédacteur, jusqu'à la fin du fichier ou l'échec d'une écriture."""
+        failed = threading.Event()
+        batches: queue.Queue = queue.Queue(self.queue_size)
+        writer = threading.Thread(target=self._write, name="import-writer",
+                                  args=(batches, stats, checkpoint_path, rejects, failed, current_scope()))
+        writer.start()
+
+        def put(item: Any) -> bool:
+            while not failed.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        workers = self.workers or os.cpu_count() or 1
+        pending: deque[Future] = deque()
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for start, rows in chunks:
+                    pending.append(executor.submit(validate_chunk, self.kind, start, rows, columns))
+                    # au plus 2 paquets par worker en cours de validation
+                    if len(pending) >= 2 * workers and not put(pending.popleft().result()):
+                        break
+                while pending and put(pending.popleft().result()):
+                    pass
+                for future in pending:
+                    future.cancel()
+        finally:
+            # le rédacteur s'arrête de lui-même s'il a échoué
+            put(_END)
+            writer.join()
+
+    def _write(self, batches: queue.Queue, stats: ImportStats, checkpoint_path: Optional[str],
+               rejects: Optional[TextIO], failed: threading.Event, scope: Optional[CallScope]) -> None:
+        """Thread rédacteur : écrit les paquets validés un par un et enregistre la
+        position atteinte après chacun ; s'arrête au premier échec de la BD."""
+        with attached_scope(scope):
+            while (batch := batches.get()) is not _END:
+                start, count, records, rejected = batch
+                try:
+                    refused = self._write_batch(records)
+                except Exception as e:
+                    stats.error = f"échec de l'écriture des enregistrements {start} à {start + count - 1}: {e}"
+                    failed.set()
+                    return
+                rejected = sorted(rejected + refused)
+                stats.position = start + count
+                stats.imported += len(records) - len(refused)
+                stats.rejected += len(rejected)
+                stats.rejects.extend(rejected[:MAX_REPORTED_REJECTS - len(stats.rejects)])
+                if rejects is not None:
+                    rejects.writelines(json.dumps({'position': position, 'reason': message},
+                                                  ensure_ascii=False) + "\n"
+                                       for position, message in rejected)
+                    rejects.flush()
+                if checkpoint_path:
+                    self._save_checkpoint(stats, checkpoint_path)
+
+    def _write_batch(self, records: list[tuple[int, tuple]]) -> list[tuple[int, str]]:
+        """Écrit en une transaction les enregistrements validés d'un paquet ;
+        renvoie ceux que la BD a refusés, avec leur motif. Les créations sont
+        ensuite publiées aux écouteurs des DAO (cf. ecole.daos.events)."""
+        refused: list[tuple[int, str]] = []
+        created: list[tuple[str, list]] = []
+        if records:
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                self._write_isolated(cursor, records, refused, created)
+                connection.commit()
+        for entity, objs in created:
+            publish(entity, 'created', objs)
+        return refused
+
+    def _write_isolated(self, cursor: Any, records: list[tuple[int, tuple]],
+                        refused: list[tuple[int, str]], created: list[tuple[str, list]]) -> None:
+        """Écrit records sous un point de sauvegarde ; en cas d'échec, le lot est coupé
+        en deux et retenté, jusqu'à isoler le ou les enregistrements fautifs
+        (cf. Dao._insert_isolated)."""
+        cursor.execute("SAVEPOINT import_batch")
+        try:
+            inserted = self._insert(cursor, [record for _, record in records])
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT import_batch")
+            if len(records) == 1:
+                refused.append((records[0][0], str(e)))
+            else:
+                middle = len(records) // 2
+                self._write_isolated(cursor, records[:middle], refused, created)
+                self._write_isolated(cursor, records[middle:], refused, created)
+            return
+        cursor.execute("RELEASE SAVEPOINT import_batch")
+        created.extend(inserted)
+
+    def _insert(self, cursor: Any, records: list[tuple]) -> list[tuple[str, list]]:
+        """INSERT multi-lignes des enregistrements validés, table par table ;
+        renvoie les entités (ou inscriptions) créées, par type d'entité."""
+        takes_dao = TakesDao()
+        enrolled: list[tuple[int, int]] = []
+        if self.kind == 'enrollments':
+            takes_dao._insert(cursor, list(dict.fromkeys(records)), enrolled)
+            return [('takes', enrolled)]
+        if self.kind == 'students':
+            persons: list[Person] = [Student(first_name, last_name, age)
+                                     for first_name, last_name, age, _, _ in records]
+            addresses = [record[3] for record in records]
+        else:
+            persons = [Teacher(first_name, last_name, age, hiring_date)
+                       for first_name, last_name, age, hiring_date, _ in records]
+            addresses = [record[4] for record in records]
+        for person, address in zip(persons, addresses):
+            if address is not None:
+                person.address = Address(*address)
+        if with_address := [person.address for person in persons if person.address is not None]:
+            AddressDao()._insert_rows(cursor, with_address)
+        if self.kind == 'teachers':
+            TeacherDao()._insert_rows(cursor, persons)
+            return [('address', with_address), ('teacher', persons)]
+        StudentDao()._insert_rows(cursor, persons)
+        if pairs := [(student.student_nbr, id_course)
+                     for student, record in zip(persons, records) for id_course in record[4]]:
+            takes_dao._insert(cursor, pairs, enrolled)
+        return [('address', with_address), ('student', persons), ('takes', enrolled)]
+
+    def _resume(self, stats: ImportStats, checkpoint_path: Optional[str]) -> None:
+        """Reprend les compteurs du fichier de reprise, s'il porte sur le même import."""
+        if not checkpoint_path or not os.path.exists(checkpoint_path):
+            return
+        with open(checkpoint_path, encoding='utf-8') as stream:
+            checkpoint = json.load(stream)
+        if checkpoint.get('source') == stats.source and checkpoint.get('kind') == stats.kind:
+            stats.position = stats.resumed_from = checkpoint['position']
+            stats.imported = checkpoint['imported']
+            stats.rejected = checkpoint['rejected']
+
+    @staticmethod
+    def _save_checkpoint(stats: ImportStats, checkpoint_path: str) -> None:
+        """Enregistre la position atteinte (remplacement atomique du fichier de reprise)."""
+        temporary = f"{checkpoint_path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as stream:
+            json.dump({'source': stats.source, 'kind': stats.kind, 'position': stats.position,
+                       'imported': stats.imported, 'rejected': stats.rejected}, stream)
+        os.replace(temporary, checkpoint_path)
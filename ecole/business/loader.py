@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe SchoolLoader : chargement du graphe complet de l'école depuis la BD
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ecole.daos.address_dao import AddressDao
+from ecole.daos.course_dao import CourseDao
+from ecole.daos.dao import Dao
+from ecole.daos.student_dao import StudentDao
+from ecole.daos.teacher_dao import TeacherDao
+from ecole.models.address import Address
+from ecole.models.course import Course
+from ecole.models.person import Person
+from ecole.models.student import Student
+from ecole.models.teacher import Teacher
+
+if TYPE_CHECKING:
+    from .school import School
+
+
+@dataclass
+class SchoolLoader:
+    """Hydrate School.courses / teachers / students avec tous leurs liens
+    (enseignant d'un cours, élèves d'un cours, cours d'un élève, adresse d'une personne)
+    en au plus 5 requêtes ensemblistes, quel que soit le nombre de lignes :
+    cours, enseignants, élèves, inscriptions (takes) et adresses.
+    - batch_size : nombre de lignes lues par paquet sur les curseurs côté serveur
+    """
+    batch_size: int = 1000
+
+    def load(self, school: School, courses: bool = True, teachers: bool = True,
+             students: bool = True, addresses: bool = True) -> School:
+        """Remplace le contenu de school par celui de la BD ; chaque indicateur
+        permet d'exclure une partie du graphe (ex. courses et students seuls :
+        les cours et leurs élèves, sans enseignants ni adresses)."""
+        school.courses.clear()
+        school.teachers.clear()
+        school.students.clear()
+        # id_address de chaque personne chargée, pour le rattachement des adresses
+        address_ids: dict[int, list[Person]] = {}
+
+        courses_by_id: dict[int, Course] = {}
+        if courses:
+            for course in CourseDao.iter_all(self.batch_size):
+                courses_by_id[course.id] = course
+                school.add_course(course)
+
+        if teachers:
+            sql = "SELECT * FROM teacher t INNER JOIN person p ON t.id_person = p.id_person"
+            teachers_by_id: dict[int, Teacher] = {}
+            for record in self._records(sql):
+                teacher = TeacherDao._from_record(record)
+                teachers_by_id[teacher.id] = teacher
+                school.add_teacher(teacher)
+                self._note_address(address_ids, record, teacher)
+            for course in courses_by_id.values():
+                teacher = teachers_by_id.get(course.id_teacher)
+                if teacher is not None:
+                    course.teacher = teacher
+                    teacher.courses_teached.append(course)
+
+        if students:
+            sql = "SELECT * FROM student s INNER JOIN person p ON s.id_person = p.id_person"
+            students_by_nbr: dict[int, Student] = {}
+            for record in self._records(sql):
+                student = StudentDao._from_record(record)
+                students_by_nbr[student.student_nbr] = student
+                school.add_student(student)
+                self._note_address(address_ids, record, student)
+            if courses:
+                for record in self._records("SELECT student_nbr, id_course FROM takes"):
+                    student = students_by_nbr.get(record['student_nbr'])
+                    course = courses_by_id.get(record['id_course'])
+                    if student is not None and course is not None:
+                        course.add_student(student)
+
+        if addresses and address_ids:
+            # person.id_address est unique : une ligne par adresse rattachée
+            sql = ("SELECT a.* FROM address a"
+                   " INNER JOIN person p ON p.id_address = a.id_address")
+            for record in self._records(sql):
+                address: Address = AddressDao._from_record(record)
+                for person in address_ids.get(address.id, []):
+                    person.address = address
+
+        return school
+
+    def _records(self, sql: str):
+        """Lignes de la requête sql, lues par paquets sur un curseur côté serveur."""
+        for records in Dao._iter_records(sql, batch_size=self.batch_size):
+            yield from records
+
+    @staticmethod
+    def _note_address(address_ids: dict[int, list[Person]], record: dict, person: Person) -> None:
+        if record.get('id_address') is not None:
+            address_ids.setdefault(record['id_address'], []).append(person)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe ReportEngine : rendu en flux des listes de l'école (cours, adresses, enseignants, élèves)
+"""
+
+import io
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Optional, TextIO
+
+from ecole.daos.address_dao import AddressDao
+from ecole.daos.course_dao import CourseDao
+from ecole.daos.instrumentation import CallScope, attached_scope, current_scope
+from ecole.daos.student_dao import StudentDao
+from ecole.daos.teacher_dao import TeacherDao
+from ecole.daos.unit_of_work import current_unit_of_work
+
+
+@dataclass
+class ReportSection:
+    """Section d'un rapport :
+    - title      : titre affiché en en-tête de la section
+    - rows       : fabrique de l'itérable des lignes (résumés lus en flux depuis la BD)
+    - format_row : mise en forme d'une ligne
+    """
+    title: str
+    rows: Callable[[], Iterable[Any]]
+    format_row: Callable[[Any], str]
+
+
+def courses_section() -> ReportSection:
+    return ReportSection("Courses", CourseDao.iter_summaries,
+                         lambda c: f"{c.id} - {c.name} ({c.start_date} → {c.end_date})\n")
+
+
+def addresses_section() -> ReportSection:
+    return ReportSection("Adresses", AddressDao.iter_summaries,
+                         lambda a: f"{a.street}, {a.postal_code}: {a.city}\n")
+
+
+def teachers_section() -> ReportSection:
+    return ReportSection("Teachers", TeacherDao().iter_summaries,
+                         lambda t: f"Prénom: {t.first_name}\nNom: {t.last_name}\nAge: {t.age}\n"
+                                   f"Date d'embauche: {t.hiring_date}\n\n")
+
+
+def students_section() -> ReportSection:
+    return ReportSection("Students", StudentDao().iter_summaries,
+                         lambda s: f"Prénom: {s.first_name}\nNom: {s.last_name}\nAge: {s.age}\n\n")
+
+
+def database_sections() -> list[ReportSection]:
+    """Sections du rapport complet de la BD, dans l'ordre d'affichage."""
+    return [courses_section(), addresses_section(), teachers_section(), students_section()]
+
+
+# marqueur de fin de section dans la file d'une section
+_END = object()
+
+
+@dataclass
+class ReportEngine:
+    """Rendu d'un rapport : les sections sont lues simultanément, chacune dans son
+    thread et sur sa propre connexion du pool, et leurs lignes mises en forme sont
+    écrites dans le flux de sortie au fil de leur arrivée, section après section.
+    Une section seule, ou un rapport rendu dans une unité de travail, est lu dans le
+    thread appelant : la connexion de l'unité ne se partage pas entre threads, et
+    ses écritures non validées ne sont visibles que sur elle.
+    - sections    : sections du rapport, dans l'ordre d'écriture
+    - buffer_size : nombre maximal de lignes en attente par section (mémoire bornée)
+    """
+    sections: list[ReportSection]
+    buffer_size: int = 1000
+
+    def render(self, stream: TextIO, headers: bool = True) -> None:
+        """Écrit le rapport dans le flux texte stream."""
+        if len(self.sections) <= 1 or current_unit_of_work() is not None:
+            self._render_inline(stream, headers)
+            return
+        cancelled = threading.Event()
+        queues = [queue.Queue(self.buffer_size) for _ in self.sections]
+        with ThreadPoolExecutor(max_workers=len(self.sections) or 1,
+                                thread_name_prefix="report") as executor:
+            # les requêtes des sections sont comptées dans l'appel instrumenté en cours
+            scope = current_scope()
+            for section, lines in zip(self.sections, queues):
+                executor.submit(self._produce, section, lines, cancelled, scope)
+            try:
+                for section, lines in zip(self.sections, queues):
+                    if headers:
+                        stream.write(f"---------------{section.title}---------------\n\n")
+                    while (line := lines.get()) is not _END:
+                        if isinstance(line, Exception):
+                            print(f"Erreur lors de la lecture de la section {section.title}: {line}")
+                            continue
+                        stream.write(line)
+                    if headers:
+                        stream.write("\n")
+            finally:
+                # débloque les sections encore en cours si l'écriture a échoué
+                cancelled.set()
+
+    def _render_inline(self, stream: TextIO, headers: bool) -> None:
+        """Écrit le rapport section par section, sans thread ni file d'attente."""
+        for section in self.sections:
+            if headers:
+                stream.write(f"---------------{section.title}---------------\n\n")
+            rows: Optional[Iterable[Any]] = None
+            try:
+                rows = section.rows()
+                for row in rows:
+                    stream.write(section.format_row(row))
+            except Exception as e:
+                print(f"Erreur lors de la lecture de la section {section.title}: {e}")
+            finally:
+                close = getattr(rows, 'close', None)
+                if close is not None:
+                    close()
+            if headers:
+                stream.write("\n")
+
+    def render_to_string(self, headers: bool = False) -> str:
+        """Renvoie le rapport sous forme de chaîne."""
+        buffer = io.StringIO()
+        self.render(buffer, headers)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _produce(section: ReportSection, lines: queue.Queue, cancelled: threading.Event,
+                 scope: Optional[CallScope] = None) -> None:
+        """Lit et met en forme les lignes d'une section, jusqu'à épuisement ou annulation."""
+        def put(item: Any) -> bool:
+            while not cancelled.is_set():
+                try:
+                    lines.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        rows: Optional[Iterable[Any]] = None
+        with attached_scope(scope):
+            try:
+                rows = section.rows()
+                for row in rows:
+                    if not put(section.format_row(row)):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                close = getattr(rows, 'close', None)
+                if close is not None:
+                    close()
+                put(_END)
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+"""
+Détection des chevauchements d'emplois du temps des enseignants et des élèves :
+- IntervalIndex : intervalles de dates d'un enseignant ou d'un élève, triés par début
+- ScheduleIndex : index de tous les cours de l'école, par enseignant et par élève
+"""
+
+import bisect
+import heapq
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+from operator import itemgetter
+from typing import Optional
+
+from ecole.daos.dao import Dao
+
+
+@dataclass
+class Conflict:
+    """Chevauchement de deux cours d'un même enseignant ou d'un même élève :
+    - kind      : 'teacher' ou 'student'
+    - owner     : id de l'enseignant ou n° de l'élève
+    - id_course : cours dont la période chevauche celle de other_course
+    """
+    kind: str
+    owner: int
+    id_course: int
+    other_course: int
+
+
+@dataclass
+class IntervalIndex:
+    """Périodes [début, fin] (fin incluse) des cours d'un propriétaire, triées par début,
+    avec le maximum cumulé des fins : savoir si une période chevauche l'une d'elles
+    revient à une recherche dichotomique, soit O(log n). Le maximum cumulé est
+    recalculé (O(n)) à la première recherche suivant une modification."""
+    _items: list[tuple[date, date, int]] = field(default_factory=list)
+    _max_ends: Optional[list[tuple[date, int]]] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, id_course: int, start: date, end: date) -> None:
+        bisect.insort(self._items, (start, end, id_course))
+        self._max_ends = None
+
+    def remove(self, id_course: int) -> None:
+        self._items = [item for item in self._items if item[2] != id_course]
+        self._max_ends = None
+
+    def overlapping(self, start: date, end: date) -> Optional[int]:
+        """Renvoie l'id d'un cours dont la période chevauche [start, end], ou None."""
+        # cours commençant au plus tard à la fin de la période
+        count = bisect.bisect_right(self._items, end, key=itemgetter(0))
+        if count == 0:
+            return None
+        if self._max_ends is None:
+            self._rebuild()
+        max_end, id_course = self._max_ends[count - 1]
+        return id_course if max_end >= start else None
+
+    def conflicts(self) -> list[tuple[int, int]]:
+        """Tous les couples de cours qui se chevauchent (le premier commençant le premier),
+        par balayage des périodes triées : les cours en cours au début de chaque période,
+        gardés dans un tas par date de fin, la chevauchent tous. Coût : O(n log n + k),
+        k étant le nombre de couples renvoyés."""
+        found = []
+        active: list[tuple[date, int]] = []
+        for start, end, id_course in self._items:
+            while active and active[0][0] < start:
+                heapq.heappop(active)
+            found.extend((other, id_course) for _, other in active)
+            heapq.heappush(active, (end, id_course))
+        return found
+
+    def _rebuild(self) -> None:
+        max_ends = []
+        latest: Optional[tuple[date, int]] = None
+        for _, end, id_course in self._items:
+            if latest is None or end > latest[0]:
+                latest = (end, id_course)
+            max_ends.append(latest)
+        self._max_ends = max_ends
+
+
+@dataclass
+class ScheduleIndex:
+    """Index des périodes de cours par enseignant et par élève :
+    - courses  : id_course -> (début, fin, id_teacher)
+    - teachers : id_teacher -> périodes de ses cours
+    - students : student_nbr -> périodes des cours qu'il suit
+    """
+    courses: dict[int, tuple[date, date, int]] = field(default_factory=dict)
+    teachers: dict[int, IntervalIndex] = field(default_factory=dict)
+    students: dict[int, IntervalIndex] = field(default_factory=dict)
+    _enrollments: dict[int, set[int]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def load(cls, batch_size: int = 10_000) -> 'ScheduleIndex':
+        """Construit l'index à partir des tables course et takes (2 requêtes)."""
+        index = cls()
+        for rows in Dao._iter_records("SELECT id_course, start_date, end_date, id_teacher FROM course",
+                                      batch_size=batch_size, as_tuples=True):
+            for id_course, start, end, id_teacher in rows:
+                index.add_course(id_course, start, end, id_teacher)
+        for rows in Dao._iter_records("SELECT student_nbr, id_course FROM takes",
+                                      batch_size=batch_size, as_tuples=True):
+            for student_nbr, id_course in rows:
+                index.add_enrollment(student_nbr, id_course)
+        return index
+
+    def add_course(self, id_course: int, start: date, end: date, id_teacher: int) -> None:
+        self.courses[id_course] = (start, end, id_teacher)
+        self.teachers.setdefault(id_teacher, IntervalIndex()).add(id_course, start, end)
+
+    def remove_course(self, id_course: int) -> None:
+        course = self.courses.pop(id_course, None)
+        if course is not None:
+            self.teachers[course[2]].remove(id_course)
+            for student_nbr, enrolled in self._enrollments.items():
+                if id_course in enrolled:
+                    enrolled.discard(id_course)
+                    self.students[student_nbr].remove(id_course)
+
+    def add_enrollment(self, student_nbr: int, id_course: int) -> None:
+        course = self.courses.get(id_course)
+        enrolled = self._enrollments.setdefault(student_nbr, set())
+        if course is not None and id_course not in enrolled:
+            enrolled.add(id_course)
+            self.students.setdefault(student_nbr, IntervalIndex()).add(id_course, course[0], course[1])
+
+    def remove_enrollment(self, student_nbr: int, id_course: int) -> None:
+        if id_course in self._enrollments.get(student_nbr, ()):
+            self._enrollments[student_nbr].discard(id_course)
+            self.students[student_nbr].remove(id_course)
+
+    def teacher_conflict(self, id_teacher: int, start: date, end: date) -> Optional[int]:
+        """Cours de l'enseignant chevauchant la période [start, end] (ou None)."""
+        intervals = self.teachers.get(id_teacher)
+        return intervals.overlapping(start, end) if intervals is not None else None
+
+    def student_conflict(self, student_nbr: int, id_course: int) -> Optional[int]:
+        """Cours suivi par l'élève chevauchant le cours id_course (ou None) ;
+        un cours déjà suivi par l'élève n'est pas un conflit."""
+        course = self.courses.get(id_course)
+        intervals = self.students.get(student_nbr)
+        if course is None or intervals is None or id_course in self._enrollments[student_nbr]:
+            return None
+        return intervals.overlapping(course[0], course[1])
+
+    def scan(self) -> list[Conflict]:
+        """Tous les chevauchements de l'école : un Conflict par couple de cours
+        qui se chevauchent, pour chaque enseignant et chaque élève."""
+        conflicts = []
+        for kind, owners in (('teacher', self.teachers), ('student', self.students)):
+            for owner, intervals in owners.items():
+                conflicts.extend(Conflict(kind, owner, id_course, other)
+                                 for other, id_course in intervals.conflicts())
+        return conflicts
+
+
+# index partagé, chargé à la première validation et tenu à jour par School
+_schedule_index: Optional[ScheduleIndex] = None
+_schedule_lock = threading.Lock()
+
+
+def get_schedule_index(refresh: bool = False) -> ScheduleIndex:
+    """Renvoie l'index partagé des emplois du temps, rechargé depuis la BD si refresh."""
+    global _schedule_index
+    with _schedule_lock:
+        if _schedule_index is None or refresh:
+            _schedule_index = ScheduleIndex.load()
+        return _schedule_index
+
+
+def loaded_schedule_index() -> Optional[ScheduleIndex]:
+    """Renvoie l'index partagé s'il a déjà été chargé (à tenir à jour), None sinon."""
+    return _schedule_index
+
+
+def reset_schedule_index() -> None:
+    """Oublie l'index partagé : il sera rechargé à la prochaine validation."""
+    global _schedule_index
+    with _schedule_lock:
+        _schedule_index = None
@@ -4,13 +4,32 @@
 Classe School
 """
 
+import sys
+from contextlib import AbstractContextManager, contextmanager
 from dataclasses import dataclass, field
 from datetime import date
-
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from ecole.business.aggregates import get_aggregates
+from ecole.business.exporter import JOINED_VIEWS, TABLE_VIEWS, DatabaseExporter, ExportStats
+from ecole.business.importer import ImportPipeline, ImportStats
+from ecole.business.loader import SchoolLoader
+from ecole.business.search import SearchHit, get_search_index
+from ecole.business.schedule import (Conflict, get_schedule_index, loaded_schedule_index,
+                                     reset_schedule_index)
+from ecole.business.report import (ReportEngine, addresses_section, courses_section,
+                                   database_sections, students_section, teachers_section)
 from ecole.daos.course_dao import CourseDao
+from ecole.daos.dao import Dao
 from ecole.daos.student_dao import StudentDao
 from ecole.daos.teacher_dao import TeacherDao
+from ecole.daos.takes_dao import TakesDao
 from ecole.daos.address_dao import AddressDao
+from ecole.daos.bulk import BulkResult
+from ecole.daos.cache import IdentityMap, read_cache, session
+from ecole.daos.instrumentation import instrumentation, instrumented
+from ecole.daos.page import Page
+from ecole.daos.unit_of_work import UnitOfWork
 from ecole.models.address import Address
 from ecole.models.course import Course
 from ecole.models.teacher import Teacher
@@ -18,6 +37,7 @@ from ecole.models.student import Student
 
 
 # noinspection SpellCheckingInspection
+@instrumented
 @dataclass
 class School:
     """Couche métier de l'application de gestion d'une école,
@@ -52,6 +72,65 @@ class School:
                 print(f"- {student}")
             print()
 
+    #============== cache de lecture ==================
+    @staticmethod
+    def session() -> AbstractContextManager[IdentityMap]:
+        """Ouvre une session de travail : dans un bloc with School.session(),
+        chaque entité lue par id n'est chargée qu'une fois (même instance renvoyée)."""
+        return session()
+
+    @staticmethod
+    def cache_stats() -> dict[str, Any]:
+        """Compteurs (succès, échecs, évictions...) du cache de lecture des DAO."""
+        return read_cache.stats()
+
+    @staticmethod
+    def query_stats() -> dict[str, dict[str, float]]:
+        """Requêtes et temps passé en BD par méthode de School, agrégés depuis
+        l'activation de l'instrumentation (instrumentation.enable())."""
+        return instrumentation.stats()
+
+    #============== unité de travail ==================
+    @staticmethod
+    @contextmanager
+    def transaction() -> Iterator[UnitOfWork]:
+        """Regroupe les opérations du bloc with School.transaction() en une seule
+        transaction, validée à la fin du bloc ou annulée s'il lève une exception.
+        Les créations y renvoient un id provisoire négatif, utilisable dans le bloc
+        (ex. comme enseignant d'un cours ou pour une inscription) ; les points de
+        sauvegarde (with unit.savepoint(), ou un bloc School.transaction() imbriqué)
+        permettent d'en annuler une partie seulement."""
+        try:
+            with Dao.transaction() as unit:
+                yield unit
+        finally:
+            # les cours et inscriptions de l'unité n'ont pas été reportés dans l'index
+            reset_schedule_index()
+
+    #============== résolution groupée d'ids ==========
+    @staticmethod
+    def resolve(refs: Iterable[tuple[str, int]]) -> list[Optional[Any]]:
+        """
+        Résout une liste mêlant des références à plusieurs types d'entités, en une
+        requête groupée (read_many) par type au lieu d'une requête par id
+        :param refs: couples (type, id), type parmi 'course', 'teacher', 'student', 'address'
+        :return: les entités dans l'ordre de refs (None si introuvable)
+        """
+        daos = {'course': CourseDao(), 'teacher': TeacherDao(),
+                'student': StudentDao(), 'address': AddressDao()}
+        refs = list(refs)
+        ids_by_kind: dict[str, list[int]] = {}
+        for kind, id_entity in refs:
+            if kind not in daos:
+                raise ValueError(f"Type d'entité inconnu: {kind}")
+            ids_by_kind.setdefault(kind, []).append(id_entity)
+
+        resolved: dict[tuple[str, int], Any] = {}
+        for kind, ids in ids_by_kind.items():
+            resolved.update(((kind, id_entity), obj)
+                            for id_entity, obj in zip(ids, daos[kind].read_many(ids)))
+        return [resolved[ref] for ref in refs]
+
     #============== gestion cours======================
     @staticmethod
     def get_course_by_id(id_course: int):
@@ -59,7 +138,20 @@ class School:
         return course_dao.read(id_course)
 
     @staticmethod
-    def create_course(name: str,start_date: date, end_date: date, id_teacher: int) -> str:
+    def create_course(name: str,start_date: date, end_date: date, id_teacher: int,
+                      check_conflicts: bool = False) -> str:
+        """
+        Crée un cours en BD
+        :param check_conflicts: si True, refuse le cours s'il chevauche un autre cours de l'enseignant
+        :return: message de succès ou d'échec
+        """
+        if check_conflicts:
+            other = get_schedule_index().teacher_conflict(id_teacher, start_date, end_date)
+            if other is not None:
+                return (
+                    f"Échec de la création du cours: l'enseignant id={id_teacher} "
+                    f"a déjà un cours sur cette période (id={other})"
+                )
 
         course_dao: CourseDao = CourseDao()
         new_course = Course(
@@ -72,14 +164,31 @@ class School:
         new_id = course_dao.create(new_course)
 
         if new_id > 0:
+            if (index := loaded_schedule_index()) is not None:
+                index.add_course(new_id, start_date, end_date, id_teacher)
             return (
                 f"Cours créé avec succès (id={new_id}): "
                 f"{name}, du {start_date} au {end_date}, enseignant id={id_teacher}"
             )
+        elif new_id < 0:
+            return f"Cours en attente de la fin de la transaction (id provisoire={new_id}): {name}"
         else:
             return "Échec de la création du cours."
 
 
+    @staticmethod
+    def create_courses(courses: list[tuple[str, date, date, int]]) -> BulkResult:
+        """
+        Crée en une seule transaction les cours décrits par (nom, début, fin, id enseignant)
+        :param courses: description des cours à créer
+        :return: ids créés et erreurs par ligne, sans interruption du lot
+        """
+        course_dao: CourseDao = CourseDao()
+        return course_dao.create_many([
+            Course(name=name, start_date=start_date, end_date=end_date, id_teacher=id_teacher)
+            for name, start_date, end_date, id_teacher in courses
+        ])
+
     @staticmethod
     def update_course_by_id(id_course: int, name: str, start_date : date, end_date: date) -> bool:
         course_dao: CourseDao = CourseDao()
@@ -96,6 +205,7 @@ class School:
         success = course_dao.update(course)
 
         if success:
+            reset_schedule_index()
             print(f"Cour mis à jour avec succès (id:{id_course})")
         else:
             print(f"Échec de la mise à jour du cours (id:{id_course})")
@@ -119,6 +229,8 @@ class School:
         success = course_dao.delete(course)
 
         if success:
+            if (index := loaded_schedule_index()) is not None:
+                index.remove_course(id_course)
             print(f"Cours supprimée avec succès (id={id_course})")
         else:
             print(f"Échec de la suppression du cours (id={id_course})")
@@ -127,14 +239,7 @@ class School:
 
     @staticmethod
     def get_all_courses() -> str:
-        course_dao: CourseDao = CourseDao()
-        courses = course_dao.read_all()
-        result = ""
-        for c in courses:
-            result += (
-                f"{c.id} - {c.name} ({c.start_date} → {c.end_date})\n"
-            )
-        return result
+        return ReportEngine([courses_section()]).render_to_string()
 
     @staticmethod
     def get_all_courses_with_teacher() -> str:
@@ -154,6 +259,19 @@ class School:
 
         return result
 
+    @staticmethod
+    def get_courses_page(limit: int = 50, token: Optional[str] = None, order_by: str = 'id',
+                         with_teacher: bool = False) -> Page[Course]:
+        """
+        Renvoie une page de la liste des cours (pagination sur clé)
+        :param limit: nombre maximal de cours par page
+        :param token: jeton next_token de la page précédente (None pour la première)
+        :param order_by: 'id', 'name' ou 'start_date'
+        :param with_teacher: ne lister que les cours ayant un enseignant
+        :return: la page de cours et le jeton de la suivante
+        """
+        return CourseDao.read_page(limit, token, order_by, with_teacher)
+
     #================Gestion des teachers====================
     @staticmethod
     def create_new_teacher(first_name: str, last_name: str, age: int, hiring_date: date) -> str:
@@ -177,9 +295,24 @@ class School:
 
         if new_id > 0:
             return f"Professeur créé avec succès (id={new_id}): {first_name} {last_name}, {age} ans, embauché le {hiring_date}"
+        elif new_id < 0:
+            return f"Professeur en attente de la fin de la transaction (id provisoire={new_id}): {first_name} {last_name}"
         else:
             return "Échec de la création du professeur!"
 
+    @staticmethod
+    def create_new_teachers(teachers: list[tuple[str, str, int, date]]) -> BulkResult:
+        """
+        Crée en une seule transaction les enseignants décrits par (prénom, nom, âge, date d'embauche)
+        :param teachers: description des enseignants à créer
+        :return: ids créés et erreurs par ligne, sans interruption du lot
+        """
+        teacher_dao: TeacherDao = TeacherDao()
+        return teacher_dao.create_many([
+            Teacher(first_name=first_name, last_name=last_name, age=age, hiring_date=hiring_date)
+            for first_name, last_name, age, hiring_date in teachers
+        ])
+
     @staticmethod
     def get_teacher_by_id(id_teacher: int):
         teacher_dao: TeacherDao = TeacherDao()
@@ -233,6 +366,15 @@ class School:
 
 
 
+    @staticmethod
+    def get_teachers_page(limit: int = 50, token: Optional[str] = None, order_by: str = 'id') -> Page[Teacher]:
+        """
+        Renvoie une page de la liste des enseignants (pagination sur clé)
+        :param order_by: 'id', 'name' ou 'hiring_date'
+        """
+        teacher_dao: TeacherDao = TeacherDao()
+        return teacher_dao.read_page(limit, token, order_by)
+
     #=================Gestion des Students=================
     @staticmethod
     def create_new_student(first_name: str, last_name: str, age: int) -> str:
@@ -247,9 +389,24 @@ class School:
 
         if new_id > 0:
             return f"Elève créé avec succès (id={new_id}): {first_name} {last_name}, {age} ans!"
+        elif new_id < 0:
+            return f"Elève en attente de la fin de la transaction (id provisoire={new_id}): {first_name} {last_name}"
         else:
             return "Échec de la création de l'élève!"
 
+    @staticmethod
+    def create_new_students(students: list[tuple[str, str, int]]) -> BulkResult:
+        """
+        Crée en une seule transaction les élèves décrits par (prénom, nom, âge)
+        :param students: description des élèves à créer
+        :return: n° d'élèves créés et erreurs par ligne, sans interruption du lot
+        """
+        student_dao: StudentDao = StudentDao()
+        return student_dao.create_many([
+            Student(first_name=first_name, last_name=last_name, age=age)
+            for first_name, last_name, age in students
+        ])
+
     @staticmethod
     def get_student_by_id(id_student: int):
         student_dao: StudentDao = StudentDao()
@@ -300,6 +457,15 @@ class School:
 
         return success
 
+    @staticmethod
+    def get_students_page(limit: int = 50, token: Optional[str] = None, order_by: str = 'id') -> Page[Student]:
+        """
+        Renvoie une page de la liste des élèves (pagination sur clé)
+        :param order_by: 'id' ou 'name'
+        """
+        student_dao: StudentDao = StudentDao()
+        return student_dao.read_page(limit, token, order_by)
+
     #==============gestion des adresses============
     @staticmethod
     def get_address_by_id(id_address: int):
@@ -308,14 +474,15 @@ class School:
 
     @staticmethod
     def get_all_addresses() -> str:
-        address_dao: AddressDao = AddressDao()
-        adresses = address_dao.read_all()
-        result = ""
-        for a in adresses:
-            result += (
-                f"{a.street}, {a.postal_code}: {a.city}\n"
-            )
-        return result
+        return ReportEngine([addresses_section()]).render_to_string()
+
+    @staticmethod
+    def get_addresses_page(limit: int = 50, token: Optional[str] = None, order_by: str = 'id') -> Page[Address]:
+        """
+        Renvoie une page de la liste des adresses (pagination sur clé)
+        :param order_by: 'id' ou 'city'
+        """
+        return AddressDao.read_page(limit, token, order_by)
 
     @staticmethod
     def create_new_address(street: str, city: str, postal_code: int) -> str:
@@ -325,9 +492,24 @@ class School:
         new_id = address_dao.create(new_address)
         if new_id > 0:
             return f"Adresse créée avec succès (id={new_id}): {street}, {postal_code} {city})"
+        elif new_id < 0:
+            return f"Adresse en attente de la fin de la transaction (id provisoire={new_id}): {street}, {postal_code} {city}"
         else:
             return "Échec de la création de l'adresse! "
 
+    @staticmethod
+    def create_new_addresses(addresses: list[tuple[str, str, int]]) -> BulkResult:
+        """
+        Crée en une seule transaction les adresses décrites par (rue, ville, code postal)
+        :param addresses: description des adresses à créer
+        :return: ids créés et erreurs par ligne, sans interruption du lot
+        """
+        address_dao: AddressDao = AddressDao()
+        return address_dao.create_many([
+            Address(street=street, city=city, postal_code=postal_code)
+            for street, city, postal_code in addresses
+        ])
+
     @staticmethod
     def update_address_by_id(id_address: int, street: str, city: str, postal_code: int) -> bool:
         """
@@ -382,40 +564,180 @@ class School:
 
         return success
 
+    #==============gestion des inscriptions============
+    @staticmethod
+    def enroll_students(id_course: int, student_nbrs: Iterable[int], check_conflicts: bool = False) -> str:
+        """
+        Inscrit en une seule transaction toute une classe au cours id_course
+        :param id_course: id du cours
+        :param student_nbrs: n° des élèves à inscrire (les déjà inscrits sont ignorés)
+        :param check_conflicts: si True, n'inscrit pas les élèves ayant déjà un cours sur la période
+        :return: message indiquant le nombre de nouvelles inscriptions (et d'élèves refusés)
+        """
+        student_nbrs = list(student_nbrs)
+        rejected: list[int] = []
+        if check_conflicts:
+            index = get_schedule_index()
+            if id_course not in index.courses:
+                course = CourseDao().read(id_course)
+                if course is not None:
+                    index.add_course(id_course, course.start_date, course.end_date, course.id_teacher)
+            rejected = [nbr for nbr in student_nbrs if index.student_conflict(nbr, id_course) is not None]
+            refused = set(rejected)
+            student_nbrs = [nbr for nbr in student_nbrs if nbr not in refused]
+
+        takes_dao: TakesDao = TakesDao()
+        enrolled = takes_dao.enroll_class(id_course, student_nbrs)
+        if enrolled and (index := loaded_schedule_index()) is not None:
+            for student_nbr in student_nbrs:
+                index.add_enrollment(student_nbr, id_course)
+
+        message = f"{enrolled} nouvelle(s) inscription(s) au cours (id={id_course})"
+        if rejected:
+            message += f", {len(rejected)} élève(s) refusé(s) pour chevauchement: {rejected}"
+        return message
+
+    @staticmethod
+    def unenroll_students(id_course: int, student_nbrs: Iterable[int]) -> str:
+        """
+        Désinscrit en une seule transaction les élèves indiqués du cours id_course
+        :return: message indiquant le nombre de désinscriptions
+        """
+        takes_dao: TakesDao = TakesDao()
+        student_nbrs = list(student_nbrs)
+        removed = takes_dao.unenroll((student_nbr, id_course) for student_nbr in student_nbrs)
+        if removed and (index := loaded_schedule_index()) is not None:
+            for student_nbr in student_nbrs:
+                index.remove_enrollment(student_nbr, id_course)
+        return f"{removed} désinscription(s) du cours (id={id_course})"
+
+    @staticmethod
+    def replace_course_roster(id_course: int, student_nbrs: Iterable[int]) -> bool:
+        """
+        Remplace la liste des élèves du cours id_course par student_nbrs
+        :return: True si le remplacement a réussi, False sinon
+        """
+        takes_dao: TakesDao = TakesDao()
+        success = takes_dao.replace_roster(id_course, student_nbrs)
+        if success:
+            reset_schedule_index()
+        return success
+
+    @staticmethod
+    def find_schedule_conflicts() -> list[Conflict]:
+        """Renvoie tous les chevauchements de cours des enseignants et des élèves,
+        l'index des emplois du temps étant rechargé depuis la BD"""
+        return get_schedule_index(refresh=True).scan()
+
+    #==============recherche===========================
+    @staticmethod
+    def search(query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20,
+               fuzzy: bool = True) -> list[SearchHit]:
+        """
+        Recherche les élèves, enseignants et adresses par début de nom, de rue ou de ville,
+        même mal orthographiés (index en mémoire, construit au premier appel)
+        :param query: mots cherchés (ex. "dub toul" pour les Dubois de Toulouse)
+        :param kinds: 'student', 'teacher' et/ou 'address' (tous par défaut)
+        :return: les limit résultats les plus pertinents
+        """
+        return get_search_index().search(query, kinds, limit, fuzzy)
+
+    #==============agrégats============================
+    @staticmethod
+    def get_course_headcount(id_course: int) -> int:
+        """Renvoie le nombre d'élèves inscrits au cours id_course, sans requête
+        (agrégats en mémoire, calculés au premier appel puis tenus à jour)"""
+        return get_aggregates().course_headcount(id_course)
+
+    @staticmethod
+    def get_teacher_load(id_teacher: int) -> int:
+        """Renvoie le nombre de cours de l'enseignant id_teacher, sans requête"""
+        return get_aggregates().teacher_load(id_teacher)
+
+    @staticmethod
+    def get_city_student_count(city: str) -> int:
+        """Renvoie le nombre d'élèves habitant la ville city, sans requête"""
+        return get_aggregates().city_students(city)
+
+    @staticmethod
+    def get_students_per_city() -> dict[str, int]:
+        """Renvoie le nombre d'élèves de chaque ville, des plus peuplées aux moins peuplées"""
+        return get_aggregates().students_per_city()
+
+    #==============import en masse=====================
+    @staticmethod
+    def import_file(source: str, kind: str, checkpoint_path: Optional[str] = None,
+                    rejects_path: Optional[str] = None, workers: Optional[int] = None,
+                    chunk_size: int = 1000) -> ImportStats:
+        """
+        Importe un fichier CSV ou JSONL d'élèves (avec adresse et cours suivis),
+        d'enseignants ou d'inscriptions (cf. ImportPipeline)
+        :param source: fichier à importer
+        :param kind: 'students', 'teachers' ou 'enrollments'
+        :param checkpoint_path: fichier de reprise : un import interrompu reprend là où il s'est arrêté
+        :param rejects_path: fichier JSONL des enregistrements rejetés, avec leur motif
+        :return: enregistrements importés et rejetés, débit et position atteinte
+        """
+        stats = ImportPipeline(kind, chunk_size=chunk_size, workers=workers).run(
+            source, checkpoint_path, rejects_path)
+        if kind != 'teachers':
+            # inscriptions ajoutées hors de l'index des emplois du temps
+            reset_schedule_index()
+        return stats
+
+    @staticmethod
+    def get_courses_of_student(student_nbr: int) -> list[Course]:
+        """Renvoie les cours suivis par l'élève (2 requêtes, quel que soit leur nombre)"""
+        course_dao: CourseDao = CourseDao()
+        courses = course_dao.read_many(TakesDao.courses_of_student(student_nbr))
+        return [course for course in courses if course is not None]
+
+    @staticmethod
+    def get_students_of_course(id_course: int) -> list[Student]:
+        """Renvoie les élèves suivant le cours (2 requêtes, quel que soit leur nombre)"""
+        student_dao: StudentDao = StudentDao()
+        students = student_dao.read_many(TakesDao.students_of_course(id_course))
+        return [student for student in students if student is not None]
+
     @staticmethod
     def get_all_teachers() -> str:
-        teacher_dao: TeacherDao = TeacherDao()
-        teachers = teacher_dao.read_all()
-        result = ""
-        for t in teachers:
-            result += (
-                f"Prénom: {t.first_name}\nNom: {t.last_name}\nAge: {t.age}\nDate d'embauche: {t.hiring_date}\n\n"
-            )
-        return result
+        return ReportEngine([teachers_section()]).render_to_string()
 
     @staticmethod
     def get_all_students() -> str:
-        student_dao: StudentDao = StudentDao()
-        students = student_dao.read_all()
-        result = ""
-        for s in students:
-            result += (
-                f"Prénom: {s.first_name}\nNom: {s.last_name}\nAge: {s.age}\n\n"
-            )
-        return result
+        return ReportEngine([students_section()]).render_to_string()
 
     @staticmethod
-    def print_all_database():
-        school = School()
-        print('---------------Courses---------------\n')
-        print(school.get_all_courses())
-        print('---------------Adresses---------------\n')
-        print(school.get_all_addresses())
-        print('---------------Teachers---------------\n')
-        print(school.get_all_teachers())
-        print('---------------Students---------------\n')
-        print(school.get_all_students())
+    def print_all_database(stream: Optional[TextIO] = None) -> None:
+        """
+        Écrit le contenu des 4 tables dans stream (la sortie standard par défaut) :
+        les tables sont lues simultanément et leurs lignes écrites au fil de l'eau
+        """
+        ReportEngine(database_sections()).render(stream if stream is not None else sys.stdout)
+
+    @staticmethod
+    def export_database(directory: str, fmt: str = 'csv', compress: bool = False,
+                        joined_views: bool = True, workers: Optional[int] = None) -> ExportStats:
+        """
+        Exporte toutes les tables, et les vues jointes (cours avec leur enseignant,
+        inscriptions avec le nom de l'élève et du cours), un fichier par table ou vue,
+        en flux et en parallèle (cf. DatabaseExporter)
+        :param directory: répertoire des fichiers produits
+        :param fmt: 'csv' ou 'jsonl'
+        :param compress: fichiers compressés en gzip
+        :return: lignes, taille et débit de chaque table ou vue
+        """
+        views = TABLE_VIEWS + JOINED_VIEWS if joined_views else TABLE_VIEWS
+        return DatabaseExporter(views, fmt=fmt, compress=compress, workers=workers).export(directory)
+
 
+    def load_from_database(self, courses: bool = True, teachers: bool = True,
+                           students: bool = True, addresses: bool = True) -> None:
+        """Chargement de l'école depuis la BD, avec tous les liens entre entités,
+        en un nombre fixe de requêtes ; chaque indicateur permet d'exclure une partie
+        du graphe (par ex. courses et students seuls : les cours et leurs élèves)."""
+        SchoolLoader().load(self, courses=courses, teachers=teachers,
+                            students=students, addresses=addresses)
 
     def init_static(self) -> None:
         """Initialisation d'un jeu de test pour l'école."""
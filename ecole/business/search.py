@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+"""
+Recherche des élèves, enseignants et adresses par nom, rue ou ville :
+- SearchIndex : index inversé en mémoire (préfixes par bisection, trigrammes pour la recherche approchée),
+                tenu à jour par les événements des DAO
+- SearchHit   : résultat d'une recherche, avec son score
+"""
+
+import bisect
+import heapq
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from ecole.daos.dao import Dao
+from ecole.daos.events import DaoEvent, dao_events
+
+# document indexé : ('student', student_nbr), ('teacher', id_teacher) ou ('address', id_address)
+Key = tuple[str, int]
+
+
+def normalize(text: str) -> str:
+    """Texte en minuscules, sans accents, la ponctuation remplacée par des espaces."""
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char if char.isalnum() else ' ' for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(*texts: Optional[str]) -> list[str]:
+    """Mots normalisés des textes, sans doublons, dans l'ordre."""
+    return list(dict.fromkeys(token for text in texts if text for token in normalize(str(text)).split()))
+
+
+def trigrams(token: str) -> set[str]:
+    """Trigrammes du mot, complété comme dans pg_trgm (deux espaces avant, un après)."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    """Résultat d'une recherche :
+    - kind  : 'student', 'teacher' ou 'address'
+    - id    : student_nbr, id_teacher ou id_address
+    - label : libellé affichable (nom et ville, ou adresse)
+    - score : pertinence (somme, pour chaque mot cherché, de 1 si exact, moins si préfixe ou approché) ;
+              à score égal, l'ordre des résultats n'est pas spécifié
+    """
+    kind: str
+    id: int
+    label: str
+    score: float
+
+
+@dataclass
+class SearchIndex:
+    """Index des élèves et enseignants (prénom, nom, rue et ville de leur adresse)
+    et des adresses (rue, ville, code postal) :
+    - chaque mot indexé renvoie aux documents qui le contiennent ;
+    - les mots distincts sont gardés triés : les mots commençant par un préfixe
+      forment une plage trouvée par bisection ;
+    - chaque trigramme renvoie aux mots qui le contiennent : un mot mal orthographié
+      est rapproché des mots partageant assez de trigrammes (similarité de Jaccard).
+    Un document contient tous les mots cherchés (exactement, comme préfixe ou, si fuzzy,
+    approximativement). L'index est tenu à jour par apply(), abonné aux événements des
+    DAO ; les écritures faites hors des DAO de ce processus demandent un rechargement.
+    - min_similarity : similarité minimale d'un mot approché
+    """
+    min_similarity: float = 0.3
+    _documents: dict[Key, tuple[str, tuple[str, ...]]] = field(default_factory=dict, init=False, repr=False)
+    _postings: dict[str, set[Key]] = field(default_factory=dict, init=False, repr=False)
+    _sorted_tokens: list[str] = field(default_factory=list, init=False, repr=False)
+    _trigram_tokens: dict[str, set[str]] = field(default_factory=dict, init=False, repr=False)
+    _trigram_counts: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    # personnes (prénom, nom) et rattachement à leur adresse, pour les réindexer quand elle change
+    _names: dict[Key, tuple[str, str]] = field(default_factory=dict, init=False, repr=False)
+    _address_of: dict[Key, int] = field(default_factory=dict, init=False, repr=False)
+    _residents: dict[int, set[Key]] = field(default_factory=dict, init=False, repr=False)
+    _addresses: dict[int, tuple[str, str, int]] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+    # événements reçus pendant load(), reportés à la fin de celui-ci (None hors chargement)
+    _deferred: Optional[list[DaoEvent]] = field(default=None, init=False, repr=False)
+
+    def load(self, batch_size: int = 1000) -> 'SearchIndex':
+        """Indexe les adresses, les élèves et les enseignants d'un instantané de la BD
+        (lus en flux, hors de toute unité de travail : seules les données validées sont
+        indexées). Les événements reçus pendant la lecture sont reportés ensuite."""
+        with self._lock:
+            self._deferred = []
+        try:
+            with Dao.snapshot() as connection:
+                for rows in Dao._iter_records("SELECT id_address, street, city, postal_code FROM address",
+                                              batch_size=batch_size, as_tuples=True, connection=connection):
+                    for id_address, street, city, postal_code in rows:
+                        self.put_address(id_address, street, city, postal_code)
+                for kind, sql in (
+                        ('student', "SELECT s.student_nbr, p.first_name, p.last_name, p.id_address "
+                                    "FROM student s INNER JOIN person p ON s.id_person = p.id_person"),
+                        ('teacher', "SELECT t.id_teacher, p.first_name, p.last_name, p.id_address "
+                                    "FROM teacher t INNER JOIN person p ON t.id_person = p.id_person")):
+                    for rows in Dao._iter_records(sql, batch_size=batch_size, as_tuples=True,
+                                                  connection=connection):
+                        for id_person, first_name, last_name, id_address in rows:
+                            self.put_person(kind, id_person, first_name, last_name, id_address)
+        finally:
+            with self._lock:
+                # écritures postérieures à l'instantané (ou déjà lues : les rejouer ne change rien)
+                events, self._deferred = self._deferred, None
+                for event in events:
+                    self._apply(event)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    #============== mise à jour =======================
+    def put_address(self, id_address: int, street: str, city: str, postal_code: int) -> None:
+        """Indexe (ou réindexe) une adresse, et les personnes qui y habitent."""
+        with self._lock:
+            self._addresses[id_address] = (street, city, postal_code)
+            self._put(('address', id_address), f"{street}, {postal_code} {city}",
+                      tokenize(street, city, str(postal_code)))
+            for key in list(self._residents.get(id_address, ())):
+                self.put_person(key[0], key[1], *self._names[key], id_address)
+
+    def remove_address(self, id_address: int) -> None:
+        with self._lock:
+            self._addresses.pop(id_address, None)
+            self._remove(('address', id_address))
+
+    def put_person(self, kind: str, id_person: int, first_name: str, last_name: str,
+                   id_address: Optional[int]) -> None:
+        """Indexe (ou réindexe) un élève ou un enseignant, avec la rue et la ville de son adresse."""
+        key = (kind, id_person)
+        with self._lock:
+            self._names[key] = (first_name, last_name)
+            self._link(key, id_address)
+            street, city, _ = self._addresses.get(id_address, (None, None, None))
+            label = f"{first_name} {last_name}" + (f", {city}" if city else '')
+            self._put(key, label, tokenize(first_name, last_name, street, city))
+
+    def remove_person(self, kind: str, id_person: int) -> None:
+        key = (kind, id_person)
+        with self._lock:
+            self._names.pop(key, None)
+            self._link(key, None)
+            self._remove(key)
+
+    def apply(self, event: DaoEvent) -> None:
+        """Reporte dans l'index une écriture publiée par les DAO."""
+        with self._lock:
+            if self._deferred is not None:
+                self._deferred.append(event)
+            else:
+                self._apply(event)
+
+    def _apply(self, event: DaoEvent) -> None:
+        with self._lock:
+            if event.entity == 'address':
+                for address in event.objs:
+                    if event.action == 'deleted':
+                        self.remove_address(address.id)
+                    else:
+                        self.put_address(address.id, address.street, address.city, address.postal_code)
+            elif event.entity in ('student', 'teacher'):
+                for person in event.objs:
+                    if event.action == 'deleted':
+                        self.remove_person(event.entity, person.id)
+                        continue
+                    # les DAO ne modifient pas l'adresse d'une personne : celle connue est conservée
+                    id_address = (person.address.id if person.address is not None
+                                  else self._address_of.get((event.entity, person.id)))
+                    self.put_person(event.entity, person.id, person.first_name, person.last_name, id_address)
+
+    def _link(self, key: Key, id_address: Optional[int]) -> None:
+        previous = self._address_of.pop(key, None)
+        if previous is not None:
+            self._residents[previous].discard(key)
+            if not self._residents[previous]:
+                del self._residents[previous]
+        if id_address is not None:
+            self._address_of[key] = id_address
+            self._residents.setdefault(id_address, set()).add(key)
+
+    def _put(self, key: Key, label: str, tokens: list[str]) -> None:
+        self._remove(key)
+        self._documents[key] = (label, tuple(tokens))
+        for token in tokens:
+            if token not in self._postings:
+                self._postings[token] = set()
+                bisect.insort(self._sorted_tokens, token)
+                grams = trigrams(token)
+                self._trigram_counts[token] = len(grams)
+                for gram in grams:
+                    self._trigram_tokens.setdefault(gram, set()).add(token)
+            self._postings[token].add(key)
+
+    def _remove(self, key: Key) -> None:
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        for token in document[1]:
+            postings = self._postings[token]
+            postings.discard(key)
+            if postings:
+                continue
+            # plus aucun document ne contient ce mot
+            del self._postings[token]
+            del self._sorted_tokens[bisect.bisect_left(self._sorted_tokens, token)]
+            del self._trigram_counts[token]
+            for gram in trigrams(token):
+                tokens = self._trigram_tokens[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigram_tokens[gram]
+
+    #============== recherche =========================
+    def search(self, query: str, kinds: Optional[Iterable[str]] = None, limit: int = 20,
+               fuzzy: bool = True) -> list[SearchHit]:
+        """Renvoie les limit documents les plus pertinents contenant tous les mots de query
+        :param kinds: types de documents retenus ('student', 'teacher', 'address'), tous par défaut
+        :param fuzzy: accepter aussi les mots approchés (fautes de frappe)
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        kinds = set(kinds) if kinds is not None else None
+        with self._lock:
+            term_matches = [self._matches(term, fuzzy) for term in terms]
+            if not all(term_matches) or limit <= 0:
+                return []
+            # candidats : documents du mot cherché le plus sélectif, les autres mots
+            # étant ensuite vérifiés sur les quelques mots de chaque candidat
+            first = min(term_matches, key=lambda matches: sum(len(self._postings[token]) for token in matches))
+            others = [matches for matches in term_matches if matches is not first]
+            # meilleur apport possible des autres mots à un candidat
+            bonus = sum(max(matches.values()) for matches in others)
+            best: list[tuple[float, Key]] = []  # tas des limit meilleurs (score, document)
+            seen: set[Key] = set()
+            # mots du plus au moins pertinent : la recherche s'arrête dès qu'aucun des
+            # documents restants ne peut plus entrer parmi les limit meilleurs
+            for token, token_score in sorted(first.items(), key=lambda item: -item[1]):
+                if len(best) == limit and best[0][0] >= token_score + bonus:
+                    break
+                for key in self._postings[token]:
+                    if key in seen or (kinds is not None and key[0] not in kinds):
+                        continue
+                    seen.add(key)
+                    score = token_score
+                    tokens = self._documents[key][1]
+                    for matches in others:
+                        term_score = max(matches.get(other, 0.0) for other in tokens)
+                        if not term_score:
+                            break
+                        score += term_score
+                    else:
+                        if len(best) < limit:
+                            heapq.heappush(best, (score, key))
+                        elif score > best[0][0]:
+                            heapq.heapreplace(best, (score, key))
+                        if len(best) == limit and best[0][0] >= token_score + bonus:
+                            break
+            return [SearchHit(kind, id_entity, self._documents[(kind, id_entity)][0], round(score, 3))
+                    for score, (kind, id_entity) in sorted(best, key=lambda item: (-item[0], item[1]))]
+
+    def _matches(self, term: str, fuzzy: bool) -> dict[str, float]:
+        """Mots indexés correspondant au mot cherché term, avec leur score : lui-même,
+        ses prolongements et (si fuzzy) les mots approchés."""
+        matches: dict[str, float] = {}
+        start = bisect.bisect_left(self._sorted_tokens, term)
+        stop = bisect.bisect_left(self._sorted_tokens, term + '\U0010ffff', start)
+        for token in self._sorted_tokens[start:stop]:
+            # préfixe : d'autant mieux noté qu'il couvre une grande part du mot
+            matches[token] = 1.0 if token == term else 0.5 + 0.4 * len(term) / len(token)
+        if fuzzy:
+            grams = trigrams(term)
+            shared = Counter(token for gram in grams for token in self._trigram_tokens.get(gram, ()))
+            for token, count in shared.items():
+                if token not in matches:
+                    similarity = count / (len(grams) + self._trigram_counts[token] - count)
+                    if similarity >= self.min_similarity:
+                        matches[token] = 0.7 * similarity
+        return matches
+
+
+_search_index: Optional[SearchIndex] = None
+_search_lock = threading.Lock()
+
+
+def get_search_index(refresh: bool = False) -> SearchIndex:
+    """Renvoie l'index de recherche partagé, construit depuis la BD au premier appel
+    (ou si refresh) puis tenu à jour par les événements des DAO."""
+    global _search_index
+    with _search_lock:
+        if _search_index is None or refresh:
+            if _search_index is not None:
+                dao_events.unsubscribe(_search_index.apply)
+            index = SearchIndex()
+            # abonné avant le chargement : les écritures concurrentes sont reportées à sa fin
+            dao_events.subscribe(index.apply)
+            try:
+                _search_index = index.load()
+            except Exception:
+                dao_events.unsubscribe(index.apply)
+                _search_index = None
+                raise
+        return _search_index
+
+
+def reset_search_index() -> None:
+    """Oublie l'index partagé (qui n'est plus tenu à jour) : il sera reconstruit au prochain accès."""
+    global _search_index
+    with _search_lock:
+        if _search_index is not None:
+            dao_events.unsubscribe(_search_index.apply)
+        _search_index = None
@@ -1,98 +1,161 @@
+from ecole.daos.cache import cached_read, cached_read_many, invalidates
 from ecole.daos.dao import Dao
+from ecole.daos.events import publishes
+from ecole.daos.unit_of_work import deferred_create
+from ecole.daos.page import Page
 from ecole.models.address import Address
+from ecole.models.summaries import AddressSummary
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Any, ClassVar, Dict, Iterable, Iterator, Optional, List, Tuple
 
 
 # noinspection PyTypeChecker
 @dataclass
 class AddressDao(Dao[Address]):
+    # tris possibles pour la pagination : colonnes de la clé, terminée par la clé primaire
+    PAGE_ORDERS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        'id': ('a.id_address',),
+        'city': ('a.city', 'a.id_address'),
+    }
+    ENTITY: ClassVar[str] = 'address'
+
+    @deferred_create
+    @publishes('created')
     def create(self, address: Address) -> int:
         """Crée en BD l'entité Address correspondant à l'adresse donnée
         :param address: Address en BD
         :return: l'id insérée en BD (0 si la création a échoué)
         """
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "INSERT INTO address (street,city, postal_code) VALUES (%s, %s, %s)"
                 cursor.execute(sql, (address.street, address.city, address.postal_code))
-                Dao.connection.commit()
+                connection.commit()
                 new_id = cursor.lastrowid
                 address.id = new_id
                 return new_id
         except Exception as e:
             print(f"Erreur lors de la création de l'adresse: {e}")
-            Dao.connection.rollback()
             return 0
 
+    def _insert_rows(self, cursor: Any, addresses: List[Address]) -> List[int]:
+        """Insère les adresses par un INSERT multi-lignes et renseigne leur id"""
+        ids = self._insert_values(cursor, "INSERT INTO address (street, city, postal_code) VALUES",
+                                  [(a.street, a.city, a.postal_code) for a in addresses])
+        for address, new_id in zip(addresses, ids):
+            address.id = new_id
+        return [address.id for address in addresses]
+
+    @cached_read
     def read(self, id_address: int) -> Optional[Address]:
         """Renvoie le cours correspondant à l'entité dont l'id est id_course
            (ou None s'il n'a pu être trouvé)"""
         address: Optional[Address]
 
-        with Dao.connection.cursor() as cursor:
+        with Dao.connection() as connection, connection.cursor() as cursor:
             sql = "SELECT * FROM address a WHERE a.id_address=%s"
             cursor.execute(sql, (id_address,))
             record = cursor.fetchone()
         if record is not None:
-            address = Address(record['street'], record['city'], record['postal_code'])
-            address.id = record['id_address']
+            address = AddressDao._from_record(record)
         else:
             address = None
 
         return address
 
+    @cached_read_many
+    def read_many(self, ids: Iterable[int]) -> List[Optional[Address]]:
+        """Renvoie les adresses d'ids donnés, lus par requêtes IN (...) groupées
+        :param ids: ids recherchés
+        :return: les adresses, dans l'ordre de ids (None pour un id introuvable)
+        """
+        return Dao._read_many("SELECT * FROM address a", "a.id_address", AddressDao._from_record, list(ids))
+
     @staticmethod
     def read_all() -> List[Address]:
         """Renvoie toutes les adresses"""
         addresses: List[Address] = []
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "SELECT * FROM address"
                 cursor.execute(sql)
                 records = cursor.fetchall()
 
             for record in records:
-                address = Address(record['street'], record['city'], record['postal_code'])
-                address.id = record['id_address']
-
-                addresses.append(address)
+                addresses.append(AddressDao._from_record(record))
 
         except Exception as e:
             print(f"Erreur lors de la lecture des adresses: {e}")
 
         return addresses
 
+    @staticmethod
+    def iter_all(batch_size: int = 1000) -> Iterator[Address]:
+        """Parcourt toutes les adresses par paquets de batch_size lignes,
+        via un curseur côté serveur (mémoire constante)"""
+        try:
+            for records in Dao._iter_records("SELECT * FROM address", batch_size=batch_size):
+                yield from map(AddressDao._from_record, records)
+        except Exception as e:
+            print(f"Erreur lors de la lecture des adresses: {e}")
+
+    @staticmethod
+    def read_page(limit: int = 50, token: Optional[str] = None, order_by: str = 'id') -> Page[Address]:
+        """Renvoie une page d'adresses, par pagination sur clé
+        :param limit: nombre maximal d'adresses de la page
+        :param token: jeton next_token de la page précédente (None pour la première)
+        :param order_by: 'id' ou 'city'
+        """
+        return Dao._read_page('address', "SELECT * FROM address a", AddressDao.PAGE_ORDERS,
+                              AddressDao._from_record, limit, token, order_by)
+
+    @staticmethod
+    def iter_summaries(batch_size: int = 1000) -> Iterator[AddressSummary]:
+        """Parcourt les adresses sous forme de résumés (rue, ville et code postal) : seules ces colonnes
+        sont lues, en tuples, via un curseur côté serveur (mémoire constante)"""
+        sql = "SELECT street, city, postal_code FROM address"
+        for rows in Dao._iter_records(sql, batch_size=batch_size, as_tuples=True):
+            yield from map(AddressSummary._make, rows)
+
+    @staticmethod
+    def _from_record(record: dict) -> Address:
+        """Construit l'adresse correspondant à une ligne de la table address"""
+        address = Address(record['street'], record['city'], record['postal_code'])
+        address.id = record['id_address']
+        return address
+
+    @invalidates(lambda address: address.id)
+    @publishes('updated')
     def update(self, address: Address) -> bool:
         """Met à jour en BD l'entité Address correspondant à l'adresse donnée
         :param address: Adresse déjà mise à jour en mémoire
         :return: True si la mise à jour a pu être réalisée sinon False
         """
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "UPDATE address SET street=%s, city=%s, postal_code=%s WHERE id_address=%s"
                 cursor.execute(sql, (address.street, address.city, address.postal_code, address.id))
-                Dao.connection.commit()
+                connection.commit()
                 return cursor.rowcount > 0
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour de l'adresse: {e}")
-            Dao.connection.rollback()
             return False
 
+    @invalidates(lambda address: address.id, forget=True)
+    @publishes('deleted')
     def delete(self, address: Address) -> bool:
         """Supprime en BD l'entité Address correspondant à l'adresse donnée
         :param address: Adresse à supprimer
         :return: True si la suppression a pu être réalisée sinon False
         """
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "DELETE FROM address WHERE id_address=%s"
                 cursor.execute(sql, (address.id,))
-                Dao.connection.commit()
+                connection.commit()
                 return cursor.rowcount > 0
 
         except Exception as e:
             print(f"Erreur lors de la suppression de l'adresses: {e}")
-            Dao.connection.rollback()
             return False
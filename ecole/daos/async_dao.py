@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe AsyncDao[T], pendant asynchrone de Dao[T], et ses déclinaisons par entité
+"""
+
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+from ecole.daos.address_dao import AddressDao
+from ecole.daos.bulk import BulkResult
+from ecole.daos.course_dao import CourseDao
+from ecole.daos.dao import Dao
+from ecole.daos.page import Page
+from ecole.daos.student_dao import StudentDao
+from ecole.daos.teacher_dao import TeacherDao
+from ecole.daos.unit_of_work import current_unit_of_work
+from ecole.models.address import Address
+from ecole.models.course import Course
+from ecole.models.student import Student
+from ecole.models.teacher import Teacher
+
+
+async def run_in_thread[R](func: Callable[..., R], *args: Any) -> R:
+    """Exécute func(*args) dans un thread, sans bloquer la boucle d'événements ; le
+    contexte (unité de travail, session, appel instrumenté) y est propagé. Dans une
+    unité de travail, toutes les opérations passent par sa connexion : celles lancées
+    simultanément (ex. par gather) sont alors exécutées une à une."""
+    unit = current_unit_of_work()
+    if unit is None:
+        return await asyncio.to_thread(func, *args)
+
+    def exclusive() -> R:
+        with unit.exclusive():
+            return func(*args)
+    return await asyncio.to_thread(exclusive)
+
+
+@dataclass
+class AsyncDao[T]:
+    """Version asynchrone d'un DAO : chaque opération du DAO synchrone dao est exécutée
+    dans un thread, sans bloquer la boucle d'événements. Pool de connexions, cache de
+    lecture et table d'identité de session (le contexte est propagé) sont ainsi ceux
+    du DAO synchrone ; dans une unité de travail, les opérations sont sérialisées
+    (cf. run_in_thread)."""
+    dao: Dao[T]
+
+    async def create(self, obj: T) -> int:
+        """Crée l'entité en BD correspondant à l'objet obj (cf. Dao.create)"""
+        return await run_in_thread(self.dao.create, obj)
+
+    async def create_many(self, objs: list[T]) -> BulkResult:
+        """Crée en masse les entités correspondant à objs (cf. Dao.create_many)"""
+        return await run_in_thread(self.dao.create_many, objs)
+
+    async def read(self, id_entity: int) -> Optional[T]:
+        """Renvoie l'objet dont l'id est id_entity (ou None)"""
+        return await run_in_thread(self.dao.read, id_entity)
+
+    async def read_many(self, ids: Iterable[int]) -> list[Optional[T]]:
+        """Renvoie les objets d'ids donnés, dans l'ordre (None si introuvable)"""
+        return await run_in_thread(self.dao.read_many, list(ids))
+
+    async def read_page(self, limit: int = 50, token: Optional[str] = None,
+                        order_by: str = 'id') -> Page[T]:
+        """Renvoie une page de la liste des entités (cf. Dao._read_page)"""
+        return await run_in_thread(self.dao.read_page, limit, token, order_by)
+
+    async def iter_all(self, batch_size: int = 1000) -> AsyncIterator[T]:
+        """Parcourt toutes les entités, un paquet de batch_size étant lu par thread."""
+        iterator = self.dao.iter_all(batch_size)
+        try:
+            while batch := await run_in_thread(list, itertools.islice(iterator, batch_size)):
+                for obj in batch:
+                    yield obj
+        finally:
+            await run_in_thread(iterator.close)
+
+    async def read_all(self) -> list[T]:
+        """Renvoie toutes les entités"""
+        return await run_in_thread(self.dao.read_all)
+
+    async def update(self, obj: T) -> bool:
+        """Met à jour en BD l'entité correspondant à obj"""
+        return await run_in_thread(self.dao.update, obj)
+
+    async def delete(self, obj: T) -> bool:
+        """Supprime en BD l'entité correspondant à obj"""
+        return await run_in_thread(self.dao.delete, obj)
+
+
+@dataclass
+class AsyncCourseDao(AsyncDao[Course]):
+    dao: CourseDao = field(default_factory=CourseDao)
+
+    async def read_all_with_teacher(self) -> list[Course]:
+        """Renvoie tous les cours avec leur enseignant associé"""
+        return await run_in_thread(self.dao.read_all_with_teacher)
+
+
+@dataclass
+class AsyncStudentDao(AsyncDao[Student]):
+    dao: StudentDao = field(default_factory=StudentDao)
+
+
+@dataclass
+class AsyncTeacherDao(AsyncDao[Teacher]):
+    dao: TeacherDao = field(default_factory=TeacherDao)
+
+
+@dataclass
+class AsyncAddressDao(AsyncDao[Address]):
+    dao: AddressDao = field(default_factory=AddressDao)
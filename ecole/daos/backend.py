@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Moteurs de BD sur lesquels fonctionnent les DAO :
+- Backend      : interface commune (ouverture des connexions, choix des curseurs)
+- MySqlBackend : serveur MySQL, via pymysql
+- SqliteBackend (module sqlite_backend) : BD SQLite embarquée
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any
+
+from ecole.daos.config import DbConfig
+
+
+class Backend(ABC):
+    """Moteur de BD : fournit les connexions du pool, qui suivent l'API de pymysql
+    (cursor(), commit(), rollback(), close(), lignes sous forme de dict)."""
+
+    @abstractmethod
+    def connect(self) -> Any:
+        """Ouvre une nouvelle connexion."""
+        ...
+
+    @abstractmethod
+    def cursor_class(self, as_tuples: bool, unbuffered: bool) -> Any:
+        """Argument de connection.cursor() pour un curseur renvoyant des tuples
+        (sinon des dict), non bufferisé si possible quand unbuffered."""
+        ...
+
+    @abstractmethod
+    def begin_snapshot(self, connection: Any) -> None:
+        """Ouvre sur connection une transaction en lecture seule, dont toutes les
+        requêtes voient la BD telle qu'à la première d'entre elles."""
+        ...
+
+    def id_increment(self, cursor: Any) -> int:
+        """Écart entre deux ids auto-incrémentés consécutifs (1 par défaut)."""
+        return 1
+
+    def close(self) -> None:
+        """Libère les ressources propres au moteur (aucune par défaut)."""
+        pass
+
+
+@dataclass
+class MySqlBackend(Backend):
+    config: DbConfig
+
+    def connect(self) -> Any:
+        return self.config.connect()
+
+    def cursor_class(self, as_tuples: bool, unbuffered: bool) -> Any:
+        import pymysql.cursors
+
+        if unbuffered:
+            return pymysql.cursors.SSCursor if as_tuples else pymysql.cursors.SSDictCursor
+        return pymysql.cursors.Cursor if as_tuples else pymysql.cursors.DictCursor
+
+    def begin_snapshot(self, connection: Any) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY")
+
+    def id_increment(self, cursor: Any) -> int:
+        cursor.execute("SELECT @@auto_increment_increment AS step")
+        record = cursor.fetchone()
+        return int(record['step'] if isinstance(record, dict) else record[0])
+
+
+def create_backend(config: DbConfig) -> Backend:
+    """Instancie le moteur config.backend ('mysql' ou 'sqlite')."""
+    if config.backend == 'mysql':
+        return MySqlBackend(config)
+    if config.backend == 'sqlite':
+        from ecole.daos.sqlite_backend import SqliteBackend
+
+        return SqliteBackend(config)
+    raise ValueError(f"Moteur de BD inconnu: {config.backend} (possibles: mysql, sqlite)")
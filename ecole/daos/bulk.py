@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe BulkResult : compte-rendu d'une création en masse (Dao.create_many)
+"""
+
+from dataclasses import dataclass, field
+
+
+@dataclass
+class BulkResult:
+    """Résultat d'une création en masse :
+    - ids    : id attribué à chaque ligne, dans l'ordre d'entrée (0 si la ligne a échoué)
+    - errors : message d'erreur de chaque ligne en échec, indexé par sa position
+    """
+    ids: list[int] = field(default_factory=list)
+    errors: dict[int, str] = field(default_factory=dict)
+
+    @property
+    def created(self) -> int:
+        """Nombre de lignes effectivement créées."""
+        return len(self.ids) - len(self.errors)
+
+    def fail(self, index: int, message: str) -> None:
+        """Marque la ligne index comme en échec."""
+        self.ids[index] = 0
+        self.errors[index] = message
+
+    def __str__(self) -> str:
+        result = f"{self.created} ligne(s) créée(s), {len(self.errors)} échec(s)"
+        for index, message in sorted(self.errors.items()):
+            result += f"\n- ligne {index}: {message}"
+        return result
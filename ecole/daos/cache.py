@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+Cache de lecture des DAO :
+- ReadCache   : cache LRU à durée de vie, partagé par tout le processus
+- IdentityMap : table d'identité propre à une session (une instance par entité)
+- cached_read / cached_read_many / invalidates : décorateurs placés sur
+  read(), read_many() et update()/delete()
+- unit_reads  : lectures d'une unité de travail, hors du cache partagé
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable, Iterable, Iterator, Optional
+
+
+@dataclass
+class ReadCache:
+    """Cache LRU des entités lues en BD :
+    - max_size : nombre maximal d'entités conservées (0 désactive le cache)
+    - ttl      : durée de vie (s) d'une entité en cache
+    - hits / misses / evictions : compteurs permettant de dimensionner le cache
+    """
+    max_size: int = 10_000
+    ttl: float = 60.0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    _entries: OrderedDict = field(default_factory=OrderedDict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def configure(self, max_size: int, ttl: float) -> None:
+        """Redimensionne le cache, qui est vidé."""
+        with self._lock:
+            self.max_size = max_size
+            self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Renvoie (True, entité) si key est en cache et non expirée, (False, None) sinon."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Met en cache value sous la clé key, en évinçant la moins récemment utilisée."""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Retire key du cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Vide le cache et remet ses compteurs à zéro."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Compteurs du cache."""
+        lookups = self.hits + self.misses
+        return {'size': len(self._entries), 'max_size': self.max_size, 'ttl': self.ttl,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0}
+
+
+@dataclass
+class IdentityMap:
+    """Table d'identité d'une session : pendant celle-ci, lire deux fois la même
+    entité renvoie la même instance, sans nouvelle requête."""
+    hits: int = 0
+    misses: int = 0
+    _objects: dict = field(default_factory=dict, init=False, repr=False)
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        if key in self._objects:
+            self.hits += 1
+            return True, self._objects[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._objects[key] = value
+
+    def discard(self, key: Hashable) -> None:
+        self._objects.pop(key, None)
+
+
+# cache partagé par tous les DAO du processus
+read_cache: ReadCache = ReadCache()
+
+# table d'identité de la session en cours (propre au thread / à la tâche asyncio)
+_identity_map: ContextVar[Optional[IdentityMap]] = ContextVar('identity_map', default=None)
+
+
+# entités écrites par l'unité de travail en cours (None hors unité) : les lectures de
+# l'unité peuvent voir ses écritures non validées, et ne passent donc pas par le cache
+_unit_writes: ContextVar[Optional[set]] = ContextVar('unit_writes', default=None)
+
+
+@contextmanager
+def unit_reads() -> Iterator[None]:
+    """Le temps d'une unité de travail, les lectures n'utilisent que la table d'identité
+    de la session : le cache partagé n'est ni consulté ni alimenté. À la fin de l'unité,
+    les entités qu'elle a écrites sont retirées du cache, d'autres threads ayant pu y
+    remettre leur ancienne valeur avant la validation."""
+    written: set = set()
+    token = _unit_writes.set(written)
+    try:
+        yield
+    finally:
+        _unit_writes.reset(token)
+        for key in written:
+            read_cache.invalidate(key)
+
+
+@contextmanager
+def session() -> Iterator[IdentityMap]:
+    """Ouvre une session dotée de sa propre table d'identité."""
+    token = _identity_map.set(IdentityMap())
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
+
+
+def cached_read(method: Callable) -> Callable:
+    """Décore la méthode read(id) d'un DAO : consulte la table d'identité de la session
+    puis le cache du processus (hors unité de travail) avant d'interroger la BD. Le cache
+    conserve sa propre copie de l'entité, pour que les modifications en mémoire ne le
+    corrompent pas."""
+    @functools.wraps(method)
+    def read(self, id_entity: int):
+        key = (type(self).__name__, id_entity)
+        identity_map = _identity_map.get()
+        if identity_map is not None:
+            found, obj = identity_map.get(key)
+            if found:
+                return obj
+        shared = _unit_writes.get() is None
+        found, cached = read_cache.get(key) if shared else (False, None)
+        if found:
+            obj = copy.deepcopy(cached)
+        else:
+            obj = method(self, id_entity)
+            if obj is not None and shared:
+                read_cache.put(key, copy.deepcopy(obj))
+        if obj is not None and identity_map is not None:
+            identity_map.put(key, obj)
+        return obj
+    return read
+
+
+def cached_read_many(method: Callable) -> Callable:
+    """Décore la méthode read_many(ids) d'un DAO : seuls les ids absents de la table
+    d'identité et du cache (hors unité de travail) sont transmis à la méthode décorée,
+    dont les résultats alimentent ensuite le cache."""
+    @functools.wraps(method)
+    def read_many(self, ids: Iterable[int]):
+        ids = list(ids)
+        name = type(self).__name__
+        identity_map = _identity_map.get()
+        shared = _unit_writes.get() is None
+        found: dict[int, Any] = {}
+        missing: list[int] = []
+        for id_entity in dict.fromkeys(ids):
+            key = (name, id_entity)
+            if identity_map is not None:
+                hit, obj = identity_map.get(key)
+                if hit:
+                    found[id_entity] = obj
+                    continue
+            hit, cached = read_cache.get(key) if shared else (False, None)
+            if hit:
+                found[id_entity] = copy.deepcopy(cached)
+            else:
+                missing.append(id_entity)
+        if missing:
+            for id_entity, obj in zip(missing, method(self, missing)):
+                if obj is not None:
+                    if shared:
+                        read_cache.put((name, id_entity), copy.deepcopy(obj))
+                    found[id_entity] = obj
+        if identity_map is not None:
+            for id_entity, obj in found.items():
+                identity_map.put((name, id_entity), obj)
+        return [found.get(id_entity) for id_entity in ids]
+    return read_many
+
+
+def invalidates(key: Callable[[Any], int], forget: bool = False) -> Callable:
+    """Décore une méthode d'écriture update(obj)/delete(obj) d'un DAO : l'entité
+    est retirée du cache du processus (à nouveau à la fin de l'unité de travail en
+    cours, s'il y en a une) et de la table d'identité si forget."""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def write(self, obj):
+            try:
+                return method(self, obj)
+            finally:
+                cache_key = (type(self).__name__, key(obj))
+                read_cache.invalidate(cache_key)
+                written = _unit_writes.get()
+                if written is not None:
+                    written.add(cache_key)
+                identity_map = _identity_map.get()
+                if forget and identity_map is not None:
+                    identity_map.discard(cache_key)
+        return write
+    return decorator
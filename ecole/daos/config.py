@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe DbConfig : paramètres de connexion à la BD, lus dans l'environnement
+"""
+
+import os
+from dataclasses import dataclass, fields
+from typing import Any, Mapping
+
+
+@dataclass(frozen=True)
+class DbConfig:
+    """Configuration de l'accès à la BD, du pool de connexions et du cache de lecture.
+    Chaque paramètre peut être fourni par une variable d'environnement ECOLE_DB_<NOM>
+    (ex. ECOLE_DB_HOST, ECOLE_DB_PASSWORD, ECOLE_DB_POOL_MAX_SIZE).
+    - backend         : 'mysql' (serveur MySQL) ou 'sqlite' (BD embarquée)
+    - sqlite_path     : fichier de la BD SQLite (':memory:' pour une BD temporaire, supprimée à la fermeture)
+    - sqlite_snapshot : au démarrage, recopier dans la BD SQLite le contenu de la BD MySQL
+    - sequence_block_size : n° d'élève réservés en BD à la fois (cf. ecole.daos.sequence)
+    - summary_tables  : tenir à jour les tables de synthèse des agrégats (cf. ecole.business.aggregates)
+    """
+    backend: str = 'mysql'
+    host: str = 'localhost'
+    port: int = 3306
+    user: str = 'ecole'
+    password: str = ''
+    database: str = 'ecole'
+    connect_timeout: int = 10
+    pool_min_size: int = 1
+    pool_max_size: int = 10
+    pool_max_idle: float = 300.0
+    pool_timeout: float = 10.0
+    cache_max_size: int = 10_000
+    cache_ttl: float = 60.0
+    sqlite_path: str = ':memory:'
+    sqlite_snapshot: bool = False
+    sequence_block_size: int = 100
+    summary_tables: bool = False
+
+    @classmethod
+    def from_env(cls, environ: Mapping[str, str] = os.environ) -> 'DbConfig':
+        """Construit la configuration à partir des variables d'environnement ECOLE_DB_*,
+        les valeurs par défaut s'appliquant aux variables absentes."""
+        values: dict[str, Any] = {}
+        for f in fields(cls):
+            raw = environ.get(f"ECOLE_DB_{f.name.upper()}")
+            if raw is not None:
+                # le type par défaut du champ sert à convertir la valeur lue
+                if isinstance(f.default, bool):
+                    values[f.name] = raw.strip().lower() in ('1', 'true', 'yes', 'oui')
+                else:
+                    values[f.name] = type(f.default)(raw)
+        return cls(**values)
+
+    def connect(self, **options: Any) -> Any:
+        """Ouvre une nouvelle connexion pymysql (importé uniquement à ce moment-là)
+        au serveur MySQL, quel que soit le moteur choisi (cf. sqlite_snapshot) ;
+        options : paramètres supplémentaires de pymysql.connect (ex. local_infile)."""
+        import pymysql.cursors
+
+        return pymysql.connect(host=self.host,
+                               port=self.port,
+                               user=self.user,
+                               password=self.password,
+                               database=self.database,
+                               connect_timeout=self.connect_timeout,
+                               cursorclass=pymysql.cursors.DictCursor,
+                               **options)
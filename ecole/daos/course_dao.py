@@ -6,19 +6,37 @@ Classe Dao[Course]
 from types import new_class
 
 from ecole.models.course import Course
+from ecole.models.summaries import CourseSummary
+from ecole.daos.cache import cached_read, cached_read_many, invalidates
 from ecole.daos.dao import Dao
+from ecole.daos.events import publishes
+from ecole.daos.unit_of_work import deferred_create
+from ecole.daos.page import Page
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Any, ClassVar, Dict, Iterable, Iterator, Optional, List, Tuple
 
 
 @dataclass
 class CourseDao(Dao[Course]):
+    # tris possibles pour la pagination : colonnes de la clé, terminée par la clé primaire
+    PAGE_ORDERS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        'id': ('c.id_course',),
+        'name': ('c.name', 'c.id_course'),
+        'start_date': ('c.start_date', 'c.id_course'),
+    }
+    # créés après les enseignants dans une unité de travail, dont ils peuvent référencer l'id provisoire
+    FLUSH_RANK: ClassVar[int] = 2
+    PENDING_REFERENCES: ClassVar[Tuple[str, ...]] = ('id_teacher',)
+    ENTITY: ClassVar[str] = 'course'
+
+    @deferred_create
+    @publishes('created')
     def create(self, course: Course) -> int:
         """Crée en BD l'entité Course correspondant au cours course
         :param course: à créer sous forme d'entité Course en BD
         :return: l'id de l'entité insérée en BD, retourneras un message si erreur """
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
 
                 sql_check_teacher = "SElECT id_teacher from teacher WHERE id_teacher=%s"
                 cursor.execute(sql_check_teacher,(course.id_teacher,))
@@ -30,7 +48,7 @@ class CourseDao(Dao[Course]):
 
                 sql_course = "INSERT INTO course (name, start_date, end_date, id_teacher) VALUES (%s, %s, %s, %s)"
                 cursor.execute(sql_course, (course.name,course.start_date,course.end_date,course.id_teacher))
-                Dao.connection.commit()
+                connection.commit()
 
                 new_id = cursor.lastrowid
                 course.id = new_id
@@ -38,46 +56,122 @@ class CourseDao(Dao[Course]):
 
         except Exception as e:
             print(f"Erreur lors de la création du cours: {e}")
-            Dao.connection.rollback()
             return 0
 
+    def _reject_rows(self, cursor: Any, rows: List[Tuple[int, Course]]) -> Dict[int, str]:
+        """Écarte les cours dont le professeur n'existe pas (une requête par lot)"""
+        teacher_ids = list({course.id_teacher for _, course in rows if course.id_teacher is not None})
+        known: set = set()
+        for start in range(0, len(teacher_ids), 1000):
+            chunk = teacher_ids[start:start + 1000]
+            sql = f"SELECT id_teacher FROM teacher WHERE id_teacher IN ({', '.join(['%s'] * len(chunk))})"
+            cursor.execute(sql, chunk)
+            known.update(record['id_teacher'] for record in cursor.fetchall())
+        return {index: f"Aucun professeur trouvé avec l'id: {course.id_teacher}"
+                for index, course in rows if course.id_teacher not in known}
+
+    def _insert_rows(self, cursor: Any, courses: List[Course]) -> List[int]:
+        """Insère les cours par un INSERT multi-lignes et renseigne leur id"""
+        ids = self._insert_values(cursor, "INSERT INTO course (name, start_date, end_date, id_teacher) VALUES",
+                                  [(c.name, c.start_date, c.end_date, c.id_teacher) for c in courses])
+        for course, new_id in zip(courses, ids):
+            course.id = new_id
+        return [course.id for course in courses]
+
+    @cached_read
     def read(self, id_course: int) -> Optional[Course]:
         """Renvoit le cours correspondant à l'entité dont l'id est id_course
            (ou None s'il n'a pu être trouvé)"""
         course: Optional[Course]
         
-        with Dao.connection.cursor() as cursor:
+        with Dao.connection() as connection, connection.cursor() as cursor:
             sql = "SELECT * FROM course WHERE id_course=%s"
             cursor.execute(sql, (id_course,))
             record = cursor.fetchone()
         if record is not None:
-            course = Course(record['name'], record['start_date'], record['end_date'])
-            course.id = record['id_course']
+            course = CourseDao._from_record(record)
         else:
             course = None
 
         return course
 
+    @cached_read_many
+    def read_many(self, ids: Iterable[int]) -> List[Optional[Course]]:
+        """Renvoie les cours d'ids donnés, lus par requêtes IN (...) groupées
+        :param ids: ids recherchés
+        :return: les cours, dans l'ordre de ids (None pour un id introuvable)
+        """
+        return Dao._read_many("SELECT * FROM course c", "c.id_course", CourseDao._from_record, list(ids))
+
     @staticmethod
     def read_all() -> List[Course]:
         courses: List[Course] = []
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "SELECT * FROM course"
                 cursor.execute(sql)
                 records = cursor.fetchall()
 
             for record in records:
-                course = Course(record['name'], record['start_date'], record['end_date'])
-                course.id = record['id_course']
-
-                courses.append(course)
+                courses.append(CourseDao._from_record(record))
 
         except Exception as e:
             print(f"Erreur lors de la lecture des cours: {e}")
 
         return courses
 
+    @staticmethod
+    def iter_all(batch_size: int = 1000) -> Iterator[Course]:
+        """
+        Parcourt tous les cours par paquets de batch_size lignes, via un curseur
+        côté serveur : la mémoire utilisée ne dépend pas du nombre de cours.
+
+        :return: générateur d'objets Course
+        """
+        try:
+            for records in Dao._iter_records("SELECT * FROM course", batch_size=batch_size):
+                yield from map(CourseDao._from_record, records)
+        except Exception as e:
+            print(f"Erreur lors de la lecture des cours: {e}")
+
+    @staticmethod
+    def read_page(limit: int = 50, token: Optional[str] = None, order_by: str = 'id',
+                  with_teacher: bool = False) -> Page[Course]:
+        """
+        Renvoie une page de cours, par pagination sur clé
+
+        :param limit: nombre maximal de cours de la page
+        :param token: jeton next_token de la page précédente (None pour la première)
+        :param order_by: 'id', 'name' ou 'start_date'
+        :param with_teacher: ne renvoie que les cours dont l'enseignant existe,
+                             comme read_all_with_teacher
+        :return: la page, avec le jeton de la page suivante
+        """
+        if with_teacher:
+            select = ("SELECT c.id_course, c.name, c.start_date, c.end_date, c.id_teacher"
+                      " FROM course c"
+                      " JOIN teacher t ON c.id_teacher = t.id_teacher"
+                      " JOIN person p ON t.id_person = p.id_person")
+        else:
+            select = "SELECT * FROM course c"
+        return Dao._read_page('course_teacher' if with_teacher else 'course', select,
+                              CourseDao.PAGE_ORDERS, CourseDao._from_record, limit, token, order_by)
+
+    @staticmethod
+    def iter_summaries(batch_size: int = 1000) -> Iterator[CourseSummary]:
+        """Parcourt les cours sous forme de résumés (id, nom et dates) : seules ces colonnes
+        sont lues, en tuples, via un curseur côté serveur (mémoire constante)"""
+        sql = "SELECT id_course, name, start_date, end_date FROM course"
+        for rows in Dao._iter_records(sql, batch_size=batch_size, as_tuples=True):
+            yield from map(CourseSummary._make, rows)
+
+    @staticmethod
+    def _from_record(record: dict) -> Course:
+        """Construit le cours correspondant à une ligne de la table course"""
+        course = Course(record['name'], record['start_date'], record['end_date'], record['id_teacher'])
+        course.id = record['id_course']
+        return course
+
     @staticmethod
     def read_all_with_teacher() -> List[Course]:
         """
@@ -87,7 +181,7 @@ class CourseDao(Dao[Course]):
         """
         courses: List[Course] = []
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = """
                     SELECT c.id_course, c.name, c.start_date, c.end_date, c.id_teacher,
                            t.id_teacher, t.hiring_date, p.first_name, p.last_name
@@ -119,6 +213,8 @@ class CourseDao(Dao[Course]):
 
         return courses
 
+    @invalidates(lambda course: course.id)
+    @publishes('updated')
     def update(self, course: Course) -> bool:
         """Met à jour en BD l'entité Course correspondant à course, pour y correspondre
 
@@ -126,15 +222,18 @@ class CourseDao(Dao[Course]):
         :return: True si la mise à jour a pu être réalisée
         """
         try:
-            with Dao.connection.cursor() as cursor:
-                sql = "UPDATE course SET name=%s, start_date=%s, end_date=%s WHERE id=%s"
-                cursor.execute(sql, (course.name, course.start_date, course.end_date, course.id))
-                Dao.connection.commit()
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                sql = "UPDATE course SET name=%s, start_date=%s, end_date=%s, id_teacher=%s WHERE id_course=%s"
+                cursor.execute(sql, (course.name, course.start_date, course.end_date, course.id_teacher, course.id))
+                connection.commit()
                 return cursor.rowcount > 0
 
         except Exception as e:
             print(f"Le cours n'as pas pu être mis à jour: {e}")
+            return False
 
+    @invalidates(lambda course: course.id, forget=True)
+    @publishes('deleted')
     def delete(self, course: Course) -> bool:
         """Supprime en BD l'entité Course correspondant à course
 
@@ -142,14 +241,13 @@ class CourseDao(Dao[Course]):
         :return: True si la suppression a pu être réalisée
         """
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "DELETE FROM course WHERE id_course=%s"
                 cursor.execute(sql, (course.id,))
-                Dao.connection.commit()
+                connection.commit()
                 return  cursor.rowcount > 0
 
         except Exception as e:
             print(f"Erreur lors de la suppression du cours: {e}")
-            Dao.connection.rollback()
             return False
 
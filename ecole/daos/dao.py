@@ -4,20 +4,189 @@
 Classe abstraite générique Dao[T], dont hérite les classes de DAO de chaque entité
 """
 
+import threading
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
-from typing import ClassVar, Optional
-import pymysql.cursors
+from typing import Any, Callable, ClassVar, Iterator, Optional
+
+from ecole.daos.backend import Backend, create_backend
+from ecole.daos.bulk import BulkResult
+from ecole.daos.cache import read_cache
+from ecole.daos.config import DbConfig
+from ecole.daos.events import publish
+from ecole.daos.instrumentation import instrument_connect
+from ecole.daos.page import Page, decode_token, encode_token
+from ecole.daos.pool import ConnectionPool
+from ecole.daos.sequence import student_numbers
+from ecole.daos.unit_of_work import UnitOfWork, current_unit_of_work, transaction
 
 
 @dataclass
 class Dao[T](ABC):
-    connection: ClassVar[pymysql.Connection] = \
-        pymysql.connect(host='localhost',
-                        user='ecole',
-                        password='Louvre',
-                        database='ecole',
-                        cursorclass=pymysql.cursors.DictCursor)
+    # configuration de l'accès à la BD (lue dans l'environnement si non fournie)
+    config: ClassVar[Optional[DbConfig]] = None
+    # pool de connexions partagé, créé paresseusement lors de la première requête :
+    # chaque opération emprunte sa propre connexion et la restitue à la fin de celle-ci
+    _pool: ClassVar[Optional[ConnectionPool]] = None
+    # moteur de BD (MySQL ou SQLite) fournissant les connexions du pool
+    _backend: ClassVar[Optional[Backend]] = None
+    _pool_lock: ClassVar[threading.Lock] = threading.Lock()
+    # écart entre deux ids auto-incrémentés (@@auto_increment_increment), lu avec le pool
+    _auto_increment: ClassVar[Optional[int]] = None
+    # rang d'écriture des créations en attente d'une unité de travail (dépendances d'abord)
+    FLUSH_RANK: ClassVar[int] = 0
+    # attributs pouvant contenir l'id provisoire d'une entité créée dans la même unité
+    PENDING_REFERENCES: ClassVar[tuple[str, ...]] = ()
+    # nom de l'entité dans les événements publiés par le DAO (cf. ecole.daos.events)
+    ENTITY: ClassVar[str] = ''
+
+    @staticmethod
+    def configure(config: DbConfig) -> None:
+        """Remplace la configuration de la BD ; le pool existant est fermé
+        et sera recréé avec cette configuration à la prochaine requête."""
+        with Dao._pool_lock:
+            if Dao._pool is not None:
+                Dao._pool.close()
+            if Dao._backend is not None:
+                Dao._backend.close()
+            Dao.config = config
+            Dao._pool = None
+            Dao._backend = None
+            Dao._auto_increment = None
+            read_cache.configure(config.cache_max_size, config.cache_ttl)
+
+    @staticmethod
+    def get_pool() -> ConnectionPool:
+        """Renvoie le pool de connexions partagé, en le créant au premier appel."""
+        if Dao._pool is None:
+            with Dao._pool_lock:
+                if Dao._pool is None:
+                    if Dao.config is None:
+                        Dao.config = DbConfig.from_env()
+                        read_cache.configure(Dao.config.cache_max_size, Dao.config.cache_ttl)
+                    config = Dao.config
+                    Dao._backend = create_backend(config)
+                    Dao._pool = ConnectionPool(instrument_connect(Dao._backend.connect),
+                                               min_size=config.pool_min_size,
+                                               max_size=config.pool_max_size,
+                                               max_idle=config.pool_max_idle,
+                                               timeout=config.pool_timeout)
+                    student_numbers.configure(Dao._backend, config.sequence_block_size)
+        return Dao._pool
+
+    @staticmethod
+    def get_backend() -> Backend:
+        """Renvoie le moteur de BD, créé avec le pool."""
+        Dao.get_pool()
+        return Dao._backend
+
+    @staticmethod
+    @contextmanager
+    def connection() -> Iterator[Any]:
+        """Emprunte une connexion du pool le temps d'une opération
+        (celle de l'unité de travail en cours, s'il y en a une)."""
+        unit = current_unit_of_work()
+        if unit is not None:
+            with unit.connection() as connection:
+                yield connection
+            return
+        with Dao.get_pool().connection() as connection:
+            yield connection
+
+    @staticmethod
+    def transaction() -> AbstractContextManager[UnitOfWork]:
+        """Ouvre une unité de travail : dans un bloc with Dao.transaction(), toutes les
+        opérations des DAO forment une seule transaction, validée à la fin du bloc."""
+        return transaction(Dao.get_pool())
+
+    @staticmethod
+    @contextmanager
+    def snapshot() -> Iterator[Any]:
+        """Emprunte une connexion du pool, hors de l'unité de travail en cours, dont les
+        lectures forment une seule transaction : elles ne voient que des données validées,
+        toutes telles qu'au moment de la première lecture (instantané cohérent)."""
+        with Dao.get_pool().connection() as connection:
+            Dao.get_backend().begin_snapshot(connection)
+            yield connection
+
+    @staticmethod
+    def _iter_records(sql: str, params: tuple = (), batch_size: int = 1000,
+                      as_tuples: bool = False, connection: Any = None) -> Iterator[list]:
+        """Exécute la requête sql sur un curseur côté serveur (non bufferisé) et renvoie
+        ses lignes par paquets de batch_size, sans jamais charger tout le résultat :
+        la connexion reste empruntée tant que le générateur n'est pas épuisé ou fermé.
+        Les lignes sont des dict, ou des tuples (plus légers) si as_tuples. Dans une unité
+        de travail, dont la connexion est partagée, le curseur est bufferisé. La requête
+        s'exécute sur connection si elle est fournie (ex. celle de Dao.snapshot())."""
+        unbuffered = connection is not None or current_unit_of_work() is None
+        cursor_class = Dao.get_backend().cursor_class(as_tuples, unbuffered=unbuffered)
+        borrowed = nullcontext(connection) if connection is not None else Dao.connection()
+        with borrowed as connection, connection.cursor(cursor_class) as cursor:
+            cursor.execute(sql, params)
+            while records := cursor.fetchmany(batch_size):
+                yield records
+
+    @staticmethod
+    def _read_page(listing: str, select: str, orders: dict[str, tuple[str, ...]],
+                   build: Callable[[dict], T], limit: int, token: Optional[str], order_by: str) -> Page[T]:
+        """Lit une page de la requête select (sans WHERE ni ORDER BY) par pagination sur clé :
+        les lignes sont triées selon les colonnes orders[order_by], terminées par la clé
+        primaire, et la page reprend strictement après la clé contenue dans token. Le coût
+        d'une page ne dépend donc pas de sa profondeur, contrairement à un OFFSET.
+
+        :param listing: nom de la liste, pour refuser les jetons d'une autre liste
+        :param build: construction d'une entité à partir d'une ligne
+        :param limit: nombre maximal d'entités de la page
+        :param token: jeton de la page précédente (None pour la première page)
+        :param order_by: tri parmi les clés de orders
+        """
+        if order_by not in orders:
+            raise ValueError(f"Tri inconnu: {order_by} (possibles: {', '.join(orders)})")
+        if limit < 1:
+            raise ValueError(f"Taille de page invalide: {limit}")
+        columns = orders[order_by]
+        sql, params = select, []
+        if token is not None:
+            key = decode_token(token, listing, order_by)
+            # (c1, c2, ...) > (k1, k2, ...) développé en OR pour rester indexable
+            conditions = []
+            for i, column in enumerate(columns):
+                conditions.append(" AND ".join([f"{c} = %s" for c in columns[:i]] + [f"{column} > %s"]))
+                params += key[:i + 1]
+            sql += " WHERE " + " OR ".join(f"({condition})" for condition in conditions)
+        sql += f" ORDER BY {', '.join(columns)} LIMIT %s"
+        params.append(limit + 1)
+
+        with Dao.connection() as connection, connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            records = cursor.fetchall()
+
+        next_token = None
+        if len(records) > limit:
+            records = records[:limit]
+            next_token = encode_token(listing, order_by,
+                                      [records[-1][column.split('.')[-1]] for column in columns])
+        return Page([build(record) for record in records], next_token)
+
+    @staticmethod
+    def _read_many(select: str, key_column: str, build: Callable[[dict], T],
+                   ids: list[int], chunk_size: int = 500) -> list[Optional[T]]:
+        """Lit les entités d'ids donnés par requêtes select ... WHERE key_column IN (...),
+        par paquets de chunk_size ids, au lieu d'une requête par id
+
+        :return: les entités dans l'ordre de ids, None pour les ids introuvables
+        """
+        unique = list(dict.fromkeys(ids))
+        found: dict[int, T] = {}
+        key = key_column.split('.')[-1]
+        with Dao.connection() as connection, connection.cursor() as cursor:
+            for start in range(0, len(unique), chunk_size):
+                chunk = unique[start:start + chunk_size]
+                cursor.execute(f"{select} WHERE {key_column} IN ({', '.join(['%s'] * len(chunk))})", chunk)
+                for record in cursor.fetchall():
+                    found[record[key]] = build(record)
+        return [found.get(id_entity) for id_entity in ids]
 
     @abstractmethod
     def create(self, obj: T) -> int:
@@ -28,6 +197,111 @@ class Dao[T](ABC):
         """
         ...
 
+    def create_many(self, objs: list[T], chunk_size: int = 1000) -> BulkResult:
+        """Crée en BD les entités correspondant aux objets objs, par INSERT multi-lignes
+        dans une seule transaction ; une ligne en échec n'interrompt pas le lot
+
+        :param objs: objets à créer sous forme d'entités en BD
+        :param chunk_size: nombre maximal de lignes par INSERT
+        :return: les ids insérés dans l'ordre de objs (0 si échec) et les erreurs par ligne
+        """
+        result = BulkResult(ids=[0] * len(objs))
+        rows = list(enumerate(objs))
+        if not rows:
+            return result
+        try:
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                for index, message in self._reject_rows(cursor, rows).items():
+                    result.fail(index, message)
+                rows = [row for row in rows if row[0] not in result.errors]
+                for start in range(0, len(rows), chunk_size):
+                    self._insert_isolated(cursor, rows[start:start + chunk_size], result)
+                connection.commit()
+            self._publish('created', [obj for obj, new_id in zip(objs, result.ids) if new_id])
+        except Exception as e:
+            print(f"Erreur lors de la création en masse: {e}")
+            for index, _ in rows:
+                result.fail(index, str(e))
+        return result
+
+    def _insert_isolated(self, cursor: Any, rows: list[tuple[int, T]], result: BulkResult) -> None:
+        """Insère les lignes rows sous un point de sauvegarde ; en cas d'échec, le lot
+        est coupé en deux et retenté, jusqu'à isoler la ou les lignes fautives."""
+        cursor.execute("SAVEPOINT create_many")
+        try:
+            ids = self._insert_rows(cursor, [obj for _, obj in rows])
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT create_many")
+            if len(rows) == 1:
+                result.fail(rows[0][0], str(e))
+            else:
+                middle = len(rows) // 2
+                self._insert_isolated(cursor, rows[:middle], result)
+                self._insert_isolated(cursor, rows[middle:], result)
+            return
+        cursor.execute("RELEASE SAVEPOINT create_many")
+        for (index, _), new_id in zip(rows, ids):
+            result.ids[index] = new_id
+
+    def _reject_rows(self, cursor: Any, rows: list[tuple[int, T]]) -> dict[int, str]:
+        """Vérifications préalables à une création en masse : renvoie, indexées par
+        leur position, les lignes à écarter avec leur motif (aucune par défaut)."""
+        return {}
+
+    def _publish(self, action: str, objs: list[T]) -> None:
+        """Publie l'écriture validée (ou à valider avec l'unité de travail en cours) de objs."""
+        publish(self.ENTITY, action, objs)
+
+    @abstractmethod
+    def _insert_rows(self, cursor: Any, objs: list[T]) -> list[int]:
+        """Insère les entités correspondant à objs par INSERT multi-lignes,
+        renseigne leur id et renvoie ces ids dans l'ordre de objs."""
+        ...
+
+    @staticmethod
+    def _insert_values(cursor: Any, sql: str, rows: list[tuple]) -> list[int]:
+        """Exécute l'INSERT multi-lignes sql (terminé par VALUES) pour les tuples rows
+        et renvoie les ids auto-incrémentés des lignes insérées, dans l'ordre : pour un
+        INSERT simple, InnoDB attribue aux lignes d'une même requête des ids successifs,
+        espacés de auto_increment_increment (cf. Dao._id_increment)."""
+        placeholders = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+        cursor.execute(f"{sql} {', '.join([placeholders] * len(rows))}",
+                       [value for row in rows for value in row])
+        first_id = cursor.lastrowid
+        step = Dao._id_increment(cursor)
+        return list(range(first_id, first_id + step * len(rows), step))
+
+    @staticmethod
+    def _id_increment(cursor: Any) -> int:
+        """Renvoie l'écart entre deux ids auto-incrémentés consécutifs (supérieur à 1
+        en réplication multi-maîtres, ex. Galera), lu une fois par pool."""
+        if Dao._auto_increment is None:
+            Dao._auto_increment = Dao.get_backend().id_increment(cursor)
+        return Dao._auto_increment
+
+    @staticmethod
+    def _insert_persons(cursor: Any, persons: list) -> list[int]:
+        """Insère dans la table person les personnes (élèves ou enseignants) persons
+        et renvoie leurs id_person, dans l'ordre."""
+        return Dao._insert_values(
+            cursor, "INSERT INTO person (first_name, last_name, age, id_address) VALUES",
+            [(p.first_name, p.last_name, p.age, p.address.id if p.address is not None else None)
+             for p in persons])
+
+    @staticmethod
+    def _person_id(cursor: Any, table: str, key_column: str, id_entity: int) -> Optional[int]:
+        """Renvoie l'id_person de l'élève ou de l'enseignant id_entity de la table
+        table (student ou teacher), ou None s'il n'existe pas."""
+        cursor.execute(f"SELECT id_person FROM {table} WHERE {key_column}=%s", (id_entity,))
+        record = cursor.fetchone()
+        return record['id_person'] if record is not None else None
+
+    @staticmethod
+    def _update_person(cursor: Any, id_person: int, person: Any) -> None:
+        """Met à jour le prénom, le nom et l'âge de la personne id_person."""
+        cursor.execute("UPDATE person SET first_name=%s, last_name=%s, age=%s WHERE id_person=%s",
+                       (person.first_name, person.last_name, person.age, id_person))
+
     @abstractmethod
     def read(self, id_entity: int) -> Optional[T]:
         """Renvoit l'objet correspondant à l'entité dont l'id est id_entity
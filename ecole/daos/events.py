@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""
+Événements des DAO : notification des écritures validées en BD aux structures maintenues en mémoire
+- DaoEvent   : création, mise à jour ou suppression d'entités (ou d'inscriptions)
+- EventBus   : abonnement des écouteurs et diffusion des événements
+- dao_events : bus partagé par tous les DAO
+- publishes  : décorateur placé sur les méthodes create/update/delete(obj) des DAO
+"""
+
+import functools
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from ecole.daos.unit_of_work import current_unit_of_work
+
+
+@dataclass(frozen=True)
+class DaoEvent:
+    """Écriture validée en BD :
+    - entity : 'address', 'teacher', 'student', 'course' ou 'takes'
+    - action : 'created', 'updated' ou 'deleted'
+    - objs   : entités concernées (avec leur id définitif), ou couples (student_nbr, id_course)
+               effectivement inscrits ou désinscrits pour 'takes'
+    """
+    entity: str
+    action: str
+    objs: tuple
+
+
+@dataclass
+class EventBus:
+    """Diffuse les événements aux écouteurs abonnés, dans l'ordre d'abonnement ;
+    l'échec d'un écouteur est signalé sans interrompre l'écriture ni les autres écouteurs."""
+    _listeners: list[Callable[[DaoEvent], None]] = field(default_factory=list, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def active(self) -> bool:
+        """True si au moins un écouteur est abonné (sinon, rien n'est publié)."""
+        return bool(self._listeners)
+
+    def subscribe(self, listener: Callable[[DaoEvent], None]) -> None:
+        with self._lock:
+            self._listeners = [*self._listeners, listener]
+
+    def unsubscribe(self, listener: Callable[[DaoEvent], None]) -> None:
+        with self._lock:
+            self._listeners = [other for other in self._listeners if other is not listener]
+
+    def dispatch(self, event: DaoEvent) -> None:
+        # liste remplacée (jamais modifiée) à chaque abonnement : parcours sans verrou
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Erreur d'un écouteur des DAO ({event.entity} {event.action}): {e}")
+
+
+dao_events = EventBus()
+
+
+def publish(entity: str, action: str, objs: Any) -> None:
+    """Publie l'écriture de objs, aussitôt ou, dans une unité de travail, à sa
+    validation (rien n'est publié si elle est annulée)."""
+    if not dao_events.active or not objs:
+        return
+    event = DaoEvent(entity, action, tuple(objs))
+    unit = current_unit_of_work()
+    if unit is not None:
+        unit.after_commit(functools.partial(dao_events.dispatch, event))
+    else:
+        dao_events.dispatch(event)
+
+
+def publishes(action: str) -> Callable:
+    """Décore une méthode d'écriture create/update/delete(obj) d'un DAO : si elle
+    réussit (résultat non nul), l'événement (ENTITY du DAO, action, obj) est publié.
+    Placé sous deferred_create, il ne publie que les créations immédiates : celles
+    d'une unité de travail le sont à leur écriture en BD."""
+    def decorator(method: Callable) -> Callable:
+        @functools.wraps(method)
+        def write(self, obj):
+            result = method(self, obj)
+            if result:
+                publish(self.ENTITY, action, (obj,))
+            return result
+        return write
+    return decorator
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+
+"""
+Instrumentation des requêtes SQL :
+- InstrumentedConnection : connexion du pool dont chaque exécution de requête est mesurée
+- Instrumentation        : diffusion des mesures (QueryEvent) et agrégats par méthode de School
+- SlowQueryLog           : journal des requêtes dépassant un seuil de durée
+- NPlusOneDetector       : avertit quand une même forme de requête se répète dans un appel
+- instrumented           : décorateur de classe délimitant un appel par méthode publique
+"""
+
+import functools
+import re
+import threading
+import time
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterator, Optional
+
+
+class NPlusOneWarning(UserWarning):
+    """Même forme de requête exécutée de nombreuses fois au cours d'un même appel."""
+
+
+@dataclass
+class CallScope:
+    """Appel instrumenté (méthode de School) : requêtes exécutées pendant celui-ci."""
+    name: str
+    queries: int = 0
+    db_time: float = 0.0
+    shapes: Counter = field(default_factory=Counter, repr=False)
+    warned: set[str] = field(default_factory=set, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, shape: str, duration: float) -> int:
+        """Compte une requête ; renvoie le nombre d'exécutions de sa forme dans l'appel."""
+        with self._lock:
+            self.queries += 1
+            self.db_time += duration
+            self.shapes[shape] += 1
+            return self.shapes[shape]
+
+
+@dataclass
+class QueryEvent:
+    """Exécution d'une requête :
+    - sql      : texte de la requête
+    - shape    : forme de la requête (listes de paramètres et de lignes réduites)
+    - params   : forme des paramètres (nombre et types, jamais les valeurs)
+    - duration : durée d'exécution (s)
+    - rowcount : lignes lues ou modifiées (-1 si inconnu)
+    - scope    : appel en cours, None hors d'une méthode instrumentée
+    - count    : nombre d'exécutions de cette forme dans l'appel, celle-ci comprise
+    - error    : message de l'exception levée, le cas échéant
+    """
+    sql: str
+    shape: str
+    params: str
+    duration: float
+    rowcount: int
+    scope: Optional[CallScope] = None
+    count: int = 1
+    error: Optional[str] = None
+
+
+@dataclass
+class MethodStats:
+    """Agrégats des appels d'une méthode instrumentée."""
+    calls: int = 0
+    queries: int = 0
+    max_queries: int = 0
+    db_time: float = 0.0
+    total_time: float = 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {'calls': self.calls, 'queries': self.queries, 'max_queries': self.max_queries,
+                'queries_per_call': self.queries / self.calls if self.calls else 0.0,
+                'db_time': self.db_time, 'total_time': self.total_time}
+
+
+_PLACEHOLDERS = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_REPEATED_GROUPS = re.compile(r'(\([^()]*\))(?:\s*,\s*\1)+')
+_SPACES = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=1024)
+def query_shape(sql: str) -> str:
+    """Forme d'une requête : espaces normalisés, listes (%s, %s, ...) et lignes
+    répétées réduites, pour regrouper les requêtes ne différant que par leur taille."""
+    shape = _SPACES.sub(' ', sql).strip()
+    shape = _PLACEHOLDERS.sub('(%s, ...)', shape)
+    return _REPEATED_GROUPS.sub(r'\1, ...', shape)
+
+
+def params_shape(params: Any, many: bool = False) -> str:
+    """Décrit des paramètres par leur nombre et leurs types, sans leurs valeurs."""
+    if many:
+        rows = list(params)
+        return f"{len(rows)} lignes x {params_shape(rows[0]) if rows else '()'}"
+    if params is None:
+        return "()"
+    if isinstance(params, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in params.items()) + "}"
+    if not isinstance(params, (list, tuple)):
+        params = (params,)
+    types = [type(value).__name__ for value in params]
+    if len(types) <= 8:
+        return "(" + ", ".join(types) + ")"
+    return f"({len(types)} valeurs: {', '.join(sorted(set(types)))})"
+
+
+@dataclass
+class Instrumentation:
+    """Point d'accroche de toutes les exécutions de requêtes du pool : une fois
+    activée, chaque requête est mesurée et transmise aux écouteurs (listeners),
+    et les appels des méthodes instrumentées sont agrégés dans method_stats."""
+    enabled: bool = False
+    listeners: list[Callable[[QueryEvent], None]] = field(default_factory=list)
+    method_stats: dict[str, MethodStats] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def enable(self, slow_query_threshold: Optional[float] = None, slow_query_path: Optional[str] = None,
+               n_plus_one_threshold: Optional[int] = None) -> None:
+        """Active l'instrumentation, avec si demandés un journal des requêtes plus
+        longues que slow_query_threshold (s) et une détection des requêtes N+1."""
+        if slow_query_threshold is not None:
+            self.add_listener(SlowQueryLog(slow_query_threshold, slow_query_path))
+        if n_plus_one_threshold is not None:
+            self.add_listener(NPlusOneDetector(n_plus_one_threshold))
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Désactive l'instrumentation et retire les écouteurs."""
+        self.enabled = False
+        self.listeners.clear()
+
+    def add_listener(self, listener: Callable[[QueryEvent], None]) -> None:
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[QueryEvent], None]) -> None:
+        self.listeners.remove(listener)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.method_stats.clear()
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Agrégats par méthode, triés par temps passé en BD décroissant."""
+        with self._lock:
+            ranked = sorted(self.method_stats.items(), key=lambda item: -item[1].db_time)
+            return {name: stats.as_dict() for name, stats in ranked}
+
+    @contextmanager
+    def scope(self, name: str) -> Iterator[Optional[CallScope]]:
+        """Délimite un appel ; un appel imbriqué est compté dans l'appel englobant."""
+        if not self.enabled or _scope.get() is not None:
+            yield _scope.get()
+            return
+        scope = CallScope(name)
+        token = _scope.set(scope)
+        start = time.perf_counter()
+        try:
+            yield scope
+        finally:
+            elapsed = time.perf_counter() - start
+            _scope.reset(token)
+            with self._lock:
+                stats = self.method_stats.setdefault(name, MethodStats())
+                stats.calls += 1
+                stats.queries += scope.queries
+                stats.max_queries = max(stats.max_queries, scope.queries)
+                stats.db_time += scope.db_time
+                stats.total_time += elapsed
+
+    def record(self, sql: str, params: str, duration: float, rowcount: int,
+               error: Optional[str] = None) -> None:
+        """Enregistre une exécution et la transmet aux écouteurs."""
+        shape = query_shape(sql)
+        scope = _scope.get()
+        count = scope.record(shape, duration) if scope is not None else 1
+        event = QueryEvent(sql, shape, params, duration, rowcount, scope, count, error)
+        for listener in list(self.listeners):
+            listener(event)
+
+
+# instrumentation partagée par tout le processus
+instrumentation: Instrumentation = Instrumentation()
+
+# appel instrumenté en cours (propre au thread / à la tâche asyncio)
+_scope: ContextVar[Optional[CallScope]] = ContextVar('query_scope', default=None)
+
+
+def current_scope() -> Optional[CallScope]:
+    """Renvoie l'appel instrumenté en cours, ou None."""
+    return _scope.get()
+
+
+@contextmanager
+def attached_scope(scope: Optional[CallScope]) -> Iterator[None]:
+    """Rattache à l'appel scope les requêtes exécutées dans le bloc with,
+    par ex. dans un thread de travail lancé par cet appel."""
+    token = _scope.set(scope)
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+@dataclass
+class InstrumentedCursor:
+    """Curseur dont execute()/executemany() sont mesurés lorsque l'instrumentation est active."""
+    cursor: Any
+
+    def __enter__(self) -> 'InstrumentedCursor':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.cursor.close()
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.cursor)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.cursor, name)
+
+    def execute(self, sql: str, params: Any = None) -> Any:
+        if not instrumentation.enabled:
+            return self.cursor.execute(sql, params)
+        return self._measure(self.cursor.execute, sql, params, params_shape(params))
+
+    def executemany(self, sql: str, rows: Any) -> Any:
+        if not instrumentation.enabled:
+            return self.cursor.executemany(sql, rows)
+        rows = list(rows)
+        return self._measure(self.cursor.executemany, sql, rows, params_shape(rows, many=True))
+
+    def _measure(self, execute: Callable, sql: str, params: Any, shape: str) -> Any:
+        start = time.perf_counter()
+        try:
+            result = execute(sql, params)
+        except Exception as e:
+            instrumentation.record(sql, shape, time.perf_counter() - start, -1, str(e))
+            raise
+        instrumentation.record(sql, shape, time.perf_counter() - start, self.cursor.rowcount)
+        return result
+
+
+@dataclass
+class InstrumentedConnection:
+    """Connexion dont les curseurs sont instrumentés."""
+    connection: Any
+
+    def cursor(self, *args: Any) -> InstrumentedCursor:
+        return InstrumentedCursor(self.connection.cursor(*args))
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.connection, name)
+
+
+def instrument_connect(connect: Callable[[], Any]) -> Callable[[], Any]:
+    """Enveloppe une fabrique de connexions pour en instrumenter les curseurs."""
+    @functools.wraps(connect)
+    def wrapper() -> InstrumentedConnection:
+        return InstrumentedConnection(connect())
+    return wrapper
+
+
+@dataclass
+class SlowQueryLog:
+    """Écouteur journalisant les requêtes plus longues que threshold (s), dans le
+    fichier path (ajout en fin de fichier) ou, à défaut, sur la sortie standard."""
+    threshold: float
+    path: Optional[str] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __call__(self, event: QueryEvent) -> None:
+        if event.duration < self.threshold:
+            return
+        line = (f"{datetime.now().isoformat(timespec='milliseconds')} {event.duration * 1000:.1f} ms"
+                f" [{event.scope.name if event.scope else '-'}] lignes={event.rowcount}"
+                f" params={event.params} {event.shape}")
+        if event.error:
+            line += f" ERREUR: {event.error}"
+        with self._lock:
+            if self.path is None:
+                print(f"Requête lente: {line}")
+            else:
+                with open(self.path, 'a', encoding='utf-8') as log:
+                    log.write(line + "\n")
+
+
+@dataclass
+class NPlusOneDetector:
+    """Écouteur avertissant (NPlusOneWarning), une fois par appel et par forme, quand
+    une même forme de requête est exécutée threshold fois au cours d'un même appel :
+    symptôme typique d'une requête par élément au lieu d'une requête groupée."""
+    threshold: int = 10
+
+    def __call__(self, event: QueryEvent) -> None:
+        scope = event.scope
+        if scope is None or event.count < self.threshold or event.shape in scope.warned:
+            return
+        scope.warned.add(event.shape)
+        warnings.warn(f"{scope.name}: requête exécutée {event.count} fois dans un même appel"
+                      f" (N+1 ?): {event.shape}", NPlusOneWarning, stacklevel=2)
+
+
+def instrumented(cls: type) -> type:
+    """Décore une classe : chaque appel d'une de ses méthodes publiques délimite un
+    appel instrumenté nommé Classe.méthode (sans effet si l'instrumentation est inactive)."""
+    for name, member in list(vars(cls).items()):
+        if name.startswith('_'):
+            continue
+        if isinstance(member, staticmethod):
+            setattr(cls, name, staticmethod(_in_scope(member.__func__, f"{cls.__name__}.{name}")))
+        elif callable(member) and not isinstance(member, type):
+            setattr(cls, name, _in_scope(member, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def _in_scope(function: Callable, name: str) -> Callable:
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not instrumentation.enabled:
+            return function(*args, **kwargs)
+        with instrumentation.scope(name):
+            return function(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe Page[T] : page d'une liste paginée par clé (keyset pagination),
+et jetons opaques de continuation associés
+"""
+
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+
+@dataclass
+class Page[T]:
+    """Page d'une liste d'entités :
+    - items      : entités de la page, dans l'ordre demandé
+    - next_token : jeton à fournir pour obtenir la page suivante (None si dernière page)
+    """
+    items: list[T] = field(default_factory=list)
+    next_token: Optional[str] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_token is not None
+
+
+def encode_token(listing: str, order_by: str, key: list[Any]) -> str:
+    """Encode la clé de la dernière entité d'une page en un jeton opaque."""
+    payload = json.dumps({'l': listing, 'o': order_by, 'k': key}, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_token(token: str, listing: str, order_by: str) -> list[Any]:
+    """Décode un jeton produit par encode_token pour la même liste et le même tri."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if payload['l'] != listing or payload['o'] != order_by:
+            raise ValueError("liste ou tri différent")
+        return list(payload['k'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Jeton de pagination invalide: {e}") from e
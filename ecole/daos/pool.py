@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe ConnectionPool : pool borné de connexions à la BD, partagé par tous les DAO
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+
+class PoolTimeoutError(Exception):
+    """Levée lorsqu'aucune connexion n'a pu être obtenue dans le délai imparti."""
+
+
+@dataclass
+class ConnectionPool:
+    """Pool de connexions thread-safe, avec emprunt/restitution par opération :
+    - connect  : fabrique d'une nouvelle connexion
+    - min_size : nombre de connexions ouvertes à la création et conservées au repos
+    - max_size : nombre maximal de connexions ouvertes simultanément
+    - max_idle : durée (s) au-delà de laquelle une connexion inactive est fermée
+    - timeout  : durée (s) d'attente maximale d'une connexion libre
+    - reset    : remise à zéro d'une connexion restituée (fin de transaction)
+    """
+    connect: Callable[[], Any]
+    min_size: int = 1
+    max_size: int = 10
+    max_idle: float = 300.0
+    timeout: float = 10.0
+    reset: Callable[[Any], None] = lambda connection: connection.rollback()
+
+    _idle: deque = field(default_factory=deque, init=False, repr=False)
+    _size: int = field(default=0, init=False)
+    _condition: threading.Condition = field(default_factory=threading.Condition,
+                                            init=False, repr=False)
+
+    def __post_init__(self):
+        if not 0 <= self.min_size <= self.max_size or self.max_size < 1:
+            raise ValueError(f"Tailles de pool invalides: min={self.min_size}, max={self.max_size}")
+        for _ in range(self.min_size):
+            self._size += 1
+            self._idle.append((self._open(), time.monotonic()))
+
+    @property
+    def size(self) -> int:
+        """Nombre de connexions actuellement ouvertes (libres ou empruntées)."""
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Nombre de connexions libres."""
+        return len(self._idle)
+
+    def _open(self) -> Any:
+        """Ouvre une nouvelle connexion, en libérant sa place dans le pool si échec."""
+        try:
+            return self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def _evict(self) -> list:
+        """Retire du pool les connexions inactives depuis plus de max_idle secondes,
+        en conservant au moins min_size connexions (appelée verrou détenu)."""
+        evicted = []
+        limit = time.monotonic() - self.max_idle
+        # les connexions les plus anciennement restituées sont à gauche
+        while self._idle and self._size > self.min_size and self._idle[0][1] < limit:
+            evicted.append(self._idle.popleft()[0])
+            self._size -= 1
+        return evicted
+
+    @staticmethod
+    def _close(connections: list) -> None:
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def acquire(self) -> Any:
+        """Emprunte une connexion : réutilise une connexion libre, en ouvre une nouvelle
+        si le pool n'est pas plein, sinon attend au plus timeout secondes."""
+        deadline = time.monotonic() + self.timeout
+        evicted: list = []
+        try:
+            with self._condition:
+                while True:
+                    evicted += self._evict()
+                    if self._idle:
+                        # LIFO : la connexion la plus récemment utilisée est la plus sûre
+                        return self._idle.pop()[0]
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._condition.wait(remaining):
+                        raise PoolTimeoutError(
+                            f"Aucune connexion libre après {self.timeout}s (max_size={self.max_size})")
+        finally:
+            self._close(evicted)
+        # l'ouverture d'une connexion se fait hors verrou
+        return self._open()
+
+    def release(self, connection: Any, discard: bool = False) -> None:
+        """Restitue une connexion empruntée ; discard=True la ferme définitivement."""
+        if not discard:
+            try:
+                self.reset(connection)
+            except Exception:
+                discard = True
+        with self._condition:
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+        if discard:
+            self._close([connection])
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Emprunte une connexion le temps d'une opération :
+        la transaction en cours est annulée si une exception survient."""
+        connection = self.acquire()
+        discard = False
+        try:
+            yield connection
+        except Exception:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.release(connection, discard)
+
+    def close(self) -> None:
+        """Ferme toutes les connexions libres du pool."""
+        with self._condition:
+            connections = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(connections)
+        self._close(connections)
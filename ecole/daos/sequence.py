@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+"""
+Allocation de n° par blocs (hi/lo) à partir d'une table de séquences
+- SequenceAllocator : réserve atomiquement en BD des blocs de n° consécutifs et les sert depuis la mémoire
+- student_numbers   : allocateur des n° d'élève (student.student_nbr n'est pas auto-incrémenté)
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from ecole.daos.backend import Backend
+
+
+@dataclass
+class SequenceAllocator:
+    """Allocateur de n° uniques entre processus : chaque réservation incrémente
+    atomiquement de block_size la ligne name de la table number_sequence et
+    renvoie le bloc [ancienne valeur, nouvelle valeur[, servi ensuite depuis la
+    mémoire sans aller-retour vers la BD. Sur MySQL, la réservation passe par une
+    connexion dédiée et est validée aussitôt : elle ne dépend pas de la transaction
+    de l'appelant et ne garde pas la ligne verrouillée. Sur SQLite, qui n'admet
+    qu'un écrivain à la fois, elle se fait dans la transaction de l'appelant, sans
+    bloc d'avance (elle ne coûte aucun aller-retour réseau et est annulée avec elle).
+    Les n° d'un bloc non utilisés en entier sont perdus à l'arrêt : la séquence a des
+    trous, mais ne sert jamais deux fois le même n°.
+    - table, column : colonne numérotée, dont le plus grand n° initialise la séquence
+    """
+    name: str
+    table: str
+    column: str
+    block_size: int = 100
+    _backend: Optional[Backend] = field(default=None, init=False, repr=False)
+    _connection: Any = field(default=None, init=False, repr=False)
+    _next: int = field(default=0, init=False, repr=False)
+    _limit: int = field(default=0, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def configure(self, backend: Backend, block_size: int) -> None:
+        """Rattache l'allocateur au moteur de BD ; le bloc en cours est abandonné."""
+        with self._lock:
+            self._close()
+            self._backend = backend
+            self.block_size = block_size
+            self._next = self._limit = 0
+
+    def reset(self) -> None:
+        """Abandonne le bloc en cours (ex. après réinitialisation de la BD)."""
+        with self._lock:
+            self._next = self._limit = 0
+
+    def allocate(self, cursor: Any, count: int = 1) -> list[int]:
+        """Renvoie count n° inutilisés, pris dans le bloc en cours puis, s'il n'y suffit
+        pas, dans un nouveau bloc d'au moins block_size n°.
+
+        :param cursor: curseur de la transaction en cours (utilisé sur SQLite)
+        """
+        with self._lock:
+            numbers = list(range(self._next, min(self._limit, self._next + count)))
+            self._next += len(numbers)
+            missing = count - len(numbers)
+            if missing and self._is_local():
+                numbers.extend(self._reserve(cursor, missing))
+            elif missing:
+                block = self._reserve(cursor, max(missing, self.block_size))
+                numbers.extend(block[:missing])
+                self._next, self._limit = block.start + missing, block.stop
+        return numbers
+
+    def reserve(self, cursor: Any, count: int) -> range:
+        """Réserve directement en BD count n° consécutifs, hors du bloc en cours
+        (ex. chargement en masse d'ids explicites).
+
+        :param cursor: curseur de la transaction en cours (utilisé sur SQLite)
+        """
+        with self._lock:
+            return self._reserve(cursor, count)
+
+    def _is_local(self) -> bool:
+        return self._backend is not None and self._backend.config.backend == 'sqlite'
+
+    def _reserve(self, cursor: Any, count: int) -> range:
+        if self._is_local():
+            return self._reserve_sqlite(cursor, count)
+        try:
+            if self._connection is None:
+                self._connection = self._backend.connect()
+            with self._connection.cursor() as own_cursor:
+                sql = "UPDATE number_sequence SET next_value = LAST_INSERT_ID(next_value + %s) WHERE name = %s"
+                if own_cursor.execute(sql, (count, self.name)) == 0:
+                    own_cursor.execute(f"INSERT IGNORE INTO number_sequence (name, next_value) "
+                                       f"SELECT %s, COALESCE(MAX({self.column}), 0) + 1 FROM {self.table}",
+                                       (self.name,))
+                    own_cursor.execute(sql, (count, self.name))
+                # LAST_INSERT_ID(expr) renvoie la nouvelle valeur dans la réponse à l'UPDATE
+                limit = own_cursor.lastrowid
+            self._connection.commit()
+        except Exception:
+            # connexion peut-être rompue : elle sera rouverte à la prochaine réservation
+            self._close()
+            raise
+        return range(limit - count, limit)
+
+    def _reserve_sqlite(self, cursor: Any, count: int) -> range:
+        sql = "UPDATE number_sequence SET next_value = next_value + %s WHERE name = %s RETURNING next_value"
+        cursor.execute(sql, (count, self.name))
+        record = cursor.fetchone()
+        if record is None:
+            cursor.execute(f"INSERT OR IGNORE INTO number_sequence (name, next_value) "
+                           f"SELECT %s, COALESCE(MAX({self.column}), 0) + 1 FROM {self.table}",
+                           (self.name,))
+            cursor.execute(sql, (count, self.name))
+            record = cursor.fetchone()
+        limit = record['next_value']
+        return range(limit - count, limit)
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+
+# n° d'élève, réservés par blocs (taille : DbConfig.sequence_block_size)
+student_numbers = SequenceAllocator('student_nbr', 'student', 'student_nbr')
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""
+Moteur SQLite embarqué : mêmes DAO et mêmes requêtes que sur MySQL, traduites à la volée
+- SqliteBackend    : BD fichier ou en mémoire, schéma bdd/ecole-sqlite.sql, copie de la BD MySQL
+- SqliteConnection : connexion sqlite3 présentant l'API pymysql utilisée par les DAO
+- SqliteCursor     : curseur traduisant le SQL MySQL des DAO en SQL SQLite
+"""
+
+import functools
+import os
+import re
+import sqlite3
+import tempfile
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any, Optional
+
+from ecole.daos.backend import Backend, MySqlBackend
+from ecole.daos.config import DbConfig
+
+SCHEMA_PATH = Path(__file__).resolve().parents[2] / 'bdd' / 'ecole-sqlite.sql'
+
+# tables dans l'ordre des clés étrangères, pour la copie de la BD MySQL
+TABLES = ('number_sequence', 'address', 'person', 'teacher', 'student', 'course', 'takes')
+
+# colonnes déclarées date <-> chaînes ISO 8601, comme les datetime.date de pymysql
+sqlite3.register_adapter(date, date.isoformat)
+sqlite3.register_converter('date', lambda value: date.fromisoformat(value.decode()))
+
+@functools.lru_cache(maxsize=512)
+def translate(sql: str) -> str:
+    """Traduit une requête des DAO (dialecte MySQL, paramètres %s) pour SQLite."""
+    sql = sql.replace('%s', '?').replace('%%', '%')
+    # verrou de ligne inutile : SQLite n'a qu'un écrivain à la fois
+    sql = re.sub(r'\s+FOR UPDATE\b', '', sql)
+    # INSERT idempotent (cf. TakesDao._insert)
+    sql = re.sub(r'ON DUPLICATE KEY UPDATE .*$', 'ON CONFLICT DO NOTHING', sql, flags=re.S)
+    # liste de valeurs de lignes : (a, b) IN ((?, ?), ...) -> (a, b) IN (VALUES (?, ?), ...)
+    sql = re.sub(r'\bIN \(\(', 'IN (VALUES (', sql)
+    return sql
+
+
+def _dict_row(cursor: sqlite3.Cursor, row: tuple) -> dict:
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+@dataclass
+class SqliteCursor:
+    """Curseur renvoyant des dict (ou des tuples si as_tuples) ; lastrowid est, comme
+    sur MySQL, l'id de la première ligne insérée par un INSERT multi-lignes."""
+    connection: 'SqliteConnection'
+    as_tuples: bool = False
+    lastrowid: Optional[int] = field(default=None, init=False)
+    _cursor: sqlite3.Cursor = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._cursor = self.connection.raw.cursor()
+        self._cursor.row_factory = None if self.as_tuples else _dict_row
+
+    def __enter__(self) -> 'SqliteCursor':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def description(self) -> Any:
+        return self._cursor.description
+
+    def execute(self, sql: str, params: Any = ()) -> int:
+        sql = translate(sql)
+        is_select = sql.lstrip()[:6].upper() == 'SELECT'
+        # transaction ouverte implicitement par la première écriture, comme sur MySQL
+        if not is_select and not self.connection.raw.in_transaction:
+            self._cursor.execute("BEGIN")
+        self._cursor.execute(sql, tuple(params or ()))
+        if not is_select and self._cursor.rowcount > 0 and self._cursor.lastrowid:
+            # SQLite renvoie l'id de la dernière ligne ; les ids d'un même INSERT sont consécutifs
+            self.lastrowid = self._cursor.lastrowid - self._cursor.rowcount + 1
+        return self._cursor.rowcount
+
+    def executemany(self, sql: str, rows: Any) -> int:
+        if not self.connection.raw.in_transaction:
+            self._cursor.execute("BEGIN")
+        self._cursor.executemany(translate(sql), rows)
+        return self._cursor.rowcount
+
+    def fetchone(self) -> Any:
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int) -> list:
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self) -> list:
+        return self._cursor.fetchall()
+
+    def close(self) -> None:
+        self._cursor.close()
+
+
+@dataclass
+class SqliteConnection:
+    """Connexion sqlite3 (mode autocommit, transactions gérées par les curseurs)
+    présentant l'API des connexions pymysql."""
+    raw: sqlite3.Connection
+
+    def cursor(self, cursor_class: Any = dict) -> SqliteCursor:
+        return SqliteCursor(self, as_tuples=cursor_class is tuple)
+
+    def commit(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.commit()
+
+    def rollback(self) -> None:
+        if self.raw.in_transaction:
+            self.raw.rollback()
+
+    def close(self) -> None:
+        self.raw.close()
+
+
+@dataclass
+class SqliteBackend(Backend):
+    """BD SQLite embarquée : le schéma est créé à l'ouverture d'une BD vide et,
+    si config.sqlite_snapshot, le contenu de la BD MySQL y est recopié au démarrage,
+    les lectures étant ensuite servies localement. La BD est en mode WAL : comme sur
+    MySQL, chaque connexion du pool ne lit que des données validées, sans bloquer
+    les écritures. Une BD ':memory:' est une BD temporaire, dans un fichier supprimé
+    à la fermeture du moteur."""
+    config: DbConfig
+    _uri: str = field(init=False, repr=False)
+    _temporary: Optional[Path] = field(default=None, init=False, repr=False)
+    _anchor: Optional[SqliteConnection] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        path = self.config.sqlite_path
+        if path == ':memory:':
+            # une BD en mémoire partagée entre connexions (cache partagé) verrouille
+            # ses tables : les lectures y attendraient la fin des transactions
+            descriptor, path = tempfile.mkstemp(prefix='ecole-', suffix='.sqlite')
+            os.close(descriptor)
+            self._temporary = Path(path)
+        self._uri = Path(path).resolve().as_uri()
+        # connexion gardant la BD ouverte, qui sert aussi à l'initialiser
+        self._anchor = self.connect()
+        self._anchor.raw.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        if self.config.sqlite_snapshot:
+            self.load_snapshot(MySqlBackend(self.config))
+
+    def connect(self) -> SqliteConnection:
+        raw = sqlite3.connect(self._uri, uri=True, isolation_level=None,
+                              timeout=self.config.connect_timeout,
+                              detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        raw.execute("PRAGMA foreign_keys=ON")
+        if self._temporary is not None:
+            # BD jetable : inutile d'attendre l'écriture effective sur disque
+            raw.execute("PRAGMA synchronous=OFF")
+        return SqliteConnection(raw)
+
+    def cursor_class(self, as_tuples: bool, unbuffered: bool) -> Any:
+        # les curseurs sqlite3 lisent toujours le résultat au fur et à mesure
+        return tuple if as_tuples else dict
+
+    def begin_snapshot(self, connection: SqliteConnection) -> None:
+        # en mode WAL, l'instantané est pris à la première lecture de la transaction
+        connection.raw.execute("BEGIN")
+
+    def close(self) -> None:
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+        if self._temporary is not None:
+            for suffix in ('', '-wal', '-shm'):
+                Path(f"{self._temporary}{suffix}").unlink(missing_ok=True)
+            self._temporary = None
+
+    def _create_schema(self) -> None:
+        exists = self._anchor.raw.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='number_sequence'").fetchone()
+        if exists is None:
+            self._anchor.raw.executescript(SCHEMA_PATH.read_text(encoding='utf-8'))
+
+    def load_snapshot(self, source: Backend, batch_size: int = 10_000) -> dict[str, int]:
+        """Remplace le contenu de la BD par celui de la BD source, table par table,
+        en une seule transaction.
+
+        :return: nombre de lignes copiées par table
+        """
+        copied: dict[str, int] = {}
+        source_connection = source.connect()
+        try:
+            with self._anchor.cursor() as cursor:
+                for table in reversed(TABLES):
+                    cursor.execute(f"DELETE FROM {table}")
+                for table in TABLES:
+                    copied[table] = 0
+                    with source_connection.cursor(source.cursor_class(True, True)) as source_cursor:
+                        source_cursor.execute(f"SELECT * FROM {table}")
+                        columns = [column[0] for column in source_cursor.description]
+                        sql = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                               f"VALUES ({', '.join(['%s'] * len(columns))})")
+                        while rows := source_cursor.fetchmany(batch_size):
+                            cursor.executemany(sql, rows)
+                            copied[table] += len(rows)
+            self._anchor.commit()
+        except Exception:
+            self._anchor.rollback()
+            raise
+        finally:
+            source_connection.close()
+        return copied
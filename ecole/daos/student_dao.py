@@ -1,107 +1,181 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Any, ClassVar, Dict, Iterable, Iterator, Optional, List, Tuple
 
+from ecole.daos.cache import cached_read, cached_read_many, invalidates
 from ecole.daos.dao import Dao
+from ecole.daos.events import publishes
+from ecole.daos.unit_of_work import deferred_create
+from ecole.daos.page import Page
+from ecole.daos.sequence import student_numbers
 from ecole.models.student import Student
+from ecole.models.summaries import StudentSummary
 
 @dataclass
 class StudentDao(Dao[Student]):
+    # tris possibles pour la pagination : colonnes de la clé, terminée par la clé primaire
+    PAGE_ORDERS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        'id': ('s.student_nbr',),
+        # départage par id_person, dernière colonne de l'index idx_person_name
+        'name': ('p.last_name', 'p.first_name', 'p.id_person'),
+    }
+    # créés après les adresses dans une unité de travail
+    FLUSH_RANK: ClassVar[int] = 1
+    ENTITY: ClassVar[str] = 'student'
+
+    @deferred_create
+    @publishes('created')
     def create(self, student: Student) -> int:
         """
-        !!!!!!!!NOTE!!!!!!! le student_nbr n'est pas auto-incrémenté
-        donc possibilité de ne créer qu'un student sans passer l'id
-        directement
         Crée en BD un nouvel élève.
-        - Insère d'abord la personne dans la table person
-        - Puis insère le professeur dans la table student
+        - Réserve son n° d'élève (student_nbr n'est pas auto-incrémenté, cf. student_numbers)
+        - Insère d'abord la personne (avec son adresse) dans la table person
+        - Puis insère l'élève dans la table student
         :param student: entité Student à insérer
-        :return: l'id de l'élève inséré (0 si échec)
+        :return: le n° de l'élève inséré (0 si échec)
         """
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                [student_nbr] = student_numbers.allocate(cursor)
 
-                sql_person = "INSERT INTO person (first_name, last_name, age) VALUES (%s, %s, %s)"
-                cursor.execute(sql_person, (student.first_name, student.last_name, student.age))
-                person_id = cursor.lastrowid
+                [person_id] = self._insert_persons(cursor, [student])
 
-                sql_student = "INSERT INTO student (id_person) VALUES (%s)"
-                cursor.execute(sql_student, (person_id,))
-                Dao.connection.commit()
+                sql_student = "INSERT INTO student (student_nbr, id_person) VALUES (%s, %s)"
+                cursor.execute(sql_student, (student_nbr, person_id))
+                connection.commit()
 
-                new_id = cursor.lastrowid
-                student.student_nbr = new_id
-                return new_id
+                student.student_nbr = student_nbr
+                return student_nbr
 
         except Exception as e:
             print(f"Erreur lors de la création de l'élève: {e}")
-            Dao.connection.rollback()
             return 0
 
+    def _insert_rows(self, cursor: Any, students: List[Student]) -> List[int]:
+        """Insère les personnes puis les élèves par deux INSERT multi-lignes,
+        avec des n° d'élève pris dans les blocs réservés par student_numbers"""
+        person_ids = self._insert_persons(cursor, students)
+        numbers = student_numbers.allocate(cursor, len(students))
+        self._insert_values(cursor, "INSERT INTO student (student_nbr, id_person) VALUES",
+                            list(zip(numbers, person_ids)))
+        for student, number in zip(students, numbers):
+            student.student_nbr = number
+        return numbers
+
+    @cached_read
     def read(self, student_nbr: int) -> Optional[Student]:
         student: Optional[Student]
 
-        with Dao.connection.cursor() as cursor:
+        with Dao.connection() as connection, connection.cursor() as cursor:
             sql = ("SELECT * FROM person p INNER JOIN student s ON p.id_person = s.id_person WHERE s.student_nbr=%s")
             cursor.execute(sql, (student_nbr,))
             record = cursor.fetchone()
         if record is not None:
-            student = Student(record['first_name'], record['last_name'],record['age'])
-            student.id = record['student_nbr']
+            student = StudentDao._from_record(record)
         else:
             student = None
 
         return student
 
+    @cached_read_many
+    def read_many(self, ids: Iterable[int]) -> List[Optional[Student]]:
+        """Renvoie les élèves d'ids donnés, lus par requêtes IN (...) groupées
+        :param ids: ids recherchés
+        :return: les élèves, dans l'ordre de ids (None pour un id introuvable)
+        """
+        return Dao._read_many("SELECT * FROM student s INNER JOIN person p ON s.id_person = p.id_person", "s.student_nbr", StudentDao._from_record, list(ids))
+
     def read_all(self) -> List[Student]:
         students: List[Student] = []
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "SELECT * FROM student s INNER JOIN person p ON s.id_person = p.id_person"
                 cursor.execute(sql)
                 records = cursor.fetchall()
 
             for record in records:
-                student = Student(record['first_name'], record['last_name'],record['age'])
-                student.id = record['student_nbr']
-
-                students.append(student)
+                students.append(StudentDao._from_record(record))
 
         except Exception as e:
             print(e)
 
         return students
 
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Student]:
+        """Parcourt tous les élèves par paquets de batch_size lignes,
+        via un curseur côté serveur (mémoire constante)"""
+        try:
+            sql = "SELECT * FROM student s INNER JOIN person p ON s.id_person = p.id_person"
+            for records in Dao._iter_records(sql, batch_size=batch_size):
+                yield from map(StudentDao._from_record, records)
+        except Exception as e:
+            print(f"Erreur lors de la lecture des élèves: {e}")
+
+    def read_page(self, limit: int = 50, token: Optional[str] = None, order_by: str = 'id') -> Page[Student]:
+        """Renvoie une page d'élèves, par pagination sur clé
+        :param limit: nombre maximal d'élèves de la page
+        :param token: jeton next_token de la page précédente (None pour la première)
+        :param order_by: 'id' ou 'name'
+        """
+        select = "SELECT * FROM student s INNER JOIN person p ON s.id_person = p.id_person"
+        return Dao._read_page('student', select, StudentDao.PAGE_ORDERS,
+                              StudentDao._from_record, limit, token, order_by)
+
+    def iter_summaries(self, batch_size: int = 1000) -> Iterator[StudentSummary]:
+        """Parcourt les élèves sous forme de résumés (prénom, nom et âge) : seules ces colonnes
+        sont lues, en tuples, via un curseur côté serveur (mémoire constante)"""
+        sql = "SELECT p.first_name, p.last_name, p.age FROM student s INNER JOIN person p ON s.id_person = p.id_person"
+        for rows in Dao._iter_records(sql, batch_size=batch_size, as_tuples=True):
+            yield from map(StudentSummary._make, rows)
+
+    @staticmethod
+    def _from_record(record: dict) -> Student:
+        """Construit l'élève correspondant à une ligne student ⨝ person"""
+        student = Student(record['first_name'], record['last_name'], record['age'])
+        student.student_nbr = record['student_nbr']
+        student.id = record['student_nbr']
+        return student
+
+    @invalidates(lambda student: student.student_nbr)
+    @publishes('updated')
     def update(self, student: Student) -> bool:
         """Met à jour en BD l'entité Student correspondant à student, pour y correspondre
         :param student: le student à mettre à jour
         :return: True si la mise à jour a pu être réalisée
         """
         try:
-            with Dao.connection.cursor() as cursor:
-                sql= "UPDATE student SET first_name=%s, last_name=%s, age=%s WHERE id_student=%s"
-                cursor.execute(sql, (student.first_name,student.last_name,student.age))
-                Dao.connection.commit()
-                return cursor.rowcount > 0
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                # prénom, nom et âge sont des colonnes de la personne de l'élève
+                person_id = self._person_id(cursor, 'student', 'student_nbr', student.student_nbr)
+                if person_id is None:
+                    return False
+                self._update_person(cursor, person_id, student)
+                connection.commit()
+                return True
 
         except Exception as e:
             print(f"Erreur lors de la mise à jour su student: {e}")
             return False
 
+    @invalidates(lambda student: student.student_nbr, forget=True)
+    @publishes('deleted')
     def delete(self, student: Student) -> bool:
-        """Supprime en BD l'entité Student correspondant à student
+        """Supprime en BD l'entité Student correspondant à student, et sa personne
+        (refusé tant qu'il est inscrit à des cours)
         :param student: Le student à supprimer
         :return: True si la suppression a pu être réalisée
         """
         try:
-            with Dao.connection.cursor() as cursor:
-                sql= "DELETE FROM student WHERE id_student=%s"
-                cursor.execute(sql, (student.students_nb))
-                Dao.connection.commit()
-                return cursor.rowcount > 0
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                person_id = self._person_id(cursor, 'student', 'student_nbr', student.student_nbr)
+                if person_id is None:
+                    return False
+                cursor.execute("DELETE FROM student WHERE student_nbr=%s", (student.student_nbr,))
+                cursor.execute("DELETE FROM person WHERE id_person=%s", (person_id,))
+                connection.commit()
+                return True
 
         except Exception as e:
-            print(f"Erreur lors de la suppression de l'adresse: {e}")
-            Dao.connection.rollback()
+            print(f"Erreur lors de la suppression de l'élève: {e}")
             return False
 
 
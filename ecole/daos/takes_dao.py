@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+Classe TakesDao : inscriptions des élèves aux cours (table d'association takes)
+"""
+
+from dataclasses import dataclass
+from typing import Any, ClassVar, Iterable, List, Optional, Tuple
+
+from ecole.daos.dao import Dao
+from ecole.daos.events import dao_events, publish
+from ecole.daos.unit_of_work import current_unit_of_work, resolve_pending
+
+
+@dataclass
+class TakesDao:
+    """Accès à la table takes(student_nbr, id_course) : toutes les écritures sont des
+    requêtes multi-lignes idempotentes, exécutées dans une seule transaction.
+    - chunk_size : nombre maximal de couples par requête
+    """
+    # inscriptions écrites en dernier dans une unité de travail
+    FLUSH_RANK: ClassVar[int] = 3
+    ENTITY: ClassVar[str] = 'takes'
+
+    chunk_size: int = 1000
+
+    def enroll(self, pairs: Iterable[Tuple[int, int]]) -> int:
+        """Inscrit en BD chaque élève au cours indiqué ; une inscription existante
+        est laissée telle quelle (un élève ou un cours inexistant fait échouer le lot)
+        Dans une unité de travail, les inscriptions sont mises en attente (ids
+        provisoires acceptés) et leur nombre est renvoyé.
+        :param pairs: couples (student_nbr, id_course)
+        :return: le nombre de nouvelles inscriptions (0 si échec)
+        """
+        pairs = list(dict.fromkeys(pairs))
+        if (unit := current_unit_of_work()) is not None:
+            return unit.add_enrollments(self, pairs)
+        try:
+            inserted: List[Tuple[int, int]] = []
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                enrolled = self._insert(cursor, pairs, inserted)
+                connection.commit()
+            self._publish('created', inserted)
+            return enrolled
+
+        except Exception as e:
+            print(f"Erreur lors de l'inscription des élèves: {e}")
+            return 0
+
+    def unenroll(self, pairs: Iterable[Tuple[int, int]]) -> int:
+        """Désinscrit en BD chaque élève du cours indiqué
+        :param pairs: couples (student_nbr, id_course)
+        :return: le nombre d'inscriptions supprimées
+        """
+        pairs = list(dict.fromkeys(pairs))
+        try:
+            deleted: List[Tuple[int, int]] = []
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                pairs = [tuple(resolve_pending(pair)) for pair in pairs]
+                removed = 0
+                for start in range(0, len(pairs), self.chunk_size):
+                    chunk = pairs[start:start + self.chunk_size]
+                    if dao_events.active:
+                        deleted.extend(self._existing(cursor, chunk))
+                    sql = (f"DELETE FROM takes WHERE (student_nbr, id_course) IN "
+                           f"({', '.join(['(%s, %s)'] * len(chunk))})")
+                    cursor.execute(sql, [value for pair in chunk for value in pair])
+                    removed += cursor.rowcount
+                connection.commit()
+            self._publish('deleted', deleted)
+            return removed
+
+        except Exception as e:
+            print(f"Erreur lors de la désinscription des élèves: {e}")
+            return 0
+
+    def enroll_class(self, id_course: int, student_nbrs: Iterable[int]) -> int:
+        """Inscrit toute une classe au cours id_course
+        :return: le nombre de nouvelles inscriptions (0 si échec)
+        """
+        return self.enroll((student_nbr, id_course) for student_nbr in student_nbrs)
+
+    def replace_roster(self, id_course: int, student_nbrs: Iterable[int]) -> bool:
+        """Remplace la liste des élèves du cours id_course par student_nbrs :
+        les élèves absents de la liste sont désinscrits, les nouveaux inscrits
+        :return: True si le remplacement a pu être réalisé
+        """
+        student_nbrs = list(dict.fromkeys(student_nbrs))
+        try:
+            deleted: List[Tuple[int, int]] = []
+            inserted: List[Tuple[int, int]] = []
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                id_course, *student_nbrs = resolve_pending([id_course, *student_nbrs])
+                if dao_events.active:
+                    cursor.execute("SELECT student_nbr FROM takes WHERE id_course=%s FOR UPDATE", (id_course,))
+                    kept = set(student_nbrs)
+                    deleted = [(record['student_nbr'], id_course) for record in cursor.fetchall()
+                               if record['student_nbr'] not in kept]
+                if student_nbrs:
+                    sql = (f"DELETE FROM takes WHERE id_course=%s AND student_nbr NOT IN "
+                           f"({', '.join(['%s'] * len(student_nbrs))})")
+                    cursor.execute(sql, [id_course, *student_nbrs])
+                else:
+                    cursor.execute("DELETE FROM takes WHERE id_course=%s", (id_course,))
+                self._insert(cursor, [(student_nbr, id_course) for student_nbr in student_nbrs], inserted)
+                connection.commit()
+            self._publish('deleted', deleted)
+            self._publish('created', inserted)
+            return True
+
+        except Exception as e:
+            print(f"Erreur lors du remplacement des élèves du cours {id_course}: {e}")
+            return False
+
+    @staticmethod
+    def courses_of_student(student_nbr: int) -> List[int]:
+        """Renvoie les id des cours suivis par l'élève (préfixe de la clé primaire)"""
+        with Dao.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT id_course FROM takes WHERE student_nbr=%s ORDER BY id_course",
+                           (student_nbr,))
+            return [record['id_course'] for record in cursor.fetchall()]
+
+    @staticmethod
+    def students_of_course(id_course: int) -> List[int]:
+        """Renvoie les n° des élèves suivant le cours (index id_course)"""
+        with Dao.connection() as connection, connection.cursor() as cursor:
+            cursor.execute("SELECT student_nbr FROM takes WHERE id_course=%s ORDER BY student_nbr",
+                           (id_course,))
+            return [record['student_nbr'] for record in cursor.fetchall()]
+
+    def _insert(self, cursor, pairs: List[Tuple[int, int]],
+                inserted_pairs: Optional[List[Tuple[int, int]]] = None) -> int:
+        """INSERT multi-lignes idempotent des couples pairs, par paquets de chunk_size ;
+        renvoie le nombre de lignes réellement insérées. Si des écouteurs sont abonnés
+        aux événements des DAO, les couples nouvellement inscrits sont ajoutés à
+        inserted_pairs (les inscriptions existantes étant lues au préalable)."""
+        inserted = 0
+        for start in range(0, len(pairs), self.chunk_size):
+            chunk = pairs[start:start + self.chunk_size]
+            if inserted_pairs is not None and dao_events.active:
+                existing = set(self._existing(cursor, chunk))
+                inserted_pairs.extend(pair for pair in chunk if pair not in existing)
+            # ON DUPLICATE KEY plutôt qu'INSERT IGNORE, qui masquerait aussi
+            # les violations de clés étrangères
+            sql = (f"INSERT INTO takes (student_nbr, id_course) VALUES "
+                   f"{', '.join(['(%s, %s)'] * len(chunk))} "
+                   f"ON DUPLICATE KEY UPDATE student_nbr = student_nbr")
+            cursor.execute(sql, [value for pair in chunk for value in pair])
+            inserted += cursor.rowcount
+        return inserted
+
+    def _existing(self, cursor: Any, pairs: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Couples de pairs déjà inscrits, verrouillés jusqu'à la fin de la transaction"""
+        sql = (f"SELECT student_nbr, id_course FROM takes WHERE (student_nbr, id_course) IN "
+               f"({', '.join(['(%s, %s)'] * len(pairs))}) FOR UPDATE")
+        cursor.execute(sql, [value for pair in pairs for value in pair])
+        return [(record['student_nbr'], record['id_course']) for record in cursor.fetchall()]
+
+    def _publish(self, action: str, pairs: List[Tuple[int, int]]) -> None:
+        """Publie les inscriptions ou désinscriptions validées pairs."""
+        publish(self.ENTITY, action, pairs)
@@ -1,29 +1,45 @@
 from dataclasses import dataclass
-from typing import Optional, List
+from typing import Any, ClassVar, Dict, Iterable, Iterator, Optional, List, Tuple
 
+from ecole.daos.cache import cached_read, cached_read_many, invalidates
 from ecole.daos.dao import Dao
+from ecole.daos.events import publishes
+from ecole.daos.unit_of_work import deferred_create
+from ecole.daos.page import Page
 from ecole.models.teacher import Teacher
+from ecole.models.summaries import TeacherSummary
 
 @dataclass
 class TeacherDao(Dao[Teacher]):
+    # tris possibles pour la pagination : colonnes de la clé, terminée par la clé primaire
+    PAGE_ORDERS: ClassVar[Dict[str, Tuple[str, ...]]] = {
+        'id': ('t.id_teacher',),
+        # départage par id_person, dernière colonne de l'index idx_person_name
+        'name': ('p.last_name', 'p.first_name', 'p.id_person'),
+        'hiring_date': ('t.hiring_date', 't.id_teacher'),
+    }
+    # créés après les adresses dans une unité de travail
+    FLUSH_RANK: ClassVar[int] = 1
+    ENTITY: ClassVar[str] = 'teacher'
+
+    @deferred_create
+    @publishes('created')
     def create(self, teacher: Teacher) -> int:
         """
         Crée en BD un nouveau professeur.
-        - Insère d'abord la personne dans la table `person`
+        - Insère d'abord la personne (avec son adresse) dans la table `person`
         - Puis insère le professeur dans la table `teacher`
         :param teacher: entité Teacher à insérer
         :return: l'id du professeur inséré (0 si échec)
         """
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
 
-                sql_person = "INSERT INTO person (first_name, last_name, age) VALUES (%s, %s, %s)"
-                cursor.execute(sql_person, (teacher.first_name, teacher.last_name, teacher.age))
-                person_id = cursor.lastrowid
+                [person_id] = self._insert_persons(cursor, [teacher])
 
                 sql_teacher = "INSERT INTO teacher (hiring_date, id_person) VALUES (%s, %s)"
                 cursor.execute(sql_teacher, (teacher.hiring_date, person_id))
-                Dao.connection.commit()
+                connection.commit()
 
                 new_id = cursor.lastrowid
                 teacher.id = new_id
@@ -31,75 +47,135 @@ class TeacherDao(Dao[Teacher]):
 
         except Exception as e:
             print(f"Erreur lors de la création du professeur: {e}")
-            Dao.connection.rollback()
             return 0
 
+    def _insert_rows(self, cursor: Any, teachers: List[Teacher]) -> List[int]:
+        """Insère les personnes puis les professeurs par deux INSERT multi-lignes,
+        en rattachant chaque professeur à l'id_person qui lui a été attribué"""
+        person_ids = self._insert_persons(cursor, teachers)
+        ids = self._insert_values(cursor, "INSERT INTO teacher (hiring_date, id_person) VALUES",
+                                  [(t.hiring_date, person_id) for t, person_id in zip(teachers, person_ids)])
+        for teacher, new_id in zip(teachers, ids):
+            teacher.id = new_id
+        return [teacher.id for teacher in teachers]
+
+    @cached_read
     def read(self, id_teacher: int) -> Optional[Teacher]:
         """Retourne un teacher en fonction de son id"""
         teacher: Optional[Teacher]
 
-        with Dao.connection.cursor() as cursor:
+        with Dao.connection() as connection, connection.cursor() as cursor:
             sql = "SELECT * FROM teacher t INNER JOIN person p ON t.id_person = p.id_person WHERE t.id_teacher=%s"
             cursor.execute(sql, (id_teacher,))
             record = cursor.fetchone()
         if record is not None:
-            teacher = Teacher(record['first_name'], record['last_name'],record['age'], record['hiring_date'])
-            teacher.id = record['id_teacher']
+            teacher = TeacherDao._from_record(record)
         else:
             teacher = None
 
         return teacher
 
+    @cached_read_many
+    def read_many(self, ids: Iterable[int]) -> List[Optional[Teacher]]:
+        """Renvoie les teachers d'ids donnés, lus par requêtes IN (...) groupées
+        :param ids: ids recherchés
+        :return: les teachers, dans l'ordre de ids (None pour un id introuvable)
+        """
+        return Dao._read_many("SELECT * FROM teacher t INNER JOIN person p ON t.id_person = p.id_person", "t.id_teacher", TeacherDao._from_record, list(ids))
+
     def read_all(self) -> List[Teacher]:
         """Renvoi tous les teachers"""
         teachers: List[Teacher] = []
         try:
-            with Dao.connection.cursor() as cursor:
+            with Dao.connection() as connection, connection.cursor() as cursor:
                 sql = "SELECT * FROM teacher t INNER JOIN person p ON t.id_person = p.id_person"
                 cursor.execute(sql)
                 records = cursor.fetchall()
 
             for record in records:
-                teacher = Teacher(record['first_name'], record['last_name'],record['age'], record['hiring_date'])
-                teacher.id = record['id_teacher']
-
-                teachers.append(teacher)
+                teachers.append(TeacherDao._from_record(record))
 
         except Exception as e:
             print(f"Erreur lors de la lecture des cours: {e}")
 
         return teachers
 
+    def iter_all(self, batch_size: int = 1000) -> Iterator[Teacher]:
+        """Parcourt tous les teachers par paquets de batch_size lignes,
+        via un curseur côté serveur (mémoire constante)"""
+        try:
+            sql = "SELECT * FROM teacher t INNER JOIN person p ON t.id_person = p.id_person"
+            for records in Dao._iter_records(sql, batch_size=batch_size):
+                yield from map(TeacherDao._from_record, records)
+        except Exception as e:
+            print(f"Erreur lors de la lecture des professeurs: {e}")
+
+    def read_page(self, limit: int = 50, token: Optional[str] = None, order_by: str = 'id') -> Page[Teacher]:
+        """Renvoie une page de teachers, par pagination sur clé
+        :param limit: nombre maximal de teachers de la page
+        :param token: jeton next_token de la page précédente (None pour la première)
+        :param order_by: 'id', 'name' ou 'hiring_date'
+        """
+        select = "SELECT * FROM teacher t INNER JOIN person p ON t.id_person = p.id_person"
+        return Dao._read_page('teacher', select, TeacherDao.PAGE_ORDERS,
+                              TeacherDao._from_record, limit, token, order_by)
+
+    def iter_summaries(self, batch_size: int = 1000) -> Iterator[TeacherSummary]:
+        """Parcourt les teachers sous forme de résumés (prénom, nom, âge et date d'embauche) : seules ces colonnes
+        sont lues, en tuples, via un curseur côté serveur (mémoire constante)"""
+        sql = "SELECT p.first_name, p.last_name, p.age, t.hiring_date FROM teacher t INNER JOIN person p ON t.id_person = p.id_person"
+        for rows in Dao._iter_records(sql, batch_size=batch_size, as_tuples=True):
+            yield from map(TeacherSummary._make, rows)
+
+    @staticmethod
+    def _from_record(record: dict) -> Teacher:
+        """Construit le teacher correspondant à une ligne teacher ⨝ person"""
+        teacher = Teacher(record['first_name'], record['last_name'], record['age'], record['hiring_date'])
+        teacher.id = record['id_teacher']
+        return teacher
+
+    @invalidates(lambda teacher: teacher.id)
+    @publishes('updated')
     def update(self, teacher: Teacher) -> bool:
         """Met à jour en BD l'entité Teacher correspondant à teacher, pour y correspondre
         :param teacher: Le teacher a update
         :return: True si la mise à jour a pu être réalisée sinon False
         """
         try:
-            with Dao.connection.cursor() as cursor:
-                sql = "UPDATE teacher SET first_name=%s, last_name=%s, age=%S, hiring_date=%s WHERE id_teacher=%s"
-                cursor.execute(sql,(teacher.first_name, teacher.last_name, teacher.age, teacher.hiring_date, teacher.id))
-                Dao.connection.commit()
-                return cursor.rowcount > 0
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                # prénom, nom et âge sont des colonnes de la personne du professeur
+                person_id = self._person_id(cursor, 'teacher', 'id_teacher', teacher.id)
+                if person_id is None:
+                    return False
+                self._update_person(cursor, person_id, teacher)
+                sql = "UPDATE teacher SET hiring_date=%s WHERE id_teacher=%s"
+                cursor.execute(sql, (teacher.hiring_date, teacher.id))
+                connection.commit()
+                return True
 
         except Exception as e:
             print(f"Le professeur n'as pas pu être mis a jour : {e}")
             return False
 
+    @invalidates(lambda teacher: teacher.id, forget=True)
+    @publishes('deleted')
     def delete(self, teacher: Teacher) -> bool:
-        """Supprime en BD l'entité Teacher correspondant à teacher
+        """Supprime en BD l'entité Teacher correspondant à teacher, et sa personne
+        (refusé tant qu'il enseigne des cours)
         :param teacher: Teacher à supprimer
         :return: True si la suppression a pu être réalisée sinon False
         """
         try:
-            with Dao.connection.cursor() as cursor:
-                sql = "DELETE FROM teacher WHERE id_teacher=%s"
-                cursor.execute(sql, (teacher.id,))
-                Dao.connection.commit()
-                return cursor.rowcount > 0
+            with Dao.connection() as connection, connection.cursor() as cursor:
+                person_id = self._person_id(cursor, 'teacher', 'id_teacher', teacher.id)
+                if person_id is None:
+                    return False
+                cursor.execute("DELETE FROM teacher WHERE id_teacher=%s", (teacher.id,))
+                cursor.execute("DELETE FROM person WHERE id_person=%s", (person_id,))
+                connection.commit()
+                return True
 
         except Exception as e:
             print(f"Erreur lors de la suppression du professeur: {e}")
-            Dao.connection.rollback()
             return False
 
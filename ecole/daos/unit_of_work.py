@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+"""
+Unité de travail : regroupe les écritures de plusieurs opérations en une seule transaction
+- UnitOfWork      : connexion dédiée, créations en attente, points de sauvegarde
+- transaction     : ouvre une unité de travail (un point de sauvegarde si une unité est en cours)
+- deferred_create : décorateur placé sur la méthode create() des DAO
+"""
+
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from ecole.daos.cache import unit_reads
+from ecole.daos.pool import ConnectionPool
+
+
+@dataclass
+class PendingWrite:
+    """Écriture en attente d'une unité de travail :
+    - dao        : DAO chargé de l'écriture
+    - obj        : objet à créer, ou liste de couples (student_nbr, id_course) à inscrire
+    - pending_id : id provisoire (négatif) renvoyé à la place de l'id définitif (0 pour takes)
+    """
+    dao: Any
+    obj: Any
+    pending_id: int = 0
+
+
+@dataclass
+class DeferredCommitConnection:
+    """Connexion de l'unité de travail prêtée aux DAO : leur commit() est sans effet,
+    la validation n'ayant lieu qu'à la fin de l'unité."""
+    connection: Any
+
+    def commit(self) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.connection, name)
+
+
+@dataclass
+class UnitOfWork:
+    """Unité de travail : toutes les opérations des DAO y partagent une connexion et
+    une transaction, validée une seule fois à la fin. Les créations (create) sont mises
+    en attente et renvoient un id provisoire négatif, utilisable comme référence par les
+    créations suivantes (id_teacher d'un cours, inscriptions). Elles sont écrites par
+    INSERT multi-lignes, dans l'ordre des dépendances (adresses, personnes, cours, puis
+    inscriptions), au plus tard à la validation ou avant toute autre requête.
+    - pool       : pool auquel la connexion de l'unité est empruntée
+    - chunk_size : nombre maximal de lignes par INSERT
+    """
+    pool: ConnectionPool
+    chunk_size: int = 1000
+    _connection: Any = field(default=None, init=False, repr=False)
+    _writes: list[PendingWrite] = field(default_factory=list, init=False, repr=False)
+    _flushed: int = field(default=0, init=False, repr=False)
+    _resolved: dict[int, int] = field(default_factory=dict, init=False, repr=False)
+    _last_pending_id: int = field(default=0, init=False, repr=False)
+    _savepoints: int = field(default=0, init=False, repr=False)
+    _after_commit: list[Callable[[], None]] = field(default_factory=list, init=False, repr=False)
+    _exclusive: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
+
+    def begin(self) -> None:
+        self._connection = self.pool.acquire()
+
+    def commit(self) -> list[Callable[[], None]]:
+        """Écrit les créations en attente et valide la transaction ; renvoie les
+        fonctions enregistrées par after_commit, à exécuter une fois l'unité refermée."""
+        try:
+            self.flush()
+            self._connection.commit()
+        except BaseException:
+            self.rollback()
+            raise
+        self._release()
+        callbacks, self._after_commit = self._after_commit, []
+        return callbacks
+
+    def rollback(self) -> None:
+        """Annule toute la transaction."""
+        try:
+            self._connection.rollback()
+        finally:
+            self._release()
+            self._after_commit.clear()
+
+    def exclusive(self) -> threading.RLock:
+        """Verrou des threads qui partagent l'unité (cf. ecole.daos.async_dao) : sa
+        connexion ne peut servir qu'à une opération à la fois."""
+        return self._exclusive
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Exécute callback après la validation de l'unité, hors de celle-ci (jamais
+        si elle est annulée)."""
+        self._after_commit.append(callback)
+
+    def _release(self) -> None:
+        if self._connection is not None:
+            self.pool.release(self._connection)
+            self._connection = None
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Prête la connexion de l'unité à une opération d'un DAO, après écriture
+        des créations en attente (que l'opération doit pouvoir lire)."""
+        self.flush()
+        yield DeferredCommitConnection(self._connection)
+
+    def add_create(self, dao: Any, obj: Any) -> int:
+        """Met en attente la création de obj par dao et renvoie son id provisoire."""
+        self._last_pending_id -= 1
+        self._writes.append(PendingWrite(dao, obj, self._last_pending_id))
+        return self._last_pending_id
+
+    def add_enrollments(self, takes_dao: Any, pairs: list[tuple[int, int]]) -> int:
+        """Met en attente les inscriptions pairs et renvoie leur nombre."""
+        self._writes.append(PendingWrite(takes_dao, pairs))
+        return len(pairs)
+
+    def resolve(self, id_entity: Optional[int]) -> Optional[int]:
+        """Renvoie l'id définitif correspondant à un id provisoire (les autres ids sont
+        renvoyés tels quels) ; l'entité doit avoir été écrite (cf. flush)."""
+        if id_entity is None or id_entity >= 0:
+            return id_entity
+        if id_entity not in self._resolved:
+            raise ValueError(f"Id provisoire inconnu ou pas encore écrit en BD: {id_entity}")
+        return self._resolved[id_entity]
+
+    def flush(self) -> None:
+        """Écrit les créations en attente, groupées par DAO dans l'ordre FLUSH_RANK
+        de ceux-ci (l'ordre de mise en attente est conservé au sein d'un DAO)."""
+        pending = self._writes[self._flushed:]
+        if not pending:
+            return
+
+        def group_key(write: PendingWrite) -> tuple[int, str]:
+            return write.dao.FLUSH_RANK, type(write.dao).__name__
+
+        with self._connection.cursor() as cursor:
+            for _, group in groupby(sorted(pending, key=group_key), key=group_key):
+                writes = list(group)
+                if writes[0].pending_id == 0:
+                    self._flush_enrollments(cursor, writes)
+                else:
+                    self._flush_creates(cursor, writes)
+        self._flushed = len(self._writes)
+
+    def _flush_creates(self, cursor: Any, writes: list[PendingWrite]) -> None:
+        dao = writes[0].dao
+        objs = [write.obj for write in writes]
+        for obj in objs:
+            for attribute in dao.PENDING_REFERENCES:
+                setattr(obj, attribute, self.resolve(getattr(obj, attribute)))
+        rejected = dao._reject_rows(cursor, list(enumerate(objs)))
+        if rejected:
+            raise ValueError(next(iter(rejected.values())))
+        for start in range(0, len(writes), self.chunk_size):
+            chunk = writes[start:start + self.chunk_size]
+            ids = dao._insert_rows(cursor, [write.obj for write in chunk])
+            self._resolved.update((write.pending_id, new_id) for write, new_id in zip(chunk, ids))
+        dao._publish('created', objs)
+
+    def _flush_enrollments(self, cursor: Any, writes: list[PendingWrite]) -> None:
+        pairs = dict.fromkeys((self.resolve(student_nbr), self.resolve(id_course))
+                              for write in writes for student_nbr, id_course in write.obj)
+        takes_dao = writes[0].dao
+        inserted: list[tuple[int, int]] = []
+        takes_dao._insert(cursor, list(pairs), inserted)
+        takes_dao._publish('created', inserted)
+
+    @contextmanager
+    def savepoint(self) -> Iterator['UnitOfWork']:
+        """Point de sauvegarde : si le bloc with lève une exception, seules ses
+        opérations (écritures en attente comprises) sont annulées, puis l'exception
+        est propagée ; l'unité de travail reste utilisable."""
+        self.flush()
+        self._savepoints += 1
+        name = f"unit_of_work_{self._savepoints}"
+        mark, callbacks_mark = len(self._writes), len(self._after_commit)
+        with self._connection.cursor() as cursor:
+            cursor.execute(f"SAVEPOINT {name}")
+        try:
+            yield self
+        except BaseException:
+            with self._connection.cursor() as cursor:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {name}")
+            for write in self._writes[mark:]:
+                self._resolved.pop(write.pending_id, None)
+            del self._writes[mark:]
+            del self._after_commit[callbacks_mark:]
+            self._flushed = min(self._flushed, mark)
+            raise
+
+
+# unité de travail en cours (propre au thread / à la tâche asyncio)
+_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar('unit_of_work', default=None)
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Renvoie l'unité de travail en cours, ou None."""
+    return _unit_of_work.get()
+
+
+@contextmanager
+def transaction(pool: ConnectionPool) -> Iterator[UnitOfWork]:
+    """Ouvre une unité de travail, validée à la sortie du bloc with et annulée
+    si celui-ci lève une exception. Dans une unité déjà ouverte, ouvre un point
+    de sauvegarde de celle-ci."""
+    unit = _unit_of_work.get()
+    if unit is not None:
+        with unit.savepoint():
+            yield unit
+        return
+
+    unit = UnitOfWork(pool)
+    unit.begin()
+    token = _unit_of_work.set(unit)
+    try:
+        # lectures de l'unité hors du cache partagé, qui ne contient que des données validées
+        with unit_reads():
+            try:
+                yield unit
+            except BaseException:
+                unit.rollback()
+                raise
+            callbacks = unit.commit()
+    finally:
+        _unit_of_work.reset(token)
+    # après la fermeture de l'unité : un écouteur qui lit la BD emprunte une connexion
+    # du pool et le cache partagé, débarrassé des entités écrites par l'unité
+    for callback in callbacks:
+        callback()
+
+
+def resolve_pending(ids: Iterable[Optional[int]]) -> list[Optional[int]]:
+    """Remplace les ids provisoires de l'unité de travail en cours par les ids définitifs."""
+    unit = _unit_of_work.get()
+    return list(ids) if unit is None else [unit.resolve(id_entity) for id_entity in ids]
+
+
+def deferred_create(method: Callable) -> Callable:
+    """Décore la méthode create(obj) d'un DAO : dans une unité de travail, la création
+    est mise en attente et l'id provisoire (négatif) de l'entité est renvoyé."""
+    @functools.wraps(method)
+    def wrapper(self, obj: Any) -> int:
+        unit = _unit_of_work.get()
+        if unit is None:
+            return method(self, obj)
+        return unit.add_create(self, obj)
+    return wrapper
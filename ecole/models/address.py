@@ -8,7 +8,7 @@ from dataclasses import dataclass, field
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Address:
     """Adresse d'une personne (enseignant ou élève)."""
     id: Optional[int] = field(default=None, init=False)
@@ -18,7 +18,7 @@ if TYPE_CHECKING:
     from .student import Student
     from .teacher import Teacher
 
-@dataclass
+@dataclass(slots=True)
 class Course:
     """Cours enseigné à l'école :
     - id                 : clé primaire de l'entité persistante
@@ -26,14 +26,25 @@ class Course:
     - start_date         : date de début
     - end_date           : date de fin
     - teacher            : enseignant de ce cours
-    - students_taking_it : élèves qui suivent ce cours
+    - students_taking_it : élèves qui suivent ce cours (liste allouée au premier accès)
     """
     id: Optional[int] = field(default=None, init=False)
     name: str
     start_date: date
     end_date: date
     id_teacher: Optional[int] = None
-    students_taking_it: list[Student] = field(default_factory=list, init=False)
+    teacher: Optional[Teacher] = field(default=None, init=False, repr=False, compare=False)
+    _students_taking_it: Optional[list[Student]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def students_taking_it(self) -> list[Student]:
+        if self._students_taking_it is None:
+            self._students_taking_it = []
+        return self._students_taking_it
+
+    @students_taking_it.setter
+    def students_taking_it(self, students: list[Student]) -> None:
+        self._students_taking_it = students
 
     def set_teacher(self, teacher: Teacher) -> None:
         """Indique quel est l'enseignant de ce cours."""
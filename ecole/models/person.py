@@ -10,9 +10,11 @@ from dataclasses import dataclass, field
 from .address import Address
 
 
-@dataclass
+@dataclass(slots=True)
 class Person(ABC):
-    """Personne liée à l'école : enseignant ou élève."""
+    """Personne liée à l'école : enseignant ou élève.
+    Comme toutes les classes du modèle, elle est déclarée avec __slots__ (pas de
+    __dict__ par instance) pour limiter la mémoire d'une école chargée en entier."""
     first_name: str
     last_name: str
     age: int
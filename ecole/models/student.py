@@ -5,32 +5,54 @@ Classe Student, fille de la classe Person
 """
 
 from dataclasses import dataclass, field
-from typing import ClassVar
+from typing import ClassVar, Optional
 from .person import Person
 from .course import Course
 
 
-@dataclass
+@dataclass(slots=True)
 class Student(Person):
     """Elève suivant un ou plusieurs cours de l'école :
-    - students_nb   : nombre total d'élèves
-    - student_nbr   : n° d'élève
-    - courses_taken : liste des cours pris par cet élève
+    - students_nb   : nombre d'élèves créés dans ce processus
+    - student_nbr   : n° d'élève (aussi accessible en tant que id) ; celui attribué à la
+                      création de l'objet n'est valable qu'en mémoire, StudentDao le remplace
+                      par un n° réservé en BD (cf. ecole.daos.sequence)
+    - courses_taken : liste des cours pris par cet élève (allouée au premier accès)
     """
     students_nb: ClassVar[int] = 0  # nb d'étudiants créés
     student_nbr: int = field(init=False)
-    courses_taken: list[Course] = field(default_factory=list, init=False)
+    _courses_taken: Optional[list[Course]] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         """Détermination du n° de l'élève créé."""
         Student.students_nb += 1
         self.student_nbr = Student.students_nb
 
+    @property
+    def id(self) -> int:
+        """Clé primaire de l'entité persistante : le n° d'élève."""
+        return self.student_nbr
+
+    @id.setter
+    def id(self, student_nbr: int) -> None:
+        self.student_nbr = student_nbr
+
+    @property
+    def courses_taken(self) -> list[Course]:
+        if self._courses_taken is None:
+            self._courses_taken = []
+        return self._courses_taken
+
+    @courses_taken.setter
+    def courses_taken(self, courses: list[Course]) -> None:
+        self._courses_taken = courses
+
     def add_course(self, course: Course) -> None:
         """Ajout du cours course à la liste des cours suivis par l'élève."""
         self.courses_taken.append(course)
         course.students_taking_it.append(self)
 
     def __str__(self) -> str:
-        person_str = super().__str__()
+        # super() sans argument n'est pas utilisable dans une dataclass à __slots__
+        person_str = Person.__str__(self)
         return f"{person_str}, n° étudiant : {self.student_nbr}"
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+"""
+Résumés compacts des entités, pour les listes et rapports
+(seules les colonnes affichées sont lues en BD)
+"""
+
+from datetime import date
+from typing import NamedTuple
+
+
+class CourseSummary(NamedTuple):
+    """Résumé d'un cours : id, nom et dates."""
+    id: int
+    name: str
+    start_date: date
+    end_date: date
+
+
+class TeacherSummary(NamedTuple):
+    """Résumé d'un enseignant : identité, âge et date d'embauche."""
+    first_name: str
+    last_name: str
+    age: int
+    hiring_date: date
+
+
+class StudentSummary(NamedTuple):
+    """Résumé d'un élève : identité et âge."""
+    first_name: str
+    last_name: str
+    age: int
+
+
+class AddressSummary(NamedTuple):
+    """Résumé d'une adresse."""
+    street: str
+    city: str
+    postal_code: int
@@ -11,21 +11,32 @@ from .person import Person
 from .course import Course
 
 
-@dataclass
+@dataclass(slots=True)
 class Teacher(Person):
     """Enseignant d'un ou plusieurs cours de l'école :
     - id              : clé primaire de l'entité persistante
     - hiring_date     : date d'arrivée dans l'école
-    - courses_teached : cours qu'il ou elle enseigne
+    - courses_teached : cours qu'il ou elle enseigne (liste allouée au premier accès)
     """
     id: Optional[int] = field(default=None, init=False)
     hiring_date: date
-    courses_teached: list[Course] = field(default_factory=list, init=False)
+    _courses_teached: Optional[list[Course]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def courses_teached(self) -> list[Course]:
+        if self._courses_teached is None:
+            self._courses_teached = []
+        return self._courses_teached
+
+    @courses_teached.setter
+    def courses_teached(self, courses: list[Course]) -> None:
+        self._courses_teached = courses
 
     def add_course(self, course: Course) -> None:
         """Ajout du cours course à la liste des cours qu'il enseigne."""
         course.teacher = self
 
     def __str__(self) -> str:
-        person_str = super().__str__()
+        # super() sans argument n'est pas utilisable dans une dataclass à __slots__
+        person_str = Person.__str__(self)
         return f"{person_str}, arrivé(e) le {self.hiring_date}"